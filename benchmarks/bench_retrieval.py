@@ -0,0 +1,348 @@
+"""
+Retrieval Benchmark
+Measures the in-memory RAG system (src/rag_system.py) on a synthetic
+portfolio of 1,000 / 10,000 / 100,000 contracts.
+
+The corpus is built from the templates in demo_contracts2/: each synthetic
+contract gets its own number, parties, dates and amounts, and some get
+extra sections borrowed from other templates so contract lengths vary
+(and some contracts need several chunks). The same --seed always builds
+the same corpus.
+
+Measured for each portfolio size:
+- chunk_text                  (per contract)
+- add_contract_to_vectordb    (per contract)
+- search_contracts            (one contract, and across the whole portfolio)
+- memory: RSS growth from loading the RAG storage, and peak RSS
+
+Latencies are reported as percentiles (p50/p95/p99) in milliseconds.
+Each size runs in a fresh process, so peak RSS belongs to that size alone.
+
+Usage:
+    python benchmarks/bench_retrieval.py                          # 1k, 10k, 100k
+    python benchmarks/bench_retrieval.py --sizes 1000,10000 --output before.json
+    python benchmarks/bench_retrieval.py --compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+# Allow running from the project root without installing anything
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-not-used")
+
+DEMO_DIR = os.path.join(PROJECT_DIR, "demo_contracts2")
+
+# Questions like the ones users ask in the AI chat
+QUERIES = [
+    "What are the payment terms?",
+    "When does this contract expire?",
+    "What is the termination notice period?",
+    "Who are the parties to this agreement?",
+    "Is there a limitation of liability?",
+    "What are the confidentiality obligations?",
+    "Does the contract renew automatically?",
+    "What penalties apply for late delivery?",
+    "What is the total contract value?",
+    "Which law governs this agreement?",
+]
+
+COMPANIES = [
+    "TechCorp Solutions", "DataFlow Systems", "Northwind Traders", "Globex Industries",
+    "Initech Services", "Umbrella Logistics", "Stark Manufacturing", "Wayne Consulting",
+    "Acme Distribution", "Blue Harbor Partners", "Summit Analytics", "Crescent Health",
+]
+
+SIZES = (1000, 10000, 100000)
+
+
+# ============================================================================
+# SYNTHETIC CORPUS
+# ============================================================================
+
+def load_templates() -> List[str]:
+    templates = []
+    for path in sorted(glob.glob(os.path.join(DEMO_DIR, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            templates.append(f.read())
+    if not templates:
+        raise SystemExit(f"No templates found in {DEMO_DIR}")
+    return templates
+
+
+def split_sections(text: str) -> List[str]:
+    """Numbered sections ("4. CONFIDENTIALITY ...") of a template."""
+    return [section.strip() for section in re.split(r"\n(?=\d+\. [A-Z])", text)[1:]]
+
+
+def build_corpus(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Create `count` varied contracts (text + metadata) from the templates."""
+    rng = random.Random(seed)
+    templates = load_templates()
+    sections = [section for template in templates for section in split_sections(template)]
+    base_date = date(2024, 1, 1)
+    
+    corpus = []
+    for i in range(count):
+        text = templates[i % len(templates)]
+        number = f"CNT-SYN-{i:06d}"
+        party_a, party_b = rng.sample(COMPANIES, 2)
+        start = base_date + timedelta(days=rng.randrange(0, 900))
+        end = start + timedelta(days=rng.randrange(180, 1500))
+        
+        text = re.sub(r"CNT-\d{4}-\d{4}", number, text)
+        text = text.replace("TechCorp Solutions", party_a).replace("DataFlow Systems", party_b)
+        text = re.sub(r"EFFECTIVE DATE: .*", f"EFFECTIVE DATE: {start:%B %d, %Y}", text)
+        text = re.sub(r"EXPIRATION DATE: .*", f"EXPIRATION DATE: {end:%B %d, %Y}", text)
+        text = re.sub(r"\$[\d,]+\.\d{2}", f"${rng.randrange(5_000, 5_000_000):,}.00", text)
+        
+        # About a third of contracts get extra sections (1x - 5x the base length)
+        if rng.random() < 0.35:
+            extra = rng.sample(sections, rng.randrange(3, min(40, len(sections))))
+            text += "\n\nADDITIONAL TERMS:\n\n" + "\n\n".join(extra)
+        
+        corpus.append({
+            "id": i + 1,
+            "text": text,
+            "metadata": {"name": f"Synthetic Agreement {i}", "number": number, "party_a": party_a, "party_b": party_b},
+        })
+    return corpus
+
+
+# ============================================================================
+# MEASUREMENT HELPERS
+# ============================================================================
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (milliseconds)."""
+    ordered = sorted(samples_ms)
+    
+    def pick(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+    
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(pick(0.50), 4),
+        "p95_ms": round(pick(0.95), 4),
+        "p99_ms": round(pick(0.99), 4),
+        "max_ms": round(ordered[-1], 4),
+        "total_s": round(sum(ordered) / 1000, 3),
+    }
+
+
+def current_rss_mb() -> float:
+    """Resident memory right now (Linux /proc; falls back to peak elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ============================================================================
+# ONE PORTFOLIO SIZE (runs in its own process)
+# ============================================================================
+
+def run_size(size: int, seed: int, queries: int) -> Dict[str, Any]:
+    import logging
+    logging.disable(logging.INFO)  # Per-contract log lines would dominate the timings
+    
+    from src.rag_system import ContractRAGSystem
+    
+    corpus = build_corpus(size, seed)
+    rag = ContractRAGSystem()
+    rng = random.Random(seed + 1)
+    
+    # chunk_text
+    chunk_samples = []
+    for item in corpus:
+        started = time.perf_counter()
+        rag.chunk_text(item["text"], chunk_size=3000, overlap=500)
+        chunk_samples.append((time.perf_counter() - started) * 1000)
+    
+    # add_contract_to_vectordb (+ memory growth of the storage)
+    rss_before = current_rss_mb()
+    add_samples = []
+    
+    async def load_all():
+        for item in corpus:
+            started = time.perf_counter()
+            await rag.add_contract_to_vectordb(item["id"], item["text"], item["metadata"])
+            add_samples.append((time.perf_counter() - started) * 1000)
+    
+    asyncio.run(load_all())
+    rss_after = current_rss_mb()
+    
+    # search_contracts, one contract at a time and across the portfolio
+    contract_samples = []
+    global_samples = []
+    for _ in range(queries):
+        query = rng.choice(QUERIES)
+        contract_id = rng.randrange(1, size + 1)
+        started = time.perf_counter()
+        rag.search_contracts(query, n_results=5, contract_id=contract_id)
+        contract_samples.append((time.perf_counter() - started) * 1000)
+        
+        started = time.perf_counter()
+        rag.search_contracts(query, n_results=5)
+        global_samples.append((time.perf_counter() - started) * 1000)
+    
+    total_chars = sum(len(item["text"]) for item in corpus)
+    total_chunks = sum(len(data["chunks"]) for data in rag.contracts_storage.values())
+    rag_delta = rss_after - rss_before
+    
+    return {
+        "corpus": {
+            "contracts": size,
+            "characters": total_chars,
+            "chunks": total_chunks,
+            "avg_chars_per_contract": round(total_chars / size, 1),
+        },
+        "chunk_text": percentiles(chunk_samples),
+        "add_contract_to_vectordb": percentiles(add_samples),
+        "search_contracts_single": percentiles(contract_samples),
+        "search_contracts_global": percentiles(global_samples),
+        "memory": {
+            "rss_before_load_mb": round(rss_before, 1),
+            "rss_after_load_mb": round(rss_after, 1),
+            "rag_storage_mb": round(rag_delta, 1),
+            "bytes_per_contract": round(rag_delta * 1024 * 1024 / size, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
+    }
+
+
+# ============================================================================
+# RESULTS FILES
+# ============================================================================
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """{"1000": {"chunk_text": {"p50_ms": 1}}} -> {"1000.chunk_text.p50_ms": 1}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(old_path: str, new_path: str, threshold: float):
+    """Print every metric of two results files side by side."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    
+    print(f"old: {old_path} (commit {old['meta'].get('commit')}, {old['meta'].get('timestamp')})")
+    print(f"new: {new_path} (commit {new['meta'].get('commit')}, {new['meta'].get('timestamp')})")
+    if old["meta"].get("seed") != new["meta"].get("seed"):
+        print("WARNING: different --seed, the corpora are not identical")
+    print()
+    
+    old_flat, new_flat = flatten(old["results"]), flatten(new["results"])
+    regressions = 0
+    print(f"{'metric':<55} {'old':>12} {'new':>12} {'change':>9}")
+    for name in sorted(set(old_flat) | set(new_flat), key=lambda key: (int(key.split(".")[0]), key)):
+        before, after = old_flat.get(name), new_flat.get(name)
+        if before is None or after is None:
+            print(f"{name:<55} {before if before is not None else '-':>12} {after if after is not None else '-':>12}")
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        # Lower is better for times and memory
+        flag = ""
+        if name.endswith(("_ms", "_s", "_mb", "bytes_per_contract")) and change > threshold:
+            flag = "  <-- slower/bigger"
+            regressions += 1
+        elif name.endswith(("_ms", "_s", "_mb", "bytes_per_contract")) and change < -threshold:
+            flag = "  faster/smaller"
+        print(f"{name:<55} {before:>12g} {after:>12g} {change:>+8.1f}%{flag}")
+    
+    print(f"\n{regressions} metric(s) worse by more than {threshold:g}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAG chunking and retrieval on a synthetic portfolio.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in SIZES),
+                        help="Comma-separated portfolio sizes (default: 1000,10000,100000)")
+    parser.add_argument("--queries", type=int, default=500, help="Search queries per size (default: 500)")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed (default: 42)")
+    parser.add_argument("--output", default="bench_retrieval.json", help="Results file (default: bench_retrieval.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Diff two results files instead of running")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent change flagged by --compare (default: 10)")
+    args = parser.parse_args()
+    
+    if args.compare:
+        compare(args.compare[0], args.compare[1], args.threshold)
+        return
+    
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for size in sizes:
+        print(f"Benchmarking {size:,} contracts...", flush=True)
+        with context.Pool(1) as pool:
+            result = pool.apply(run_size, (size, args.seed, args.queries))
+        results[str(size)] = result
+        print(
+            f"  chunk_text p50 {result['chunk_text']['p50_ms']:.4f} ms | "
+            f"add p50 {result['add_contract_to_vectordb']['p50_ms']:.4f} ms | "
+            f"search single p95 {result['search_contracts_single']['p95_ms']:.3f} ms | "
+            f"search global p95 {result['search_contracts_global']['p95_ms']:.3f} ms | "
+            f"RAG {result['memory']['rag_storage_mb']:.0f} MB, peak RSS {result['memory']['peak_rss_mb']:.0f} MB"
+        )
+    
+    report = {
+        "meta": {
+            "benchmark": "retrieval",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "queries": args.queries,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Serialization Benchmark
+Measures what it costs to turn contract rows into a JSON response body.
+
+Compares, per 1,000 rows:
+1. ORM path   - Contract objects -> Pydantic ContractResponse validation -> json.dumps
+                (what FastAPI does for response_model=List[ContractResponse])
+2. Fast path  - column tuples -> dicts -> orjson (src/fast_json.py)
+3. Fast path with the standard json fallback (no orjson installed)
+plus gzip / brotli compression of the result.
+
+Usage:
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --rows 5000 --repeat 7
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+# Allow running from the project root without installing anything
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-not-used")
+
+from pydantic import TypeAdapter
+
+from src.database import Contract
+from src.schemas import ContractResponse
+from src import fast_json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DEMO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "demo_contracts2")
+FIELDS = list(ContractResponse.model_fields)
+
+
+def build_contracts(count: int) -> List[Contract]:
+    """Create transient Contract objects with realistic text lengths."""
+    texts = [open(path, encoding="utf-8").read() for path in sorted(glob.glob(os.path.join(DEMO_DIR, "*.txt")))]
+    if not texts:
+        texts = ["Lorem ipsum dolor sit amet. " * 200]
+    
+    now = datetime.utcnow()
+    contracts = []
+    for i in range(count):
+        text = texts[i % len(texts)]
+        contracts.append(Contract(
+            id=i + 1,
+            contract_name=f"Service Agreement {i}",
+            contract_number=f"CNT-BENCH-{i:06d}",
+            party_a="Acme Corporation",
+            party_b=f"Vendor {i % 97}",
+            start_date=now - timedelta(days=i % 700),
+            end_date=now + timedelta(days=i % 900),
+            created_at=now,
+            updated_at=now,
+            status=("active", "expired", "renewed", "pending")[i % 4],
+            contract_value=float(1000 * (i % 500)),
+            currency="USD",
+            risk_level=("low", "medium", "high", "critical")[i % 4],
+            risk_reason="Base financial risk with standard escalators",
+            file_path=None,
+            file_type=".txt",
+            summary=text[:2000],
+            key_clauses=json.dumps({"extracted_clauses": text[2000:3500]}),
+        ))
+    return contracts
+
+
+def time_it(func, repeat: int) -> float:
+    """Median wall time of func() in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark contract list serialization.")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per response (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions, median is reported (default: 5)")
+    args = parser.parse_args()
+    
+    contracts = build_contracts(args.rows)
+    tuples = [tuple(getattr(c, field) for field in FIELDS) for c in contracts]
+    adapter = TypeAdapter(List[ContractResponse])
+    
+    def orm_path():
+        validated = adapter.validate_python(contracts, from_attributes=True)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+    
+    def fast_path():
+        return fast_json.dumps([dict(zip(FIELDS, row)) for row in tuples])
+    
+    def fast_path_stdlib():
+        orjson_module = fast_json.orjson
+        fast_json.orjson = None
+        try:
+            return fast_json.dumps([dict(zip(FIELDS, row)) for row in tuples])
+        finally:
+            fast_json.orjson = orjson_module
+    
+    body = fast_path()
+    per_1000 = 1000 / args.rows
+    
+    results = [
+        ("ORM + Pydantic + json", time_it(orm_path, args.repeat)),
+        (f"tuples + {'orjson' if fast_json.orjson else 'json (orjson missing)'}", time_it(fast_path, args.repeat)),
+        ("tuples + json (fallback)", time_it(fast_path_stdlib, args.repeat)),
+        ("gzip level 6", time_it(lambda: gzip.compress(body, compresslevel=6), args.repeat)),
+    ]
+    if brotli is not None:
+        results.append(("brotli quality 5", time_it(lambda: brotli.compress(body, quality=5), args.repeat)))
+    
+    print(f"Serialization of {args.rows} contract rows ({len(body) / 1024:.0f} KB of JSON), median of {args.repeat}")
+    print(f"{'step':<32} {'ms/response':>12} {'ms/1000 rows':>13}")
+    for name, ms in results:
+        print(f"{name:<32} {ms:>12.2f} {ms * per_1000:>13.2f}")
+    
+    gzip_size = len(gzip.compress(body, compresslevel=6))
+    print(f"\nResponse size: {len(body):,} bytes raw, {gzip_size:,} gzip ({len(body) / gzip_size:.1f}x)", end="")
+    if brotli is not None:
+        br_size = len(brotli.compress(body, quality=5))
+        print(f", {br_size:,} brotli ({len(body) / br_size:.1f}x)")
+    else:
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+End-to-End Load Test
+Drives a mix of real API traffic (upload, ask, list, warnings, stats)
+against the FastAPI app and reports throughput and tail latency.
+
+By default the app runs inside this process with:
+- the fake AI backend (LLM_BACKEND=fake) - no Gemini key or network needed,
+  but every AI call still takes FAKE_LLM_LATENCY_MS like a real one would
+- a throw-away SQLite database and upload folder
+
+Because the app shares this process's event loop, the reported event-loop
+lag is the server's: if a request handler blocks the loop (CPU work,
+synchronous I/O), every other request waits and the lag goes up.
+
+With --url the test targets a running server instead (start it with
+LLM_BACKEND=fake!). Event-loop lag is then only the load generator's own.
+
+Usage:
+    python benchmarks/load_test.py                                  # 30s, 16 users
+    python benchmarks/load_test.py --duration 60 --concurrency 50 --llm-latency-ms 1500
+    python benchmarks/load_test.py --mix upload=10,ask=40,list=30,warnings=10,stats=10
+    python benchmarks/load_test.py --url http://localhost:8000 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# Allow running from the project root without installing anything
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from bench_retrieval import QUERIES, build_corpus, percentiles
+
+DEFAULT_MIX = "upload=5,ask=20,list=35,warnings=20,stats=20"
+
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+class Results:
+    """Latency samples and error counts per operation."""
+    
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.loop_lag_ms: List[float] = []
+    
+    def record(self, operation: str, elapsed_ms: float, error: Optional[str] = None):
+        self.latencies.setdefault(operation, []).append(elapsed_ms)
+        if error:
+            counts = self.errors.setdefault(operation, {})
+            counts[error] = counts.get(error, 0) + 1
+    
+    def report(self, elapsed_s: float) -> Dict[str, Any]:
+        operations = {}
+        for operation, samples in sorted(self.latencies.items()):
+            errors = self.errors.get(operation, {})
+            operations[operation] = {
+                **percentiles(samples),
+                "requests_per_s": round(len(samples) / elapsed_s, 2),
+                "errors": sum(errors.values()),
+                "error_kinds": errors,
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "elapsed_s": round(elapsed_s, 2),
+            "total_requests": total,
+            "requests_per_s": round(total / elapsed_s, 2),
+            "total_errors": sum(op["errors"] for op in operations.values()),
+            "operations": operations,
+            "event_loop_lag": percentiles(self.loop_lag_ms) if self.loop_lag_ms else None,
+        }
+
+
+async def watch_loop_lag(results: Results, stop: asyncio.Event, interval: float = 0.01):
+    """Sleep `interval` over and over; oversleeping means the loop was blocked."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        results.loop_lag_ms.append(max(0.0, (loop.time() - started - interval) * 1000))
+
+
+# ============================================================================
+# TRAFFIC
+# ============================================================================
+
+class LoadGenerator:
+    """Virtual users that each pick an operation by weight, run it, repeat."""
+    
+    def __init__(self, client, mix: Dict[str, int], seed: int, pool_size: int):
+        self.client = client
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.rng = random.Random(seed)
+        self.results = Results()
+        self.contract_ids: List[int] = []
+        # Each upload needs a new contract number (duplicates are rejected)
+        self.corpus = build_corpus(pool_size, seed)
+        self.next_upload = 0
+        self.run_tag = f"{int(time.time()) % 100000:05d}"  # Keeps numbers unique across --url runs
+    
+    async def do_upload(self) -> Optional[str]:
+        item = self.corpus[self.next_upload % len(self.corpus)]
+        self.next_upload += 1
+        number = item["metadata"]["number"]
+        text = item["text"].replace(number, f"{number}-{self.run_tag}-{self.next_upload}")
+        files = {"file": (f"{number}.txt", text.encode("utf-8"), "text/plain")}
+        response = await self.client.post("/api/contracts/upload", files=files)
+        if response.status_code == 200:
+            self.contract_ids.append(response.json()["id"])
+        return self._error(response)
+    
+    async def do_ask(self) -> Optional[str]:
+        payload = {"question": self.rng.choice(QUERIES)}
+        if self.contract_ids and self.rng.random() < 0.5:
+            payload["contract_id"] = self.rng.choice(self.contract_ids)
+        return self._error(await self.client.post("/api/contracts/ask", json=payload))
+    
+    async def do_list(self) -> Optional[str]:
+        return self._error(await self.client.get("/api/contracts"))
+    
+    async def do_warnings(self) -> Optional[str]:
+        return self._error(await self.client.get("/api/warnings"))
+    
+    async def do_stats(self) -> Optional[str]:
+        return self._error(await self.client.get("/api/dashboard/stats"))
+    
+    @staticmethod
+    def _error(response) -> Optional[str]:
+        return None if response.status_code < 400 else f"HTTP {response.status_code}"
+    
+    async def run_operation(self, operation: str):
+        started = time.perf_counter()
+        try:
+            error = await getattr(self, f"do_{operation}")()
+        except Exception as e:
+            error = type(e).__name__
+        self.results.record(operation, (time.perf_counter() - started) * 1000, error)
+    
+    async def user(self, deadline: float):
+        while time.perf_counter() < deadline:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            await self.run_operation(operation)
+    
+    async def seed_contracts(self, count: int, concurrency: int):
+        """Upload a starting portfolio (not counted in the results)."""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def one():
+            async with semaphore:
+                await self.do_upload()
+        
+        await asyncio.gather(*(one() for _ in range(count)))
+        self.results = Results()
+    
+    async def run(self, duration: float, concurrency: int) -> Dict[str, Any]:
+        stop = asyncio.Event()
+        watcher = asyncio.create_task(watch_loop_lag(self.results, stop))
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(self.user(deadline) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await watcher
+        return self.results.report(elapsed)
+
+
+# ============================================================================
+# RUNNING THE TEST
+# ============================================================================
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("upload", "ask", "list", "warnings", "stats"):
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        mix[name] = int(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+async def run_against(client, args) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    generator = LoadGenerator(client, mix, args.seed, pool_size=args.seed_contracts + 2000)
+    
+    print(f"Seeding {args.seed_contracts} contracts...")
+    await generator.seed_contracts(args.seed_contracts, args.concurrency)
+    
+    print(f"Running {args.concurrency} users for {args.duration:.0f}s (mix: {args.mix})...")
+    return await generator.run(args.duration, args.concurrency)
+
+
+async def run_in_process(args) -> Dict[str, Any]:
+    import httpx
+    from src.main import app
+    
+    # Run the app's startup (database tables, RAG warm-up...) like uvicorn would
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=300) as client:
+            return await run_against(client, args)
+    finally:
+        await app.router.shutdown()
+
+
+async def run_remote(args) -> Dict[str, Any]:
+    import httpx
+    
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=300, limits=limits) as client:
+        return await run_against(client, args)
+
+
+def print_report(report: Dict[str, Any], in_process: bool):
+    print()
+    print(f"{'operation':<10} {'count':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    print("-" * 74)
+    for name, op in report["operations"].items():
+        print(f"{name:<10} {op['count']:>7} {op['requests_per_s']:>8.2f} {op['p50_ms']:>9.1f} "
+              f"{op['p95_ms']:>9.1f} {op['p99_ms']:>9.1f} {op['max_ms']:>9.1f} {op['errors']:>7}")
+    print("-" * 74)
+    print(f"total: {report['total_requests']} requests in {report['elapsed_s']}s "
+          f"= {report['requests_per_s']} req/s, {report['total_errors']} errors")
+    
+    lag = report["event_loop_lag"]
+    if lag:
+        whose = "server" if in_process else "load generator"
+        print(f"event-loop lag ({whose}): p50 {lag['p50_ms']:.1f} ms, p99 {lag['p99_ms']:.1f} ms, max {lag['max_ms']:.1f} ms")
+    
+    for name, op in report["operations"].items():
+        if op["error_kinds"]:
+            print(f"  {name} errors: {op['error_kinds']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed-traffic load test for the contract API")
+    parser.add_argument("--url", help="Target a running server instead of an in-process app")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of measured traffic")
+    parser.add_argument("--concurrency", type=int, default=16, help="Number of virtual users")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed-contracts", type=int, default=20, help="Contracts uploaded before measuring")
+    parser.add_argument("--llm-latency-ms", type=float, help="Fake AI latency (in-process only)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+    
+    in_process = not args.url
+    if in_process:
+        # Must be set before the app (and its settings) are imported
+        workdir = tempfile.mkdtemp(prefix="contract-loadtest-")
+        os.environ["LLM_BACKEND"] = "fake"
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(workdir, 'loadtest.db')}"
+        os.environ["UPLOAD_DIRECTORY"] = os.path.join(workdir, "uploads")
+        os.environ.setdefault("GEMINI_API_KEY", "loadtest-not-used")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        os.environ.setdefault("SQL_ECHO", "False")
+        if args.llm_latency_ms is not None:
+            os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+        print(f"In-process app, fake AI backend, data in {workdir}")
+        report = asyncio.run(run_in_process(args))
+    else:
+        report = asyncio.run(run_remote(args))
+    
+    report["config"] = {
+        "target": args.url or "in-process",
+        "duration_s": args.duration,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "seed_contracts": args.seed_contracts,
+    }
+    print_report(report, in_process)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
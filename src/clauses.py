@@ -0,0 +1,261 @@
+"""
+Clause Store
+Keeps each contract's key clauses as rows in the contract_clauses table.
+
+The AI's clause extraction comes back as free text:
+    
+    **Payment Terms:** Net 30 by wire transfer...
+    **Termination Clause:** Either party may terminate with 30 days notice...
+
+Saved as one text blob (Contract.key_clauses), comparing the same clause
+across contracts would mean parsing every blob again - or asking the AI
+again - on each request. So the text is split up ONCE, when the contract is
+analyzed, into one row per clause:
+    
+    (contract_id, clause_type, text, start_offset, end_offset)
+
+The rows are indexed by clause type, which makes these fast:
+- "Show me every liability clause" (GET /api/clauses?clause_type=liability)
+- Asking a question about just one kind of clause (QuestionRequest.clause_type)
+
+Contract.key_clauses is still saved for the contract details page and the
+full-text search index.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, delete, insert, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import Contract, ContractClause
+from src.filter_index import sql_conditions
+
+logger = logging.getLogger(__name__)
+
+
+# Clause type key -> words that identify its heading (checked in this order)
+CLAUSE_TYPES = {
+    "payment_terms": ("payment",),
+    "termination": ("terminat",),
+    "renewal": ("renew",),
+    "liability": ("liabilit", "indemn"),
+    "confidentiality": ("confiden", "non-disclosure"),
+    "dispute_resolution": ("dispute", "arbitration", "governing law"),
+    "penalties": ("penalt", "damages"),
+}
+
+# How each clause type is labelled in the extraction prompt (and in Contract.key_clauses)
+CLAUSE_LABELS = {
+    "payment_terms": "Payment Terms",
+    "termination": "Termination Clause",
+    "renewal": "Renewal Terms",
+    "liability": "Liability Limitations",
+    "confidentiality": "Confidentiality Obligations",
+    "dispute_resolution": "Dispute Resolution",
+    "penalties": "Penalties/Damages",
+}
+
+# "**Payment Terms:**", "**Payment Terms**:" or "Payment Terms:" at the start of a line
+HEADING = re.compile(r"^[ \t]*(?:[-*]\s+)?(?:\*\*\s*([^*\n]{3,60}?)\s*:?\s*\*\*\s*:?|([A-Z][A-Za-z /&-]{2,40}):)", re.MULTILINE)
+
+# Answers that mean "this contract has no such clause"
+NOT_FOUND = re.compile(r"^\W*(none|n/?a|not (specified|found|mentioned|present|included|applicable)|no\b)", re.IGNORECASE)
+
+# Only the first words of a clause are used to find where it starts in the contract
+LOCATE_WORDS = 12
+
+
+def clause_type_for(heading: str) -> Optional[str]:
+    """Map an extracted heading ("Liability Limitations") to a clause type key ("liability")."""
+    heading = heading.lower()
+    for clause_type, words in CLAUSE_TYPES.items():
+        if any(word in heading for word in words):
+            return clause_type
+    return None
+
+
+def locate(clause_text: str, contract_text: str) -> Optional[tuple]:
+    """
+    (start, end) of the clause in the contract text, or None.
+    
+    Whitespace and case may differ, so the words are matched with a regex.
+    If the whole clause isn't found word for word, only its start is looked
+    up and the end is left open (None).
+    """
+    words = re.findall(r"\w+", clause_text)
+    if not words or not contract_text:
+        return None
+    whole = re.compile(r"\W+".join(map(re.escape, words)), re.IGNORECASE)
+    match = whole.search(contract_text)
+    if match:
+        return match.start(), match.end()
+    if len(words) > LOCATE_WORDS:
+        start = re.compile(r"\W+".join(map(re.escape, words[:LOCATE_WORDS])), re.IGNORECASE).search(contract_text)
+        if start:
+            return start.start(), None
+    return None
+
+
+def parse_clauses(extracted_text: str, contract_text: str = "") -> List[Dict[str, Any]]:
+    """
+    Split the AI's clause extraction into one dict per clause.
+    
+    Returns:
+        [{"clause_type", "text", "start_offset", "end_offset"}, ...]
+        (only the known clause types, in the order they appear)
+    """
+    if not extracted_text:
+        return []
+    # Bold headings always start a new section; plain "Label:" lines only if they name a clause type
+    headings = [
+        match for match in HEADING.finditer(extracted_text)
+        if match.group(1) or clause_type_for(match.group(2))
+    ]
+    clauses, seen = [], set()
+    for i, heading in enumerate(headings):
+        clause_type = clause_type_for(heading.group(1) or heading.group(2))
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(extracted_text)
+        text = extracted_text[heading.end():end].strip().strip("*").strip()
+        if clause_type is None or clause_type in seen or not text or NOT_FOUND.match(text):
+            continue
+        seen.add(clause_type)
+        
+        # A quoted passage is the best thing to look for; otherwise the whole text
+        quoted = re.search(r'"([^"]{20,})"', text)
+        offsets = locate(quoted.group(1) if quoted else text, contract_text) or (None, None)
+        clauses.append({
+            "clause_type": clause_type,
+            "text": text,
+            "start_offset": offsets[0],
+            "end_offset": offsets[1],
+        })
+    return clauses
+
+
+def format_clauses(clauses: List[Dict[str, Any]]) -> str:
+    """The reverse of parse_clauses(): clause dicts back to "**Payment Terms:** ..." text."""
+    return "\n".join(
+        f"**{CLAUSE_LABELS.get(clause['clause_type'], clause['clause_type'])}:** {clause['text']}"
+        for clause in clauses
+    )
+
+
+def parse_key_clauses_blob(key_clauses: Optional[str], contract_text: str = "") -> List[Dict[str, Any]]:
+    """Parse the JSON stored in Contract.key_clauses ({"extracted_clauses": "..."})."""
+    try:
+        extracted = json.loads(key_clauses or "{}").get("extracted_clauses", "")
+    except (ValueError, AttributeError):
+        return []
+    return parse_clauses(extracted, contract_text)
+
+
+class ClauseStore:
+    """Reads and writes the contract_clauses table."""
+    
+    async def replace(self, db: AsyncSession, contract_id: int, clauses: List[Dict[str, Any]]):
+        """Swap a contract's clause rows for new ones (the caller commits)."""
+        await db.execute(delete(ContractClause).where(ContractClause.contract_id == contract_id))
+        if clauses:
+            await db.execute(insert(ContractClause), [{"contract_id": contract_id, **clause} for clause in clauses])
+    
+    async def for_contract(self, db: AsyncSession, contract_id: int) -> List[Dict[str, Any]]:
+        result = await db.execute(
+            select(ContractClause).where(ContractClause.contract_id == contract_id).order_by(ContractClause.id)
+        )
+        return [self._to_dict(clause) for clause in result.scalars()]
+    
+    async def find(
+        self,
+        db: AsyncSession,
+        clause_type: str,
+        contract_ids: Optional[Iterable[int]] = None,
+        limit: int = 100,
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Clauses of one type across contracts, with contract details.
+        
+        Optionally only these contracts, and/or only contracts matching the
+        filters (status, risk level, party, date and value ranges - checked
+        in SQL on the joined contracts table).
+        """
+        query = (
+            select(ContractClause, Contract.contract_name, Contract.contract_number)
+            .join(Contract, Contract.id == ContractClause.contract_id)
+            .where(ContractClause.clause_type == clause_type)
+        )
+        if contract_ids is not None:
+            query = query.where(ContractClause.contract_id.in_(list(contract_ids)))
+        if filters:
+            query = query.where(*sql_conditions(filters))
+        query = query.order_by(ContractClause.contract_id).offset(offset).limit(limit)
+        
+        result = await db.execute(query)
+        return [
+            {**self._to_dict(clause), "contract_name": name, "contract_number": number}
+            for clause, name, number in result.all()
+        ]
+    
+    async def type_counts(self, db: AsyncSession) -> Dict[str, int]:
+        """How many contracts have each clause type."""
+        result = await db.execute(
+            select(ContractClause.clause_type, func.count(ContractClause.id)).group_by(ContractClause.clause_type)
+        )
+        return dict(result.all())
+    
+    async def backfill(self, db: AsyncSession, batch_size: int = 200) -> int:
+        """
+        Create clause rows for contracts analyzed before the table existed.
+        
+        Parses the saved key_clauses text - no AI calls - in a worker thread,
+        so startup requests aren't held up by the regex work. Each contract is
+        marked as checked (Contract.clauses_backfilled_at), so contracts with
+        no clauses at all aren't parsed again on every start. Returns the
+        number of contracts filled in.
+        """
+        has_rows = select(ContractClause.id).where(ContractClause.contract_id == Contract.id).exists()
+        result = await db.execute(
+            select(Contract.id).where(
+                Contract.key_clauses.is_not(None),
+                Contract.clauses_backfilled_at.is_(None),
+                ~has_rows,
+            )
+        )
+        missing = list(result.scalars())
+        
+        filled = 0
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            rows = (await db.execute(
+                select(Contract.id, Contract.key_clauses, Contract.contract_text).where(Contract.id.in_(batch))
+            )).all()
+            parsed = await asyncio.to_thread(
+                lambda: [(row.id, parse_key_clauses_blob(row.key_clauses, row.contract_text or "")) for row in rows]
+            )
+            for contract_id, clauses in parsed:
+                if clauses:
+                    await self.replace(db, contract_id, clauses)
+                    filled += 1
+            await db.execute(update(Contract).where(Contract.id.in_(batch)).values(clauses_backfilled_at=datetime.utcnow()))
+            await db.commit()
+        return filled
+    
+    @staticmethod
+    def _to_dict(clause: ContractClause) -> Dict[str, Any]:
+        return {
+            "contract_id": clause.contract_id,
+            "clause_type": clause.clause_type,
+            "text": clause.text,
+            "start_offset": clause.start_offset,
+            "end_offset": clause.end_offset,
+        }
+
+
+# Create global instance
+clause_store = ClauseStore()
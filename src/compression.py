@@ -0,0 +1,143 @@
+"""
+Response Compression
+Shrinks large API responses (long summaries and clause text compress ~5-10x).
+
+- Brotli ("br") when the browser accepts it and the brotli package is installed
+- gzip otherwise
+- Small responses are sent as-is (compressing them costs more than it saves)
+- Streaming responses (like the /api/events stream) are never compressed,
+  because the compressor would hold events back until its buffer fills
+"""
+
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+# Content types worth compressing (images, PDFs etc. are already compressed)
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "text/",
+    "image/svg+xml",
+)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best encoding the client accepts ("br", "gzip" or None).
+    Honours q-values, so "br;q=0" means "no brotli".
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        pieces = part.strip().split(";")
+        name = pieces[0].strip().lower()
+        quality = 1.0
+        for param in pieces[1:]:
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name] = quality
+    
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    """Compress a response body with the given encoding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses complete (non-streaming) responses
+    above a size threshold.
+    """
+    
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        passthrough = False
+        
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            
+            if passthrough:
+                await send(message)
+                return
+            
+            if message["type"] == "http.response.start":
+                # Hold the headers until we know whether the body gets compressed
+                start_message = message
+                return
+            
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            headers = [(k, v) for k, v in start_message.get("headers", [])]
+            header_names = {k.lower() for k, _ in headers}
+            content_type = next((v.decode("latin-1") for k, v in headers if k.lower() == b"content-type"), "")
+            
+            should_compress = (
+                not message.get("more_body", False)      # complete body, not a stream
+                and len(body) >= self.minimum_size
+                and b"content-encoding" not in header_names
+                and content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            
+            if not should_compress:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            
+            compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+            headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"vary", b"Accept-Encoding"))
+            
+            # A strong ETag names one exact byte sequence, so mark the compressed variant
+            for index, (name, value) in enumerate(headers):
+                if name.lower() == b"etag" and value.endswith(b'"') and not value.startswith(b"W/"):
+                    headers[index] = (name, value[:-1] + b"-" + encoding.encode("latin-1") + b'"')
+            
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+        
+        await self.app(scope, receive, send_wrapper)
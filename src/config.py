@@ -19,10 +19,51 @@ class Settings(BaseSettings):
     # Database Configuration
     DATABASE_URL: str = "sqlite+aiosqlite:///./contracts.db"
     
+    # Database Engine Profile
+    # "auto" picks "sqlite" or "postgres" from DATABASE_URL, "default" applies no tuning
+    DB_ENGINE_PROFILE: str = "auto"
+    SQL_ECHO: bool = False  # Log every SQL query (separate from DEBUG so production stays quiet)
+    
+    # SQLite profile (applied as PRAGMAs on every new connection)
+    SQLITE_JOURNAL_MODE: str = "WAL"        # Readers don't block the writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"      # Safe with WAL, far fewer fsyncs than FULL
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # 256 MB memory-mapped I/O
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024   # 64 MB page cache per connection
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000      # Wait for locks instead of failing immediately
+    
+    # Postgres profile (asyncpg connection pool)
+    PG_POOL_SIZE: int = 10
+    PG_MAX_OVERFLOW: int = 10
+    PG_POOL_TIMEOUT: int = 30               # Seconds to wait for a free connection
+    PG_POOL_RECYCLE: int = 1800             # Recycle connections every 30 minutes
+    PG_POOL_PRE_PING: bool = True           # Detect dropped connections before use
+    PG_STATEMENT_CACHE_SIZE: int = 500      # Prepared statements cached per connection
+    
     # Application Settings
     APP_NAME: str = "Contract Management System"
     DEBUG: bool = True
     
+    # AI Settings
+    LLM_MAX_CONCURRENCY: int = 4  # Maximum simultaneous Gemini requests
+    LLM_BACKEND: str = "gemini"  # "gemini", or "fake" for offline load tests
+    FAKE_LLM_LATENCY_MS: float = 800  # Fake backend: average response time
+    FAKE_LLM_JITTER_MS: float = 200  # Fake backend: +/- random variation
+    FAQ_QUESTIONS: str = "parties,dates,payment_terms,termination,renewal"  # Precomputed answers per contract (keys in src/faq.py)
+    CLAUSE_CONTEXT_LIMIT: int = 20  # Max stored clauses sent to the AI for a clause_type question
+    RAG_CANDIDATE_CHUNKS: int = 8  # Chunks retrieved per question (the packer keeps what fits)
+    RAG_CONTEXT_TOKEN_BUDGET: int = 3000  # Max prompt size for answers, instructions included
+    RAG_FILTERED_MAX_CANDIDATES: int = 500  # Filtered questions: matching contracts scored for relevance (newest first)
+    CHARS_PER_TOKEN: float = 4.0  # For estimating tokens from text length
+    # Contract text sent to each upload analysis, in tokens (sections picked per task, see src/sections.py)
+    ANALYSIS_TOKEN_BUDGETS: str = "metadata=3750,summary=7500,clauses=7500,risk=6000,faq=6000"
+    MAP_REDUCE_ENABLED: bool = True  # Analyze longer contracts part by part instead of cutting them off
+    MAP_REDUCE_MAX_PARTS: int = 8  # Cost cap per contract and task (an upload makes at most 4 x (parts + 1) calls)
+    MAP_REDUCE_CACHE_SIZE: int = 2000  # Part notes kept in memory (by hash of the part text)
+    # Clean up extracted text (page headers/numbers, hyphenation, whitespace, blank signature lines) - src/text_compaction.py
+    TEXT_COMPACTION_ENABLED: bool = True
+    # Amended versions: above this share of changed text, re-analyze in full instead of updating (src/versioning.py)
+    VERSION_FULL_REANALYSIS_RATIO: float = 0.5
+    
     # Vector Database Settings
     CHROMA_PERSIST_DIRECTORY: str = "./chroma_data"
     
@@ -32,6 +73,36 @@ class Settings(BaseSettings):
     ALLOWED_EXTENSIONS: set = {".pdf", ".txt", ".docx"}
     STORE_FILES: bool = True  # Set to False for free tier (stores text in DB instead)
     
+    # Response Compression
+    COMPRESSION_MIN_SIZE: int = 1024  # Bytes; smaller responses are sent uncompressed
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5           # 0-11; 4-6 is a good speed/size balance for live responses
+    
+    # Live Updates (Server-Sent Events)
+    EVENTS_QUEUE_SIZE: int = 100          # Events buffered per client before it must resync
+    EVENTS_HEARTBEAT_SECONDS: int = 15    # Keep-alive comment interval
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"               # DEBUG, INFO, WARNING, ERROR
+    LOG_FORMAT: str = "json"              # "json" (one object per line) or "text" (easier to read locally)
+    LOG_FILE: Optional[str] = None        # Also write logs to this file (written by the background thread)
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1    # Share of requests whose DEBUG logs are kept (when LOG_LEVEL=DEBUG)
+    LOG_QUEUE_SIZE: int = 10000           # Records buffered for the log thread before new ones are dropped
+    
+    # Request Tracing
+    SERVER_TIMING_ENABLED: bool = True    # Record spans and send them in a Server-Timing header
+    TRACE_FILE: Optional[str] = None      # Append sampled traces here (Chrome Trace Event format)
+    TRACE_SAMPLE_RATE: float = 0.1        # Share of requests written to TRACE_FILE
+    
+    # Event Loop Monitoring
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_LAG_INTERVAL_MS: int = 100       # How often the lag meter ticks
+    LOOP_BLOCK_THRESHOLD_MS: int = 250    # Log the blocking code's stack when the loop is stuck this long
+    LOOP_DETECT_BLOCKING_CALLS: bool = False  # Debug: warn about sync file/network/sleep calls on the loop
+    
+    # Profiling endpoints (/api/debug/profile/*, /api/debug/memory/*)
+    ADMIN_TOKEN: Optional[str] = None     # Endpoints are disabled unless set; send it as X-Admin-Token
+    
     # Early Warning Settings (days before expiration)
     WARNING_DAYS_CRITICAL: int = 30  # Red alert
     WARNING_DAYS_WARNING: int = 90   # Yellow alert
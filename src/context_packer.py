@@ -0,0 +1,157 @@
+"""
+Context Packer
+Decides exactly which contract text goes into a question's prompt.
+
+Contracts are stored as 3000-character chunks that overlap by 500
+characters. Simply joining the top chunks sends the overlapping parts
+twice - and two neighbouring chunks of the same contract are really one
+passage. The packer:
+
+1. Takes the retrieved passages best-first (by search score)
+2. Skips text that is already in the context (overlap deduplication)
+3. Stops at a token budget (RAG_CONTEXT_TOKEN_BUDGET, which also counts the
+   prompt's fixed instructions), cutting the last passage at a sentence end
+4. Joins neighbouring pieces of the same contract into one contiguous span
+
+Tokens are estimated from characters (about 4 characters per token for
+English text) - close enough for a budget, and free to compute.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Tuple
+
+from src.config import settings
+
+
+# Places where a passage can end cleanly
+SENTENCE_END = re.compile(r"[.!?;:](?=\s)|\n\s*\n")
+
+# Don't bother adding a piece of text shorter than this
+MIN_PIECE_TOKENS = 40
+
+
+@dataclass
+class Passage:
+    """A retrieved piece of text: characters start..end of a source document."""
+    source: Hashable   # e.g. the contract id
+    start: int
+    end: int
+    score: float = 0.0
+
+
+@dataclass
+class PackedContext:
+    """The text that goes into the prompt, and what it is made of."""
+    text: str
+    spans: List[Tuple[Hashable, int, int]] = field(default_factory=list)  # (source, start, end)
+    tokens: int = 0
+    dropped: int = 0   # Passages that didn't fit (or were already covered)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens in a text."""
+    return math.ceil(len(text) / settings.CHARS_PER_TOKEN)
+
+
+def trim_to_sentence(text: str, max_chars: int) -> str:
+    """At most max_chars of text, ending at a sentence end if there is one in the second half."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    ends = [match.end() for match in SENTENCE_END.finditer(cut)]
+    if ends and ends[-1] >= max_chars // 2:
+        return cut[:ends[-1]]
+    space = cut.rfind(" ")
+    return cut[:space] if space >= max_chars // 2 else cut
+
+
+class ContextPacker:
+    """Fills a token budget with the best, non-repeated passages."""
+    
+    def pack(
+        self,
+        passages: List[Passage],
+        texts: Dict[Hashable, str],
+        budget_tokens: int,
+        separator: str = "\n\n---\n\n"
+    ) -> PackedContext:
+        """
+        Args:
+            passages: Retrieved passages (any order - they are sorted by score)
+            texts: Full text of each source
+            budget_tokens: Tokens available for the context
+        
+        Returns:
+            PackedContext (spans in order of their best passage's score)
+        """
+        budget_chars = int(budget_tokens * settings.CHARS_PER_TOKEN)
+        separator_chars = len(separator)
+        used_chars = 0
+        taken: Dict[Hashable, List[List[int]]] = {}   # source -> [[start, end, rank]...]
+        dropped = 0
+        
+        ranked = sorted(passages, key=lambda p: p.score, reverse=True)
+        for rank, passage in enumerate(ranked):
+            text = texts.get(passage.source)
+            if not text:
+                dropped += 1
+                continue
+            pieces = self._uncovered(taken.get(passage.source, []), passage.start, min(passage.end, len(text)))
+            if not pieces:
+                dropped += 1  # Everything in it is already in the context
+                continue
+            
+            added = False
+            for start, end in pieces:
+                remaining = budget_chars - used_chars - separator_chars
+                if remaining < MIN_PIECE_TOKENS * settings.CHARS_PER_TOKEN:
+                    break
+                if end - start > remaining:
+                    end = start + len(trim_to_sentence(text[start:end], remaining))
+                taken.setdefault(passage.source, []).append([start, end, rank])
+                used_chars += end - start + separator_chars
+                added = True
+            if not added:
+                dropped += 1
+        
+        spans = self._merge(taken)
+        text = separator.join(texts[source][start:end].strip() for source, start, end in spans)
+        return PackedContext(text=text, spans=spans, tokens=estimate_tokens(text), dropped=dropped)
+    
+    @staticmethod
+    def _uncovered(taken: List[List[int]], start: int, end: int) -> List[Tuple[int, int]]:
+        """The parts of start..end not already taken."""
+        pieces = []
+        for taken_start, taken_end, _rank in sorted(taken):
+            if taken_end <= start or taken_start >= end:
+                continue
+            if taken_start > start:
+                pieces.append((start, taken_start))
+            start = max(start, taken_end)
+        if start < end:
+            pieces.append((start, end))
+        return pieces
+    
+    @staticmethod
+    def _merge(taken: Dict[Hashable, List[List[int]]]) -> List[Tuple[Hashable, int, int]]:
+        """Join touching pieces of the same source; best-ranked spans first."""
+        merged = []   # (best rank, source, start, end)
+        for source, pieces in taken.items():
+            current = None
+            for start, end, rank in sorted(pieces):
+                if current is not None and start <= current[3]:
+                    current = (min(current[0], rank), source, current[2], max(current[3], end))
+                else:
+                    if current is not None:
+                        merged.append(current)
+                    current = (rank, source, start, end)
+            if current is not None:
+                merged.append(current)
+        merged.sort(key=lambda span: span[0])
+        return [(source, start, end) for _rank, source, start, end in merged]
+
+
+# Create global instance
+context_packer = ContextPacker()
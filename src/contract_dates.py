@@ -0,0 +1,60 @@
+"""
+Contract Dates
+Turns the dates the AI extracted into datetimes, and works out the status.
+
+Used by every path that stores extracted metadata: the upload endpoint,
+the bulk import (python -m src.ingest) and amended versions
+(src/versioning.py), so they all agree on what "expired" means.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from dateutil import parser as date_parser
+
+
+# A new contract without a readable end date is assumed to run for a year
+DEFAULT_TERM = timedelta(days=365)
+
+
+def parse_date(value: Any) -> Optional[datetime]:
+    """A datetime from an extracted date ("2024-01-31", "January 31, 2024"), or None."""
+    if not value:
+        return None
+    try:
+        return date_parser.parse(str(value))
+    except (ValueError, OverflowError, TypeError):
+        return None  # "Unknown", "Not specified"...
+
+
+def parse_contract_dates(
+    metadata: Dict[str, Any],
+    fill_missing: bool = True
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    (start_date, end_date) from extracted metadata.
+    
+    Args:
+        metadata: The AI's metadata (start_date / end_date as text)
+        fill_missing: New contracts need dates - a missing start date becomes
+                      today and a missing end date today + 1 year. With False
+                      a missing date stays None (for updating an existing
+                      contract, whose dates must not be overwritten by guesses).
+    """
+    start_date = parse_date(metadata.get("start_date"))
+    end_date = parse_date(metadata.get("end_date"))
+    if fill_missing:
+        now = datetime.now()
+        start_date = start_date or now
+        end_date = end_date or now + DEFAULT_TERM
+    return start_date, end_date
+
+
+def contract_status(start_date: datetime, end_date: datetime, now: Optional[datetime] = None) -> str:
+    """Determine status from the contract dates: expired, pending or active."""
+    now = now or datetime.now()
+    if end_date < now:
+        return "expired"
+    if start_date > now:
+        return "pending"
+    return "active"
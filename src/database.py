@@ -5,13 +5,16 @@ This file defines:
 2. What data structure we use for contracts
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, create_engine
+import logging
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Index, create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 from src.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Base class for all database models
 Base = declarative_base()
 
@@ -38,19 +41,19 @@ class Contract(Base):
     
     # Important dates
     start_date = Column(DateTime, nullable=False)
-    end_date = Column(DateTime, nullable=False)
+    end_date = Column(DateTime, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Contract status
-    status = Column(String(50), default="active")  # active, expired, renewed, pending
+    status = Column(String(50), default="active", index=True)  # active, expired, renewed, pending
     
     # Financial information
     contract_value = Column(Float, nullable=True)
     currency = Column(String(10), default="USD")
     
     # Risk classification
-    risk_level = Column(String(20), default="low")  # low, medium, high, critical
+    risk_level = Column(String(20), default="low", index=True)  # low, medium, high, critical
     risk_reason = Column(Text, nullable=True)  # AI-generated reason for risk level
     
     # File information
@@ -64,21 +67,228 @@ class Contract(Base):
     key_clauses = Column(Text, nullable=True)  # Stored as JSON string
     
     # Full contract text (for RAG on free tier - no file storage)
-    contract_text = Column(Text, nullable=True)  # Store extracted text directly
+    contract_text = Column(Text, nullable=True)  # Store extracted text directly (compacted, see src/text_compaction.py)
+    
+    # The text as extracted, and where each compacted character came from (JSON OffsetMap)
+    # - only set when compaction changed the text
+    original_text = Column(Text, nullable=True)
+    offset_map = Column(Text, nullable=True)
+    
+    # Precomputed answers to common questions (JSON answer sheet, see src/faq.py)
+    faq_answers = Column(Text, nullable=True)
+    
+    # When the startup backfill parsed key_clauses into contract_clauses (see ClauseStore.backfill)
+    clauses_backfilled_at = Column(DateTime, nullable=True)
     
     # Compliance and legal
     compliance_notes = Column(Text, nullable=True)
     
+    # Version number - goes up when an amended version is uploaded (older ones are in contract_versions)
+    version = Column(Integer, default=1)
+    
     def __repr__(self):
         return f"<Contract(id={self.id}, name={self.contract_name}, status={self.status})>"
 
 
+class ContractClause(Base):
+    """
+    One key clause of one contract (payment terms, termination, liability...).
+    
+    Parsed once from the AI's clause extraction when a contract is analyzed,
+    so questions like "show me every liability cap" are a simple indexed
+    query instead of re-reading every contract. See src/clauses.py.
+    """
+    __tablename__ = "contract_clauses"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    contract_id = Column(Integer, ForeignKey("contracts.id", ondelete="CASCADE"), nullable=False, index=True)
+    clause_type = Column(String(50), nullable=False)  # payment_terms, termination, liability...
+    text = Column(Text, nullable=False)
+    
+    # Where the clause appears in Contract.contract_text (None if the AI reworded it)
+    start_offset = Column(Integer, nullable=True)
+    end_offset = Column(Integer, nullable=True)
+    
+    __table_args__ = (
+        # "All clauses of this type" - and their contracts - straight from the index
+        Index("ix_contract_clauses_type_contract", "clause_type", "contract_id"),
+    )
+    
+    def __repr__(self):
+        return f"<ContractClause(contract_id={self.contract_id}, type={self.clause_type})>"
+
+
+class ContractVersion(Base):
+    """
+    An earlier version of a contract, kept when an amended version replaces it.
+    
+    Holds the text and the analysis results of that version, so nothing is
+    lost when a renewal or amendment is uploaded. See src/versioning.py.
+    """
+    __tablename__ = "contract_versions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    contract_id = Column(Integer, ForeignKey("contracts.id", ondelete="CASCADE"), nullable=False, index=True)
+    version = Column(Integer, nullable=False)
+    
+    contract_text = Column(Text, nullable=True)
+    original_text = Column(Text, nullable=True)   # Same as Contract.original_text / offset_map,
+    offset_map = Column(Text, nullable=True)      # so old clauses can still be shown in the original
+    summary = Column(Text, nullable=True)
+    key_clauses = Column(Text, nullable=True)
+    risk_level = Column(String(20), nullable=True)
+    risk_reason = Column(Text, nullable=True)
+    faq_answers = Column(Text, nullable=True)
+    contract_value = Column(Float, nullable=True)
+    start_date = Column(DateTime, nullable=True)
+    end_date = Column(DateTime, nullable=True)
+    
+    # When this version was current, and what the next version changed (JSON section diff)
+    valid_from = Column(DateTime, nullable=True)
+    replaced_at = Column(DateTime, default=datetime.utcnow)
+    changes = Column(Text, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_contract_versions_contract_version", "contract_id", "version", unique=True),
+    )
+    
+    def __repr__(self):
+        return f"<ContractVersion(contract_id={self.contract_id}, version={self.version})>"
+
+
+class IngestedFile(Base):
+    """
+    Ledger of files loaded by the bulk import command (python -m src.ingest).
+    
+    Files are identified by a hash of their contents, so re-running an import
+    skips everything that already made it into the database. Files whose
+    contract number was already taken are recorded too (outcome "duplicate"),
+    so a re-run reports them again without paying for their AI analysis.
+    """
+    __tablename__ = "ingested_files"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    file_hash = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 of file bytes
+    file_name = Column(String(500))
+    contract_id = Column(Integer, nullable=True)  # Contract created (or matched) for this file
+    outcome = Column(String(20), default="imported")  # "imported" or "duplicate"
+    ingested_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<IngestedFile(file={self.file_name}, contract_id={self.contract_id})>"
+
+
+# ============================================================================
+# ENGINE PROFILES
+# ============================================================================
+# A profile is a named set of engine options tuned for one database backend.
+# - sqlite:   WAL journal + PRAGMAs applied on every new connection
+# - postgres: asyncpg connection pool sizing, statement cache and pre-ping
+# - default:  plain create_async_engine() with no tuning
+
+ENGINE_PROFILES = ("auto", "sqlite", "postgres", "default")
+
+
+def resolve_engine_profile(database_url: str, requested: str = "auto") -> str:
+    """
+    Decide which engine profile to use.
+    
+    Args:
+        database_url: SQLAlchemy database URL
+        requested: Profile name from settings ("auto" detects it from the URL)
+    
+    Returns:
+        One of "sqlite", "postgres" or "default"
+    """
+    requested = (requested or "auto").lower()
+    if requested not in ENGINE_PROFILES:
+        logger.warning(f"Unknown DB_ENGINE_PROFILE '{requested}', falling back to 'auto'")
+        requested = "auto"
+    
+    if requested != "auto":
+        return requested
+    
+    if database_url.startswith("sqlite"):
+        return "sqlite"
+    if database_url.startswith("postgres"):
+        return "postgres"
+    return "default"
+
+
+def build_engine_options(profile: str) -> dict:
+    """
+    Build the keyword arguments passed to create_async_engine() for a profile.
+    """
+    options = {"echo": settings.SQL_ECHO}
+    
+    if profile == "postgres":
+        options.update(
+            pool_size=settings.PG_POOL_SIZE,
+            max_overflow=settings.PG_MAX_OVERFLOW,
+            pool_timeout=settings.PG_POOL_TIMEOUT,
+            pool_recycle=settings.PG_POOL_RECYCLE,
+            pool_pre_ping=settings.PG_POOL_PRE_PING,
+            connect_args={
+                # SQLAlchemy's own prepared statement cache (asyncpg dialect)
+                "prepared_statement_cache_size": settings.PG_STATEMENT_CACHE_SIZE,
+                # asyncpg's internal statement cache
+                "statement_cache_size": settings.PG_STATEMENT_CACHE_SIZE,
+            },
+        )
+    elif profile == "sqlite":
+        # busy timeout in seconds for the sqlite3 driver (also set as a PRAGMA below)
+        options["connect_args"] = {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+    
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Apply SQLite performance PRAGMAs to every new connection.
+    PRAGMAs are per-connection, so they must run on "connect" rather than once.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # Negative cache_size means "size in KiB" instead of "number of pages"
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def describe_engine_profile() -> str:
+    """One-line description of the active engine profile (for the startup log)."""
+    if engine_profile == "sqlite":
+        details = (
+            f"journal_mode={settings.SQLITE_JOURNAL_MODE}, synchronous={settings.SQLITE_SYNCHRONOUS}, "
+            f"mmap_size={settings.SQLITE_MMAP_SIZE}, cache_size={settings.SQLITE_CACHE_SIZE_KB}KB, "
+            f"busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}ms"
+        )
+    elif engine_profile == "postgres":
+        details = (
+            f"pool_size={settings.PG_POOL_SIZE}, max_overflow={settings.PG_MAX_OVERFLOW}, "
+            f"pool_recycle={settings.PG_POOL_RECYCLE}s, pre_ping={settings.PG_POOL_PRE_PING}, "
+            f"statement_cache={settings.PG_STATEMENT_CACHE_SIZE}"
+        )
+    else:
+        details = "no tuning"
+    return f"{engine_profile} ({details}, echo={settings.SQL_ECHO})"
+
+
 # Database engine and session setup
+engine_profile = resolve_engine_profile(settings.DATABASE_URL, settings.DB_ENGINE_PROFILE)
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=settings.DEBUG,  # Log SQL queries in debug mode
+    **build_engine_options(engine_profile),
 )
 
+if engine_profile == "sqlite":
+    event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
 # Session maker for database operations
 AsyncSessionLocal = sessionmaker(
     engine,
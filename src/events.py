@@ -0,0 +1,121 @@
+"""
+Live Event Hub (Server-Sent Events)
+Pushes portfolio changes to every open browser tab as they happen,
+instead of each tab polling the server every 60 seconds.
+
+How it works:
+- Each connected tab gets its own small queue (a "subscriber")
+- publish() drops the event into every subscriber's queue
+- The /api/events endpoint streams each queue to its browser as SSE
+
+Backpressure:
+A tab that stops reading (slow network, sleeping laptop) must not make the
+server buffer events forever. When a subscriber's queue is full, its backlog
+is thrown away and replaced by a single "resync" event, which tells the
+browser to simply reload everything once it catches up.
+"""
+
+import asyncio
+import itertools
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from src.config import settings
+
+
+# Event types sent to the browser
+CONTRACT_CREATED = "contract-created"
+CONTRACT_UPDATED = "contract-updated"
+CONTRACT_DELETED = "contract-deleted"
+UPLOAD_STAGE = "upload-stage"
+WARNING_CHANGED = "warning-changed"
+RESYNC = "resync"
+
+
+class Subscriber:
+    """One connected client and its bounded event queue."""
+    
+    def __init__(self, max_queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = 0  # Events thrown away because this client was too slow
+    
+    def offer(self, event: Optional[Dict[str, Any]]):
+        """Queue an event without ever waiting (publish must not block)."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: replace the backlog with one "reload everything" event
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"id": None, "type": RESYNC, "data": {"dropped": self.dropped}})
+
+
+class EventHub:
+    """
+    In-process publish/subscribe hub for portfolio events.
+    """
+    
+    def __init__(self):
+        self.subscribers: Set[Subscriber] = set()
+        self._ids = itertools.count(1)
+    
+    def subscribe(self) -> Subscriber:
+        """Register a new client."""
+        subscriber = Subscriber(settings.EVENTS_QUEUE_SIZE)
+        self.subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber):
+        """Forget a client (called when its connection closes)."""
+        self.subscribers.discard(subscriber)
+    
+    def publish(self, event_type: str, data: Optional[Dict[str, Any]] = None):
+        """
+        Send an event to every connected client.
+        
+        Safe to call from any endpoint: it never blocks and never raises
+        because of a slow client.
+        """
+        if not self.subscribers:
+            return
+        
+        event = {
+            "id": next(self._ids),
+            "type": event_type,
+            "data": {**(data or {}), "timestamp": datetime.utcnow().isoformat()},
+        }
+        for subscriber in list(self.subscribers):
+            subscriber.offer(event)
+    
+    def publish_contract_change(self, event_type: str, contract_id: Optional[int], **data):
+        """
+        Publish a contract change plus the warning change it implies
+        (warnings are computed from contract dates, status and risk).
+        """
+        self.publish(event_type, {"contract_id": contract_id, **data})
+        self.publish(WARNING_CHANGED, {"contract_id": contract_id})
+    
+    def close(self):
+        """Tell every stream to finish (used on server shutdown)."""
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(None)
+    
+    @staticmethod
+    def format_sse(event: Dict[str, Any]) -> str:
+        """Encode an event in the text/event-stream wire format."""
+        lines = []
+        if event.get("id") is not None:
+            lines.append(f"id: {event['id']}")
+        lines.append(f"event: {event['type']}")
+        lines.append(f"data: {json.dumps(event['data'], default=str)}")
+        return "\n".join(lines) + "\n\n"
+
+
+# Create global instance
+event_hub = EventHub()
@@ -0,0 +1,113 @@
+"""
+Contract FAQ (precomputed answers)
+Most questions about a single contract are the same few: payment terms,
+termination, renewal... Instead of searching and calling Gemini every time,
+the answers are written once - when the contract is uploaded or re-analyzed -
+and stored with the contract as a small "answer sheet".
+
+When a question comes in for one contract:
+1. Is it short and clearly about one of the canonical topics?
+2. Does the contract have a saved answer for that topic?
+-> Return the saved answer instantly, with how old it is.
+
+Anything else goes to the normal RAG + Gemini path.
+
+Which topics get answered is set by FAQ_QUESTIONS (comma-separated keys
+from FAQ_CATALOGUE below).
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.config import settings
+
+
+@dataclass
+class FAQTopic:
+    """A canonical question and the pattern that recognizes it."""
+    question: str
+    pattern: "re.Pattern"
+
+
+FAQ_CATALOGUE: Dict[str, FAQTopic] = {
+    "parties": FAQTopic(
+        "Who are the parties to this contract and what are their roles?",
+        re.compile(r"\b(parties|party|who (signed|is involved))\b")),
+    "dates": FAQTopic(
+        "What are the key dates (effective date, expiration date, notice and renewal deadlines)?",
+        re.compile(r"\b(key dates|dates|deadlines?|duration|how long)\b")),
+    "payment_terms": FAQTopic(
+        "What are the payment terms (amounts, schedule, method, late fees)?",
+        re.compile(r"\b(pay|payment|payments|paid|invoice|invoicing|billing|fees?)\b")),
+    "termination": FAQTopic(
+        "How can this contract be terminated, and how much notice is required?",
+        re.compile(r"\b(terminat\w*|cancel\w*|exit|get out)\b")),
+    "renewal": FAQTopic(
+        "Does this contract renew, and how (automatic renewal, notice, new terms)?",
+        re.compile(r"\b(renew\w*|extend|extension|auto-renew\w*)\b")),
+    "liability": FAQTopic(
+        "How is liability limited, and what indemnities apply?",
+        re.compile(r"\b(liabilit\w*|liable|indemn\w*|damages)\b")),
+    "confidentiality": FAQTopic(
+        "What are the confidentiality obligations?",
+        re.compile(r"\b(confidential\w*|non-disclosure|nda)\b")),
+}
+
+# Longer or multi-part questions need the AI
+MAX_FAQ_WORDS = 12
+FREE_FORM_WORDS = re.compile(r"\b(and|why|compare|explain|versus|vs|if|should)\b")
+
+
+def enabled_topics() -> Dict[str, FAQTopic]:
+    """The topics selected by FAQ_QUESTIONS, in catalogue order."""
+    keys = {key.strip() for key in settings.FAQ_QUESTIONS.split(",") if key.strip()}
+    return {key: topic for key, topic in FAQ_CATALOGUE.items() if key in keys}
+
+
+def match_topic(question: str) -> Optional[str]:
+    """
+    The canonical topic a question asks about, or None.
+    
+    Only short questions that clearly match exactly one topic are matched;
+    "What are the payment and termination terms?" goes to the AI.
+    """
+    text = question.strip().lower()
+    if not text or len(text.split()) > MAX_FAQ_WORDS or FREE_FORM_WORDS.search(text):
+        return None
+    matches = [key for key, topic in enabled_topics().items() if topic.pattern.search(text)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def build_answer_sheet(answers: Dict[str, str], generated_at: Optional[datetime] = None) -> str:
+    """The JSON stored in Contract.faq_answers."""
+    topics = enabled_topics()
+    return json.dumps({
+        "generated_at": (generated_at or datetime.utcnow()).isoformat(timespec="seconds"),
+        "answers": {
+            key: {"question": topics[key].question if key in topics else key, "answer": answer}
+            for key, answer in answers.items()
+            if answer
+        },
+    })
+
+
+def cached_answer(faq_answers: Optional[str], topic: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """A saved answer from a contract's answer sheet (with its age), or None."""
+    if not faq_answers:
+        return None
+    try:
+        sheet = json.loads(faq_answers)
+        entry = sheet["answers"][topic]
+        generated_at = datetime.fromisoformat(sheet["generated_at"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    age = (now or datetime.utcnow()) - generated_at
+    return {
+        "answer": entry["answer"],
+        "canonical_question": entry.get("question"),
+        "generated_at": sheet["generated_at"],
+        "age_seconds": max(0, int(age.total_seconds())),
+    }
@@ -0,0 +1,55 @@
+"""
+Fast JSON Responses
+Turns database rows into JSON as cheaply as possible.
+
+The normal FastAPI path for a list endpoint is:
+    SQLAlchemy object -> Pydantic model (validation) -> dict -> json.dumps
+For hundreds of contracts with long summaries that adds up. The fast path is:
+    column tuple -> dict -> orjson (a JSON encoder written in Rust)
+
+orjson is optional: without it we fall back to the standard json module.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any):
+    """Encode the types the standard json module doesn't know about."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes (orjson when available)."""
+    if orjson is not None:
+        # NON_STR_KEYS: allow keys like None (e.g. a risk_level that was never set)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+def rows_to_dicts(result) -> List[Dict[str, Any]]:
+    """Turn a SQLAlchemy result of plain columns into a list of dicts."""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that renders with orjson (or compact json as a fallback)."""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,209 @@
+"""
+Contract Filter Index
+Answers "which contracts match these filters?" instantly, so questions can be
+limited to e.g. "high-risk active contracts with Acme" without checking
+every contract one by one.
+
+Kept next to the RAG storage and updated whenever a contract is added,
+changed or removed. Two kinds of lookup tables:
+
+- Categories (status, risk level, party names): value -> set of contract ids.
+  "risk_level in [high, critical]" is the union of two sets.
+- Ranges (start date, end date, contract value): (value, id) pairs sorted by
+  value. A range is found with two binary searches (bisect) and everything
+  between them matches.
+
+Combining filters is a set intersection, starting from the smallest set,
+so the cost depends on how many contracts match - not on the portfolio size.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dateutil import parser as date_parser
+from sqlalchemy import func, or_
+
+from src.database import Contract
+
+
+# Filter name -> (indexed field, "from" or "to")
+RANGE_FILTERS = {
+    "start_date_from": ("start_date", "from"),
+    "start_date_to": ("start_date", "to"),
+    "end_date_from": ("end_date", "from"),
+    "end_date_to": ("end_date", "to"),
+    "min_value": ("contract_value", "from"),
+    "max_value": ("contract_value", "to"),
+}
+
+
+def _to_date(value: Any) -> Optional[date]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date_parser.parse(str(value)).date()
+    except (ValueError, OverflowError):
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None and value != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ContractFilterIndex:
+    """Per-attribute lookup tables over the contracts in the RAG storage."""
+    
+    CATEGORY_FIELDS = ("status", "risk_level")
+    RANGE_FIELDS = {"start_date": _to_date, "end_date": _to_date, "contract_value": _to_float}
+    
+    def __init__(self):
+        self.categories: Dict[str, Dict[str, Set[int]]] = {field: {} for field in self.CATEGORY_FIELDS}
+        self.parties: Dict[str, Set[int]] = {}                 # lower-case party name -> ids
+        self.range_values: Dict[str, Dict[int, Any]] = {field: {} for field in self.RANGE_FIELDS}
+        # Sorted (values, ids) per range field; rebuilt on the next query after a change
+        self._sorted: Dict[str, Optional[Tuple[list, list]]] = {field: None for field in self.RANGE_FIELDS}
+        self.entries: Dict[int, Dict[str, Any]] = {}          # id -> what was indexed (for removal)
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    # ---- keeping the index up to date ---------------------------------------
+    
+    def add(self, contract_id: int, metadata: Dict[str, Any]):
+        """Index (or re-index) one contract from its RAG metadata."""
+        self.remove(contract_id)
+        
+        entry = {
+            "status": (metadata.get("status") or "").lower() or None,
+            "risk_level": (metadata.get("risk_level") or "").lower() or None,
+            "parties": {p.strip().lower() for p in (metadata.get("party_a"), metadata.get("party_b")) if p and p.strip()},
+        }
+        for field in self.CATEGORY_FIELDS:
+            if entry[field]:
+                self.categories[field].setdefault(entry[field], set()).add(contract_id)
+        for party in entry["parties"]:
+            self.parties.setdefault(party, set()).add(contract_id)
+        for field, convert in self.RANGE_FIELDS.items():
+            value = convert(metadata.get(field))
+            if value is not None:
+                self.range_values[field][contract_id] = value
+                self._sorted[field] = None
+        
+        self.entries[contract_id] = entry
+    
+    def remove(self, contract_id: int):
+        entry = self.entries.pop(contract_id, None)
+        if entry is None:
+            return
+        for field in self.CATEGORY_FIELDS:
+            self._discard(self.categories[field], entry[field], contract_id)
+        for party in entry["parties"]:
+            self._discard(self.parties, party, contract_id)
+        for field in self.RANGE_FIELDS:
+            if self.range_values[field].pop(contract_id, None) is not None:
+                self._sorted[field] = None
+    
+    def clear(self):
+        self.__init__()
+    
+    @staticmethod
+    def _discard(table: Dict[str, Set[int]], key: Optional[str], contract_id: int):
+        ids = table.get(key)
+        if ids is not None:
+            ids.discard(contract_id)
+            if not ids:
+                del table[key]
+    
+    # ---- querying -----------------------------------------------------------
+    
+    def match(self, filters: Dict[str, Any]) -> Optional[Set[int]]:
+        """
+        Ids of the contracts matching ALL the given filters.
+        
+        Filters (all optional):
+            status, risk_level:  a value or a list of values (any of them)
+            party:               part of a party name, case-insensitive
+            start_date_from/to, end_date_from/to:  date range (inclusive)
+            min_value, max_value:                  contract value range (inclusive)
+        
+        Returns None when no filter is set (meaning: every contract).
+        """
+        candidates: List[Set[int]] = []
+        
+        for field in self.CATEGORY_FIELDS:
+            wanted = filters.get(field)
+            if wanted:
+                wanted = [wanted] if isinstance(wanted, str) else wanted
+                table = self.categories[field]
+                candidates.append(set().union(*(table.get(value.lower(), ()) for value in wanted)))
+        
+        party = (filters.get("party") or "").strip().lower()
+        if party:
+            # Few distinct party names compared to contracts, so scanning the names is cheap
+            candidates.append(set().union(*(ids for name, ids in self.parties.items() if party in name)))
+        
+        bounds: Dict[str, list] = {}
+        for name, (field, side) in RANGE_FILTERS.items():
+            value = self.RANGE_FIELDS[field](filters.get(name))
+            if value is not None:
+                bounds.setdefault(field, [None, None])[0 if side == "from" else 1] = value
+        for field, (low, high) in bounds.items():
+            values, ids = self._sorted_values(field)
+            start = bisect_left(values, low) if low is not None else 0
+            end = bisect_right(values, high) if high is not None else len(values)
+            candidates.append(set(ids[start:end]))
+        
+        if not candidates:
+            return None
+        candidates.sort(key=len)
+        return candidates[0].intersection(*candidates[1:])
+    
+    def _sorted_values(self, field: str) -> Tuple[list, list]:
+        if self._sorted[field] is None:
+            pairs = sorted((value, contract_id) for contract_id, value in self.range_values[field].items())
+            self._sorted[field] = ([value for value, _ in pairs], [contract_id for _, contract_id in pairs])
+        return self._sorted[field]
+
+
+def sql_conditions(filters: Dict[str, Any]) -> list:
+    """
+    The same filters as ContractFilterIndex.match, as WHERE conditions on Contract.
+    
+    For queries that join the contracts table anyway (the clause store): they
+    see every contract in the database, even before the RAG storage is loaded
+    or when another process (python -m src.ingest) added it.
+    """
+    conditions = []
+    for field in ContractFilterIndex.CATEGORY_FIELDS:
+        wanted = filters.get(field)
+        if wanted:
+            wanted = [wanted] if isinstance(wanted, str) else wanted
+            conditions.append(func.lower(getattr(Contract, field)).in_([value.lower() for value in wanted]))
+    
+    party = (filters.get("party") or "").strip().lower()
+    if party:
+        conditions.append(or_(
+            func.lower(Contract.party_a).contains(party, autoescape=True),
+            func.lower(Contract.party_b).contains(party, autoescape=True),
+        ))
+    
+    for name, (field, side) in RANGE_FILTERS.items():
+        column = getattr(Contract, field)
+        value = ContractFilterIndex.RANGE_FIELDS[field](filters.get(name))
+        if value is None:
+            continue
+        if isinstance(value, date):
+            # Dates are stored as datetimes: "to" includes the whole day
+            value = datetime.combine(value, datetime.min.time())
+            conditions.append(column >= value if side == "from" else column < value + timedelta(days=1))
+        else:
+            conditions.append(column >= value if side == "from" else column <= value)
+    return conditions
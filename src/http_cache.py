@@ -0,0 +1,184 @@
+"""
+HTTP Conditional GET Support
+Lets the browser ask "has anything changed?" instead of re-downloading everything.
+
+How it works:
+- The portfolio has a version number that goes up after every committed write
+  (create, update, delete, upload...) made by this server
+- Writes made elsewhere (python -m src.ingest in another process) are caught
+  by a small token read from the database: contract count, highest id and
+  latest updated_at
+- Read endpoints send both, plus the query string, as an ETag header
+- The browser sends it back in If-None-Match on the next request
+- Same tag = nothing changed = "304 Not Modified" with an empty body,
+  and the (much bigger) list query is skipped
+"""
+
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from src.database import AsyncSessionLocal, Contract
+
+
+class PortfolioVersion:
+    """
+    In-process counter of committed writes to the contract portfolio.
+    """
+    
+    def __init__(self):
+        # The epoch changes on every server start, so ETags from a previous run never match
+        self.epoch = f"{os.getpid():x}{int(time.time()):x}"
+        self.version = 0
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+    
+    def bump(self):
+        """Record that the portfolio changed."""
+        self.version += 1
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+    
+    def etag(self, scope: str, database_token: str = "", query: str = "", daily: bool = False) -> str:
+        """
+        Build a strong ETag for an endpoint.
+        
+        Args:
+            scope: Endpoint name, so different payloads never share a tag
+            database_token: State of the contracts table (see database_state)
+            query: The request's query string (?skip=100&status=active is a different page)
+            daily: Also change the tag at midnight UTC (for data that depends on
+                   today's date, like "expires in N days")
+        """
+        token = hashlib.sha256(f"{database_token}?{query}".encode()).hexdigest()[:16]
+        tag = f"{scope}-{self.epoch}-{self.version}-{token}"
+        if daily:
+            tag += f"-{datetime.now(timezone.utc):%Y%m%d}"
+        return f'"{tag}"'
+    
+    def modified_since(self, database_modified: Optional[datetime] = None, daily: bool = False) -> datetime:
+        """Last-Modified time for an endpoint (never earlier than today for daily data)."""
+        modified = self.last_modified
+        if database_modified is not None:
+            modified = max(modified, database_modified)
+        if not daily:
+            return modified
+        midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        return max(modified, midnight)
+
+
+async def database_state() -> Tuple[str, Optional[datetime]]:
+    """
+    (token, last modified) of the contracts table, as the database sees it.
+    
+    Catches writes the in-process counter never hears about: the bulk import
+    command, or a second server process. One small aggregate query, in its own
+    session so it doesn't start the caller's transaction.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(func.count(Contract.id), func.max(Contract.id), func.max(Contract.updated_at))
+        )
+        count, max_id, updated_at = result.one()
+    
+    modified = None
+    if updated_at is not None:
+        # Stored as naive UTC (datetime.utcnow); HTTP dates have whole seconds
+        modified = updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+    return f"{count}-{max_id}-{updated_at}", modified
+
+
+# Create global instance
+portfolio_version = PortfolioVersion()
+
+
+# ============================================================================
+# WRITE TRACKING
+# ============================================================================
+# Sessions are marked "dirty" when they flush or execute an INSERT/UPDATE/DELETE,
+# and the version is bumped only AFTER the commit succeeds - so a reader can never
+# cache old data under a new ETag.
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info["portfolio_dirty"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["portfolio_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop("portfolio_dirty", False):
+        portfolio_version.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop("portfolio_dirty", None)
+
+
+# ============================================================================
+# REQUEST / RESPONSE HELPERS
+# ============================================================================
+
+async def cache_headers(request: Request, scope: str, daily: bool = False) -> dict:
+    """
+    Capture the validator headers for an endpoint.
+    
+    Call this BEFORE querying the database: if a write lands while the query
+    runs, the response then carries the older tag and is simply refreshed next time.
+    """
+    database_token, database_modified = await database_state()
+    return {
+        "ETag": portfolio_version.etag(scope, database_token, str(request.url.query), daily=daily),
+        "Last-Modified": format_datetime(portfolio_version.modified_since(database_modified, daily), usegmt=True),
+        # Cache it, but always check with the server before reusing it
+        "Cache-Control": "no-cache",
+    }
+
+
+def not_modified(request: Request, headers: dict) -> Optional[Response]:
+    """
+    Return a 304 response if the client's cached copy is still current, else None.
+    
+    If-None-Match wins over If-Modified-Since (as the HTTP spec says).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        client_tags = [_strip_encoding(tag.strip()) for tag in if_none_match.split(",")]
+        if headers["ETag"] in client_tags or "*" in client_tags:
+            return Response(status_code=304, headers=headers)
+        return None
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if parsedate_to_datetime(headers["Last-Modified"]) <= since:
+            return Response(status_code=304, headers=headers)
+    
+    return None
+
+
+def _strip_encoding(tag: str) -> str:
+    """
+    The compression middleware tags compressed variants as "...-gzip" / "...-br"
+    (a strong ETag names one exact byte sequence). They still mean the same data.
+    """
+    for suffix in ('-gzip"', '-br"'):
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
@@ -0,0 +1,202 @@
+"""
+Event Loop Monitor
+Notices when something blocks the asyncio event loop - and catches the culprit.
+
+Why it matters:
+The whole server runs on ONE event loop thread. While any request runs
+blocking code on it (a synchronous AI call, PDF parsing, a big file write),
+every other request - even /health - has to wait.
+
+Three tools:
+1. Lag meter: a task that asks to wake up every LOOP_LAG_INTERVAL_MS.
+   How late it actually wakes up is the loop's "lag", exported as the
+   event_loop_lag_seconds histogram on /metrics.
+2. Stall watchdog: a separate thread checks that the lag meter keeps
+   ticking. If the loop is stuck longer than LOOP_BLOCK_THRESHOLD_MS it logs
+   the loop thread's current stack - i.e. the code that is blocking it,
+   caught in the act.
+3. Blocking-call detector (LOOP_DETECT_BLOCKING_CALLS, for debugging):
+   uses Python audit hooks to warn when code running on the event loop
+   opens a file, connects a socket, resolves a host name or calls
+   time.sleep() (Python 3.13+). Each call site is reported once.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional, Set
+
+from src.config import settings
+from src.metrics import EVENT_LOOP_LAG_SECONDS, EVENT_LOOP_STALLS, EVENT_LOOP_BLOCKING_CALLS
+
+logger = logging.getLogger(__name__)
+
+# Audit events that mean "synchronous I/O"
+BLOCKING_AUDIT_EVENTS = {
+    "open": "file",
+    "socket.connect": "network",
+    "socket.getaddrinfo": "network",
+    "socket.gethostbyname": "network",
+    "time.sleep": "sleep",  # Only raised on Python 3.13+
+}
+
+
+class LoopMonitor:
+    """Measures event loop lag and reports stalls and blocking calls."""
+    
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.watchdog: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        self.loop_thread_id: Optional[int] = None
+        self.last_tick = 0.0
+        self.interval = 0.1
+        self.threshold = 0.25
+        self.max_lag = 0.0               # Worst lag seen since startup (seconds)
+        self.stalls = 0
+        # Blocking-call detector state
+        self.detect_blocking_calls = False
+        self.hook_installed = False
+        self.reported_sites: Set[str] = set()
+        self.in_hook = threading.local()
+    
+    def start(self):
+        """Start monitoring the running event loop (call from the loop, e.g. at startup)."""
+        if self.task is not None:
+            return
+        self.interval = settings.LOOP_LAG_INTERVAL_MS / 1000
+        self.threshold = settings.LOOP_BLOCK_THRESHOLD_MS / 1000
+        self.loop_thread_id = threading.get_ident()
+        self.last_tick = time.monotonic()
+        self.stopping.clear()
+        
+        self.task = asyncio.create_task(self._measure_lag())
+        self.watchdog = threading.Thread(target=self._watch_for_stalls, name="loop-watchdog", daemon=True)
+        self.watchdog.start()
+        
+        if settings.LOOP_DETECT_BLOCKING_CALLS:
+            self.enable_blocking_call_detection()
+        
+        logger.info(
+            f"Event loop monitor started (tick {settings.LOOP_LAG_INTERVAL_MS}ms, "
+            f"stall threshold {settings.LOOP_BLOCK_THRESHOLD_MS}ms)"
+        )
+    
+    def stop(self):
+        self.stopping.set()
+        self.detect_blocking_calls = False
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.watchdog is not None:
+            self.watchdog.join(timeout=2)
+            self.watchdog = None
+    
+    def status(self) -> dict:
+        return {
+            "running": self.task is not None,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls": self.stalls,
+            "blocking_call_sites": len(self.reported_sites),
+        }
+    
+    # ---- 1. Lag meter -----------------------------------------------------
+    
+    async def _measure_lag(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self.last_tick = now
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+    
+    # ---- 2. Stall watchdog (runs in its own thread) -------------------------
+    
+    def _watch_for_stalls(self):
+        reported_tick = None  # Report each stall once, not on every check
+        while not self.stopping.wait(self.threshold / 2):
+            last_tick = self.last_tick
+            blocked_for = time.monotonic() - last_tick - self.interval
+            if blocked_for < self.threshold or reported_tick == last_tick:
+                continue
+            reported_tick = last_tick
+            self.stalls += 1
+            EVENT_LOOP_STALLS.inc()
+            
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(stack unavailable)"
+            logger.warning(
+                f"Event loop blocked for {blocked_for * 1000:.0f}ms+ - stack of the blocking code:\n{stack}",
+                extra={"blocked_ms": round(blocked_for * 1000), "stack": stack}
+            )
+    
+    # ---- 3. Blocking-call detector -----------------------------------------
+    
+    def enable_blocking_call_detection(self):
+        """
+        Warn about synchronous file/network/sleep calls made on the event loop.
+        
+        Audit hooks can't be removed again, so disabling just makes the hook
+        return straight away.
+        """
+        self.detect_blocking_calls = True
+        if not self.hook_installed:
+            sys.addaudithook(self._audit_hook)
+            self.hook_installed = True
+            logger.info("Blocking-call detection enabled (debug mode)")
+    
+    def _audit_hook(self, event: str, args: tuple):
+        kind = BLOCKING_AUDIT_EVENTS.get(event)
+        if kind is None or not self.detect_blocking_calls:
+            return
+        if threading.get_ident() != self.loop_thread_id or getattr(self.in_hook, "active", False):
+            return
+        try:
+            if asyncio.get_running_loop() is None:
+                return
+        except RuntimeError:
+            return  # Not inside the event loop (e.g. before startup)
+        
+        self.in_hook.active = True
+        try:
+            stack = traceback.extract_stack()[:-1]
+            if any(frame.filename.startswith("<frozen importlib") for frame in stack):
+                return  # A lazy import reading its .py/.pyc file - not worth reporting
+            site = self._call_site(stack)
+            if site in self.reported_sites:
+                return
+            self.reported_sites.add(site)
+            EVENT_LOOP_BLOCKING_CALLS.inc(kind=kind)
+            target = args[0] if args else ""
+            logger.warning(
+                f"Blocking {kind} call on the event loop ({event} {target!r}) at {site}",
+                extra={
+                    "blocking_event": event,
+                    "call_site": site,
+                    "stack": "".join(traceback.format_list(stack[-8:])),
+                }
+            )
+        finally:
+            self.in_hook.active = False
+    
+    @staticmethod
+    def _call_site(stack) -> str:
+        """The innermost frame that belongs to our own code (not the library doing the I/O)."""
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for frame in reversed(stack):
+            if (frame.filename.startswith(project_dir) and frame.filename != __file__
+                    and "site-packages" not in frame.filename):
+                return f"{os.path.relpath(frame.filename, project_dir)}:{frame.lineno} in {frame.name}"
+        frame = stack[-1]
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+
+# Create global instance
+loop_monitor = LoopMonitor()
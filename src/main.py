@@ -8,125 +8,272 @@ What is an API?
 - Our frontend (webpage) will talk to this API
 """
 
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Request, Response, Header
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, case
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
+import time
+import asyncio
 import json
-import traceback
+import logging
+import secrets
 
 # Import our custom modules
-from src.database import init_db, get_db, Contract, engine
+from src.database import init_db, get_db, Contract, ContractClause, ContractVersion, AsyncSessionLocal, engine, describe_engine_profile
 from src.rag_system import rag_system
+from src.search_index import contract_search_index
+from src.http_cache import cache_headers, not_modified
+from src import events
+from src.events import event_hub
+from src.fast_json import FastJSONResponse, rows_to_dicts
+from src.compression import CompressionMiddleware
+from src.static_assets import static_assets
+from src.metrics import metrics, instrument_engine, MetricsMiddleware, StageTimer, UPLOAD_STAGE_SECONDS, QUESTIONS_ANSWERED
+from src import tracing
+from src import profiling
+from src.loop_monitor import loop_monitor
+from src.question_router import question_router
+from src import faq
+from src.clauses import clause_store, parse_clauses, parse_key_clauses_blob, CLAUSE_TYPES
+from src.map_reduce import map_reduce
+from src.versioning import contract_versioning
+from src.text_compaction import text_compactor, join_pages, OffsetMap
+from src.contract_dates import parse_contract_dates, contract_status
+from src.structured_logging import setup_logging, bind_logger, RequestIdMiddleware
 from src.early_warning import early_warning_system
 from src.config import settings
-from src.schemas import ContractCreate, ContractResponse, ContractUpdate, QuestionRequest
+from src.schemas import (
+    ContractCreate, ContractResponse, ContractUpdate, QuestionRequest, ContractSearchResponse
+)
+
+# Structured JSON logs, written by a background thread (see src/structured_logging.py)
+setup_logging()
+logger = logging.getLogger(__name__)
 
 # Create FastAPI app
 # Testing persistence of 5 uploaded contracts across redeployments
 app = FastAPI(
     title=settings.APP_NAME,
     description="AI-powered Contract Management with Early Warning System",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse  # orjson encoding for every JSON response
 )
 
+# Compress large responses (gzip, or brotli when available)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY
+)
+
+# Time every request for /metrics (added after compression, so it also times it)
+app.add_middleware(MetricsMiddleware)
+
+# Per-request span breakdown in a Server-Timing header (and optional trace file)
+app.add_middleware(tracing.TracingMiddleware)
+
+# Give every request an id that appears in all its log lines (outermost middleware)
+app.add_middleware(RequestIdMiddleware)
+
+# Time every SQL statement for /metrics and as "db" spans
+instrument_engine(engine)
+tracing.instrument_engine(engine)
+
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the application on startup."""
+    # Watch for code that blocks the event loop (started first, so startup is covered too)
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    
+    logger.info(f"Database engine profile: {describe_engine_profile()}")
     await init_db()
     
-    # Run migration to add contract_text column if needed
+    # Run migrations to add columns that older databases don't have yet
     from sqlalchemy import text
     # Use separate transactions to avoid "aborted transaction" error
+    for table, column, column_type in (
+        ("contracts", "contract_text", "TEXT"), ("contracts", "faq_answers", "TEXT"),
+        ("contracts", "version", "INTEGER DEFAULT 1"), ("contracts", "original_text", "TEXT"),
+        ("contracts", "offset_map", "TEXT"), ("contracts", "clauses_backfilled_at", "TIMESTAMP"),
+        ("contract_versions", "original_text", "TEXT"), ("contract_versions", "offset_map", "TEXT"),
+        ("ingested_files", "outcome", "VARCHAR(20) DEFAULT 'imported'"),
+    ):
+        try:
+            # Try to add the column (will fail if it already exists)
+            async with engine.begin() as conn:
+                await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+            logger.info(f"Added {table}.{column} column to database")
+        except Exception as e:
+            error_str = str(e).lower()
+            if "already exists" in error_str or "duplicate column" in error_str:
+                logger.info(f"Database schema is up to date ({table}.{column} column exists)")
+            else:
+                logger.warning(f"Could not add column: {e}")
+    
+    # Indexes used by the dashboard, warnings and the question router
+    # (create_all only adds them to new databases)
+    for column in ("end_date", "status", "risk_level"):
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_contracts_{column} ON contracts ({column})"))
+        except Exception as e:
+            logger.warning(f"Could not create index on contracts.{column}: {e}")
+    
+    # Full-text search index (FTS5 on SQLite, tsvector on Postgres)
+    await contract_search_index.setup(engine)
+    
+    # Clause rows for contracts analyzed before the contract_clauses table existed
     try:
-        # Try to add the column (will fail if it already exists)
-        async with engine.begin() as conn:
-            await conn.execute(text("ALTER TABLE contracts ADD COLUMN contract_text TEXT"))
-        print("[INFO] ✅ Added contract_text column to database")
+        async with AsyncSessionLocal() as session:
+            filled = await clause_store.backfill(session)
+        if filled:
+            logger.info(f"Parsed key clauses of {filled} existing contracts into contract_clauses")
     except Exception as e:
-        error_str = str(e).lower()
-        if "already exists" in error_str or "duplicate column" in error_str:
-            print("[INFO] ✅ Database schema is up to date (contract_text column exists)")
-        else:
-            print(f"[WARNING] ⚠️ Could not add column: {e}")
+        logger.warning(f"Could not backfill contract clauses: {e}")
     
     os.makedirs(settings.UPLOAD_DIRECTORY, exist_ok=True)
     
-    # Load all existing contracts into RAG system
-    print("[INFO] Loading existing contracts into RAG system...")
-    async for db in get_db():
-        try:
-            # Query all contracts from database
-            result = await db.execute(select(Contract))
-            contracts = result.scalars().all()
+    # Frontend files: read, fingerprint and compress once, then serve from memory
+    # (gzip-9/brotli-11 takes a few hundred ms - in a thread, not on the event loop)
+    await asyncio.to_thread(static_assets.load, "static")
+    
+    # Load existing contracts into the RAG system in the background,
+    # so the server starts answering requests straight away (see /health/ready)
+    global rag_warmup_task
+    rag_warmup_task = asyncio.create_task(warm_up_rag_system())
+
+
+def rag_metadata(contract) -> dict:
+    """
+    What the RAG system stores with a contract (a Contract or a selected row).
+    
+    Status, risk, dates and value feed the filters of /api/contracts/ask.
+    """
+    return {
+        "name": contract.contract_name,
+        "number": contract.contract_number,
+        "party_a": contract.party_a,
+        "party_b": contract.party_b,
+        "status": contract.status,
+        "risk_level": contract.risk_level,
+        "start_date": contract.start_date,
+        "end_date": contract.end_date,
+        "contract_value": contract.contract_value
+    }
+
+
+# Background task that fills the RAG system after startup
+rag_warmup_task: Optional[asyncio.Task] = None
+
+# Contracts loaded between pauses that let other requests run
+RAG_WARMUP_BATCH_SIZE = 25
+
+
+async def warm_up_rag_system():
+    """
+    Load all existing contracts into the RAG system.
+    
+    Runs as a background task: the API is already serving requests while this
+    works, and progress is reported by /health/ready.
+    """
+    logger.info("Loading existing contracts into RAG system (background)...")
+    try:
+        async for db in get_db():
+            total = (await db.execute(select(func.count(Contract.id)))).scalar() or 0
+            rag_system.start_warmup(total)
+            logger.info(f"Found {total} contracts in database")
             
-            print(f"[INFO] Found {len(contracts)} contracts in database")
+            # Only the columns we need (not summaries, clauses etc.)
+            result = await db.execute(select(
+                Contract.id, Contract.contract_text, Contract.file_path,
+                Contract.contract_name, Contract.contract_number,
+                Contract.party_a, Contract.party_b, Contract.status, Contract.risk_level,
+                Contract.start_date, Contract.end_date, Contract.contract_value
+            ))
             
-            # Load each contract into RAG system
-            for contract in contracts:
+            for index, contract in enumerate(result, start=1):
+                contract_metadata = rag_metadata(contract)
                 # Try to load from contract_text field first (free tier)
                 if contract.contract_text and len(contract.contract_text) > 100:
                     await rag_system.add_contract_to_vectordb(
                         contract_id=contract.id,
                         contract_text=contract.contract_text,
-                        contract_metadata={
-                            "name": contract.contract_name,
-                            "number": contract.contract_number,
-                            "party_a": contract.party_a,
-                            "party_b": contract.party_b
-                        }
+                        contract_metadata=contract_metadata
                     )
-                    print(f"[INFO] Loaded contract {contract.contract_number} from database text")
                 # Fallback to file if available (paid tier with persistent storage)
                 elif contract.file_path and os.path.exists(contract.file_path):
                     await rag_system.load_contract_from_file(
                         contract_id=contract.id,
                         file_path=contract.file_path,
-                        contract_metadata={
-                            "name": contract.contract_name,
-                            "number": contract.contract_number,
-                            "party_a": contract.party_a,
-                            "party_b": contract.party_b
-                        }
+                        contract_metadata=contract_metadata
                     )
-                    print(f"[INFO] Loaded contract {contract.contract_number} from file")
                 else:
-                    print(f"[WARNING] Contract {contract.id} has no text or file")
+                    logger.warning(f"Contract {contract.id} has no text or file")
+                
+                rag_system.warmup["loaded"] = index
+                if index % RAG_WARMUP_BATCH_SIZE == 0:
+                    await asyncio.sleep(0)  # Let waiting requests run
             
-            print(f"[SUCCESS] RAG system initialized with {len(rag_system.contracts_storage)} contracts")
             break  # Only need one db session
-        except Exception as e:
-            print(f"[ERROR] Failed to load contracts into RAG system: {e}")
-            import traceback
-            traceback.print_exc()
+        
+        rag_system.finish_warmup()
+        logger.info(f"RAG system initialized with {len(rag_system.contracts_storage)} contracts "
+              f"in {rag_system.warmup_status()['elapsed_seconds']}s")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        rag_system.finish_warmup(error=str(e))
+        logger.exception(f"Failed to load contracts into RAG system: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close open event streams and stop background work so the server can stop promptly."""
+    event_hub.close()
+    tracing.trace_file_writer.stop()
+    loop_monitor.stop()
+    if rag_warmup_task is not None and not rag_warmup_task.done():
+        rag_warmup_task.cancel()
 
 
 @app.get("/", response_class=HTMLResponse)
-async def read_root():
+async def read_root(request: Request):
     """Serve the main dashboard HTML page."""
-    try:
-        with open("static/index.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read(), status_code=200)
-    except Exception:
-        return HTMLResponse(content="""
-        <html>
-            <body>
-                <h1>Contract Management System</h1>
-                <p>API is running! Frontend is being set up...</p>
-                <p>Visit <a href="/docs">/docs</a> for API documentation</p>
-            </body>
-        </html>
-        """, status_code=200)
+    if static_assets.index_html is not None:
+        # index.html always revalidates - it is what points at the new asset names
+        return static_assets.response(request, static_assets.index_html, immutable=False)
+    
+    return HTMLResponse(content="""
+    <html>
+        <body>
+            <h1>Contract Management System</h1>
+            <p>API is running! Frontend is being set up...</p>
+            <p>Visit <a href="/docs">/docs</a> for API documentation</p>
+        </body>
+    </html>
+    """, status_code=200)
 
 
-# Mount static files AFTER defining the root route
-os.makedirs("static", exist_ok=True)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+@app.get("/static/{path:path}")
+async def serve_static(path: str, request: Request):
+    """
+    Serve a frontend file from the in-memory cache.
+    
+    - Fingerprinted names (app.3f9a1c2b7e.js) are cached by the browser for a year
+    - Plain names (app.js) still work, but are re-checked on every use
+    """
+    asset = static_assets.assets.get(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    immutable = path == asset.fingerprinted_name and path != asset.name
+    return static_assets.response(request, asset, immutable=immutable)
 
 
 # ============================================================================
@@ -161,11 +308,19 @@ async def create_contract(
     await db.commit()
     await db.refresh(db_contract)
     
+    event_hub.publish_contract_change(events.CONTRACT_CREATED, db_contract.id)
+    
     return db_contract
 
 
+# Columns returned by the contract list (exactly the ContractResponse fields,
+# so the large contract_text column is never loaded)
+CONTRACT_RESPONSE_COLUMNS = tuple(getattr(Contract, name) for name in ContractResponse.model_fields)
+
+
 @app.get("/api/contracts", response_model=List[ContractResponse])
 async def get_contracts(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
@@ -180,8 +335,18 @@ async def get_contracts(
     - limit: Maximum number of records to return
     - status: Filter by status (active, expired, etc.)
     - risk_level: Filter by risk level (low, medium, high, critical)
+    
+    Supports conditional GET: returns 304 if the client's ETag is current.
+    
+    Fast path: rows are read as plain column tuples and encoded directly,
+    skipping ORM objects and per-row Pydantic validation.
     """
-    query = select(Contract)
+    headers = await cache_headers(request, "contracts")
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    
+    query = select(*CONTRACT_RESPONSE_COLUMNS)
     
     if status:
         query = query.where(Contract.status == status)
@@ -193,9 +358,41 @@ async def get_contracts(
     query = query.offset(skip).limit(limit).order_by(Contract.created_at.desc())
     
     result = await db.execute(query)
-    contracts = result.scalars().all()
     
-    return contracts
+    return FastJSONResponse(rows_to_dicts(result), headers=headers)
+
+
+@app.get("/api/contracts/search", response_model=ContractSearchResponse)
+async def search_contracts(
+    q: str,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Full-text search across contract text, summaries and key clauses.
+    
+    Uses the database's own search index - no AI call, so results come back
+    in milliseconds. Hits are ranked by relevance and include a highlighted snippet.
+    
+    Query Parameters:
+    - q: Words to search for (the last word also matches as a prefix)
+    - limit: Maximum number of hits (1-100)
+    """
+    limit = max(1, min(limit, 100))
+    started = time.perf_counter()
+    
+    try:
+        hits = await contract_search_index.search(db, q, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Search failed: {str(e)}")
+    
+    return {
+        "query": q,
+        "backend": contract_search_index.backend,
+        "total": len(hits),
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        "hits": hits
+    }
 
 
 @app.get("/api/contracts/{contract_id}", response_model=ContractResponse)
@@ -243,6 +440,9 @@ async def update_contract(
     await db.commit()
     await db.refresh(contract)
     
+    rag_system.update_contract_metadata(contract.id, rag_metadata(contract))
+    event_hub.publish_contract_change(events.CONTRACT_UPDATED, contract.id, fields=list(update_data.keys()))
+    
     return contract
 
 
@@ -262,8 +462,14 @@ async def delete_contract(
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
     
+    from sqlalchemy import delete
+    await clause_store.replace(db, contract_id, [])
+    await db.execute(delete(ContractVersion).where(ContractVersion.contract_id == contract_id))
     await db.delete(contract)
     await db.commit()
+    rag_system.remove_contract(contract_id)
+    
+    event_hub.publish_contract_change(events.CONTRACT_DELETED, contract_id)
     
     return {"message": "Contract deleted successfully"}
 
@@ -286,6 +492,8 @@ async def clear_all_contracts(
     from sqlalchemy import delete
     
     try:
+        await db.execute(delete(ContractClause))
+        await db.execute(delete(ContractVersion))
         result = await db.execute(delete(Contract))
         await db.commit()
         
@@ -294,6 +502,8 @@ async def clear_all_contracts(
         # Clear RAG system
         rag_system.clear_all()
         
+        event_hub.publish_contract_change(events.CONTRACT_DELETED, None, all=True, deleted_count=deleted_count)
+        
         return {
             "message": "All contracts cleared successfully",
             "deleted_count": deleted_count,
@@ -310,8 +520,8 @@ async def reanalyze_contract(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Re-analyze a contract to update its risk reason.
-    Useful for contracts uploaded before the risk_reason feature was added.
+    Re-analyze a contract to update its risk reason and precomputed FAQ answers.
+    Useful for contracts uploaded before these features were added.
     """
     result = await db.execute(
         select(Contract).where(Contract.id == contract_id)
@@ -321,15 +531,18 @@ async def reanalyze_contract(
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
     
-    if not contract.file_path or not os.path.exists(contract.file_path):
+    # Free-tier uploads keep the text in the database instead of a file
+    if not contract.contract_text and (not contract.file_path or not os.path.exists(contract.file_path)):
         raise HTTPException(status_code=400, detail="Contract file not found")
     
     try:
         # Read contract text
-        contract_text = ""
-        file_extension = os.path.splitext(contract.file_path)[1].lower()
+        contract_text = contract.contract_text or ""
+        file_extension = os.path.splitext(contract.file_path or "")[1].lower()
         
-        if file_extension == ".txt":
+        if contract_text:
+            pass
+        elif file_extension == ".txt":
             with open(contract.file_path, "r", encoding="utf-8", errors="ignore") as f:
                 contract_text = f.read()
         elif file_extension == ".pdf":
@@ -345,16 +558,32 @@ async def reanalyze_contract(
         risk_assessment = await rag_system.assess_risk_level(contract_text)
         risk_reason = risk_assessment.get("risk_reason", "Risk level determined by contract analysis")
         
+        # Refresh the precomputed FAQ answers too (keep the old ones if this fails)
+        fields, faq_count = ["risk_reason"], 0
+        try:
+            faq_answers = await rag_system.generate_faq_answers(
+                contract_text, {key: topic.question for key, topic in faq.enabled_topics().items()}
+            )
+            if faq_answers:
+                contract.faq_answers = faq.build_answer_sheet(faq_answers)
+                fields.append("faq_answers")
+                faq_count = len(faq_answers)
+        except Exception as e:
+            logger.warning(f"Failed to regenerate FAQ answers for contract {contract.id}: {e}")
+        
         # Update contract
         contract.risk_reason = risk_reason
         contract.updated_at = datetime.utcnow()
         await db.commit()
         await db.refresh(contract)
         
+        event_hub.publish_contract_change(events.CONTRACT_UPDATED, contract.id, fields=fields)
+        
         return {
             "message": "Contract re-analyzed successfully",
             "risk_level": contract.risk_level,
-            "risk_reason": risk_reason
+            "risk_reason": risk_reason,
+            "faq_answers": faq_count
         }
         
     except Exception as e:
@@ -454,6 +683,10 @@ async def reanalyze_all_contracts(db: AsyncSession = Depends(get_db)):
         # Commit all changes
         await db.commit()
         
+        for item in results:
+            if item["status"] == "success":
+                event_hub.publish_contract_change(events.CONTRACT_UPDATED, item["contract_id"], fields=["risk_reason"])
+        
         return {
             "message": f"Bulk re-analysis completed: {success_count} succeeded, {failed_count} failed",
             "total": len(contracts),
@@ -470,14 +703,11 @@ async def reanalyze_all_contracts(db: AsyncSession = Depends(get_db)):
 # FILE UPLOAD ENDPOINT
 # ============================================================================
 
-def log_upload_attempt(filename: str, status: str, message: str):
-    """Log upload attempts to file for debugging"""
-    try:
-        with open("upload_log.txt", "a", encoding="utf-8") as f:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            f.write(f"{timestamp} | {filename} | {status} | {message}\n")
-    except:
-        pass  # Don't let logging errors break uploads
+def read_pdf_pages(content: bytes) -> List[str]:
+    """The text of each page of an uploaded PDF (run it in a thread: it blocks)."""
+    import io
+    from PyPDF2 import PdfReader
+    return [page.extract_text() or "" for page in PdfReader(io.BytesIO(content)).pages]
 
 
 @app.post("/api/contracts/upload")
@@ -494,16 +724,26 @@ async def upload_contract(
     3. Uses AI to extract metadata (name, parties, dates, value)
     4. Generates summary and assesses risk
     5. Stores everything in database
+    
+    Progress is broadcast as "upload-stage" events on /api/events.
     """
+    def report_stage(stage: str, **data):
+        event_hub.publish(events.UPLOAD_STAGE, {"file": file.filename, "stage": stage, **data})
+    
+    # Every log line for this upload carries the file name
+    upload_log = bind_logger(logger, upload_file=file.filename)
+    
+    # Records how long each stage takes (see /metrics and the Server-Timing header)
+    stage_timer = StageTimer(UPLOAD_STAGE_SECONDS, span_prefix="upload")
+    
     try:
-        print(f"\n[UPLOAD] Starting upload for file: {file.filename}")
-        log_upload_attempt(file.filename, "STARTED", "Upload initiated")
+        upload_log.info(f"Starting upload for file: {file.filename}", extra={"upload_status": "STARTED"})
+        report_stage("started")
         
         # Validate file type
         file_extension = os.path.splitext(file.filename)[1].lower()
         if file_extension not in settings.ALLOWED_EXTENSIONS:
-            print(f"[UPLOAD ERROR] Invalid file type: {file_extension}")
-            log_upload_attempt(file.filename, "REJECTED", f"Invalid file type: {file_extension}")
+            upload_log.warning(f"Invalid file type: {file_extension}", extra={"upload_status": "REJECTED"})
             raise HTTPException(
                 status_code=400,
                 detail=f"File type {file_extension} not allowed. Use PDF or TXT files."
@@ -514,102 +754,123 @@ async def upload_contract(
         temp_filename = f"temp_{timestamp}_{file.filename}"
         file_path = os.path.join(settings.UPLOAD_DIRECTORY, temp_filename)
         
-        print(f"[UPLOAD] Saving file to: {file_path}")
+        upload_log.info(f"Saving file to: {file_path}")
+        stage_timer.reset()
         
         # Save file
         try:
             with open(file_path, "wb") as f:
                 content = await file.read()
                 f.write(content)
-            print(f"[UPLOAD] File saved successfully, size: {len(content)} bytes")
+            upload_log.info(f"File saved successfully, size: {len(content)} bytes")
+            report_stage("saved", size=len(content))
         except Exception as e:
-            print(f"[UPLOAD ERROR] Failed to save file: {str(e)}")
+            upload_log.error(f"Failed to save file: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+        stage_timer.lap("save")
         
         # Extract text from file
-        print(f"[UPLOAD] Extracting text from {file_extension} file...")
+        upload_log.info(f"Extracting text from {file_extension} file...")
         contract_text = ""
         if file_extension == ".txt":
             contract_text = content.decode("utf-8", errors="ignore")
-            print(f"[UPLOAD] Extracted {len(contract_text)} characters from TXT")
+            upload_log.info(f"Extracted {len(contract_text)} characters from TXT")
         elif file_extension == ".pdf":
             try:
-                from PyPDF2 import PdfReader
-                reader = PdfReader(file_path)
-                print(f"[UPLOAD] PDF has {len(reader.pages)} pages")
-                for page in reader.pages:
-                    contract_text += page.extract_text()
-                print(f"[UPLOAD] Extracted {len(contract_text)} characters from PDF")
+                # PDF parsing is slow, pure-Python work - keep it off the event loop
+                pages = await asyncio.to_thread(read_pdf_pages, content)
+                upload_log.info(f"PDF has {len(pages)} pages")
+                contract_text = join_pages(pages)
+                upload_log.info(f"Extracted {len(contract_text)} characters from PDF")
             except Exception as e:
-                print(f"[UPLOAD ERROR] Failed to read PDF: {str(e)}")
+                upload_log.warning(f"Failed to read PDF: {str(e)}")
                 raise HTTPException(
                     status_code=400,
                     detail=f"Failed to read PDF: {str(e)}"
                 )
         
+        stage_timer.lap("extract")
+        
         if not contract_text or len(contract_text) < 100:
-            print(f"[UPLOAD ERROR] Contract text too short: {len(contract_text)} characters")
+            upload_log.warning(f"Contract text too short: {len(contract_text)} characters")
             raise HTTPException(
                 status_code=400,
                 detail="Contract file appears empty or could not be read"
             )
         
+        # Page headers/numbers, hyphenation and whitespace cost tokens in every prompt
+        contract_text, compaction_columns, compaction = text_compactor.for_storage(contract_text)
+        if compaction:
+            upload_log.info(
+                f"Compacted text: {compaction['original_chars']} -> {compaction['compacted_chars']} characters "
+                f"(-{compaction['char_reduction_pct']}%, ~{compaction['original_tokens'] - compaction['compacted_tokens']} tokens)"
+            )
+        stage_timer.lap("compact")
+        
+        report_stage("extracted", characters=len(contract_text), compaction=compaction)
+        
         # Step 1: Extract metadata using AI
-        print(f"[UPLOAD] Step 1/4: Extracting metadata with AI...")
+        upload_log.info(f"Step 1/5: Extracting metadata with AI...")
         try:
             metadata = await rag_system.extract_contract_metadata(contract_text)
-            print(f"[UPLOAD] Metadata extracted: {metadata.get('contract_number', 'N/A')}")
+            upload_log.info(f"Metadata extracted: {metadata.get('contract_number', 'N/A')}")
+            report_stage("metadata", step=1, total_steps=5)
         except Exception as e:
-            print(f"[UPLOAD ERROR] Failed to extract metadata: {str(e)}")
+            upload_log.error(f"Failed to extract metadata: {str(e)}")
             raise HTTPException(status_code=500, detail=f"AI metadata extraction failed: {str(e)}")
+        stage_timer.lap("metadata")
         
         # Step 2: Generate summary
-        print(f"[UPLOAD] Step 2/4: Generating summary with AI...")
+        upload_log.info(f"Step 2/5: Generating summary with AI...")
         try:
             summary = await rag_system.generate_contract_summary(contract_text)
-            print(f"[UPLOAD] Summary generated ({len(summary)} chars)")
+            upload_log.info(f"Summary generated ({len(summary)} chars)")
+            report_stage("summary", step=2, total_steps=5)
         except Exception as e:
-            print(f"[UPLOAD ERROR] Failed to generate summary: {str(e)}")
+            upload_log.warning(f"Failed to generate summary: {str(e)}")
             summary = "Summary generation failed"
+        stage_timer.lap("summary")
         
         # Step 3: Extract key clauses
-        print(f"[UPLOAD] Step 3/4: Extracting key clauses with AI...")
+        upload_log.info(f"Step 3/5: Extracting key clauses with AI...")
         try:
             key_clauses = await rag_system.extract_key_clauses(contract_text)
-            print(f"[UPLOAD] Key clauses extracted")
+            upload_log.info(f"Key clauses extracted")
+            report_stage("clauses", step=3, total_steps=5)
         except Exception as e:
-            print(f"[UPLOAD ERROR] Failed to extract key clauses: {str(e)}")
+            upload_log.warning(f"Failed to extract key clauses: {str(e)}")
             key_clauses = {}
+        stage_timer.lap("clauses")
         
         # Step 4: Assess risk
-        print(f"[UPLOAD] Step 4/4: Assessing risk level with AI...")
+        upload_log.info(f"Step 4/5: Assessing risk level with AI...")
         try:
             risk_assessment = await rag_system.assess_risk_level(contract_text)
-            print(f"[UPLOAD] Risk assessment: {risk_assessment.get('risk_level', 'unknown')}")
+            upload_log.info(f"Risk assessment: {risk_assessment.get('risk_level', 'unknown')}")
+            report_stage("risk", step=4, total_steps=5)
         except Exception as e:
-            print(f"[UPLOAD ERROR] Failed to assess risk: {str(e)}")
+            upload_log.warning(f"Failed to assess risk: {str(e)}")
             risk_assessment = {"risk_level": "medium", "risk_reason": "Risk assessment failed"}
+        stage_timer.lap("risk")
         
-        # Parse dates
-        from dateutil import parser as date_parser
+        # Step 5: Answer the common questions once, so they don't need the AI later
+        upload_log.info(f"Step 5/5: Precomputing FAQ answers with AI...")
         try:
-            start_date = date_parser.parse(metadata['start_date']) if metadata.get('start_date') else datetime.now()
-        except:
-            start_date = datetime.now()
+            faq_answers = await rag_system.generate_faq_answers(
+                contract_text, {key: topic.question for key, topic in faq.enabled_topics().items()}
+            )
+            upload_log.info(f"FAQ answers generated: {len(faq_answers)}")
+            report_stage("faq", step=5, total_steps=5)
+        except Exception as e:
+            upload_log.warning(f"Failed to generate FAQ answers: {str(e)}")
+            faq_answers = {}  # Questions simply go to the AI instead
+        stage_timer.lap("faq")
         
-        try:
-            end_date = date_parser.parse(metadata['end_date']) if metadata.get('end_date') else datetime.now() + timedelta(days=365)
-        except:
-            end_date = datetime.now() + timedelta(days=365)
+        # Parse dates (missing ones default to today / a year from today)
+        start_date, end_date = parse_contract_dates(metadata)
         
         # Determine status based on dates
-        current_date = datetime.now()
-        if end_date < current_date:
-            status = "expired"
-        elif start_date > current_date:
-            status = "pending"
-        else:
-            status = "active"
+        status = contract_status(start_date, end_date)
         
         # Generate contract number
         contract_number = metadata.get('contract_number', f"CNT-{timestamp}")
@@ -625,11 +886,11 @@ async def upload_contract(
             if os.path.exists(final_path):
                 os.remove(final_path)
             os.rename(file_path, final_path)
-            print(f"[UPLOAD] File saved at: {final_path}")
+            upload_log.info(f"File saved at: {final_path}")
         else:
             # Delete file after extraction (free tier - text stored in DB)
             os.remove(file_path)
-            print(f"[UPLOAD] File deleted (text stored in database for free tier)")
+            upload_log.info(f"File deleted (text stored in database for free tier)")
         
         # Create database record
         db_contract = Contract(
@@ -648,48 +909,55 @@ async def upload_contract(
             key_clauses=json.dumps(key_clauses),
             risk_level=risk_assessment["risk_level"],
             risk_reason=risk_assessment.get("risk_reason", "Risk level determined by contract analysis"),
-            status=status
+            faq_answers=faq.build_answer_sheet(faq_answers) if faq_answers else None,
+            status=status,
+            **compaction_columns
         )
         
-        print(f"[UPLOAD] Saving contract to database...")
+        upload_log.info(f"Saving contract to database...")
+        stage_timer.reset()
         db.add(db_contract)
         try:
+            await db.flush()  # Assigns the id the clause rows point to
+            await clause_store.replace(db, db_contract.id, parse_clauses(key_clauses.get("extracted_clauses", ""), contract_text))
             await db.commit()
             await db.refresh(db_contract)
-            print(f"[UPLOAD SUCCESS] Contract saved with ID: {db_contract.id}")
+            upload_log.info(f"Contract saved with ID: {db_contract.id}")
+            stage_timer.lap("db")
+            report_stage("database", contract_id=db_contract.id)
+            event_hub.publish_contract_change(events.CONTRACT_CREATED, db_contract.id)
         except Exception as e:
             await db.rollback()
-            print(f"[UPLOAD ERROR] Database error: {str(e)}")
             if "UNIQUE constraint failed" in str(e) or "unique" in str(e).lower():
-                log_upload_attempt(file.filename, "DUPLICATE", f"Contract {contract_number} already exists")
+                upload_log.warning(f"Contract {contract_number} already exists", extra={"upload_status": "DUPLICATE"})
                 raise HTTPException(
                     status_code=400,
                     detail=f"Contract number {contract_number} already exists in database. Please upload a different contract."
                 )
             else:
-                log_upload_attempt(file.filename, "DB_ERROR", f"Database error: {str(e)}")
+                upload_log.error(f"Database error: {str(e)}", extra={"upload_status": "DB_ERROR"})
                 raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
         
         # Add to vector database for RAG
-        print(f"[UPLOAD] Adding contract to RAG vector database...")
+        upload_log.info(f"Adding contract to RAG vector database...")
         try:
             await rag_system.add_contract_to_vectordb(
                 contract_id=db_contract.id,
                 contract_text=contract_text,
-                contract_metadata={
-                    "name": metadata.get('contract_name'),
-                    "number": contract_number,
-                    "party_a": metadata.get('party_a'),
-                    "party_b": metadata.get('party_b')
-                }
+                contract_metadata=rag_metadata(db_contract)
             )
-            print(f"[UPLOAD] Successfully added to RAG system")
+            upload_log.info(f"Successfully added to RAG system")
+            stage_timer.lap("index")
+            report_stage("indexed", contract_id=db_contract.id)
         except Exception as e:
-            print(f"[UPLOAD WARNING] Failed to add to RAG system: {str(e)}")
+            upload_log.warning(f"Failed to add to RAG system: {str(e)}")
             # Don't fail the upload if RAG indexing fails
         
-        print(f"[UPLOAD COMPLETE] Contract {contract_number} uploaded successfully!\n")
-        log_upload_attempt(file.filename, "SUCCESS", f"Contract {contract_number} uploaded with ID {db_contract.id}")
+        upload_log.info(
+            f"Contract {contract_number} uploaded successfully!",
+            extra={"upload_status": "SUCCESS", "contract_id": db_contract.id}
+        )
+        report_stage("complete", contract_id=db_contract.id, contract_number=contract_number)
         
         return {
             "message": "Contract uploaded and processed successfully",
@@ -704,18 +972,19 @@ async def upload_contract(
             "status": status,
             "risk_level": risk_assessment["risk_level"],
             "risk_reason": risk_assessment.get("risk_reason", ""),
-            "summary": summary
+            "summary": summary,
+            "compaction": compaction
         }
     
-    except HTTPException:
+    except HTTPException as e:
         # Re-raise HTTP exceptions (already logged and handled)
+        report_stage("failed", detail=e.detail)
         raise
     except Exception as e:
         # Catch any unexpected errors
         error_msg = f"Unexpected error during upload: {str(e)}"
-        print(f"[UPLOAD CRITICAL ERROR] {error_msg}")
-        print(f"[UPLOAD TRACEBACK] {traceback.format_exc()}")
-        log_upload_attempt(file.filename, "FAILED", error_msg)
+        report_stage("failed", detail=error_msg)
+        upload_log.exception(error_msg, extra={"upload_status": "FAILED"})
         raise HTTPException(
             status_code=500,
             detail=f"Upload failed: {str(e)}. Check server logs for details."
@@ -728,7 +997,8 @@ async def upload_contract(
 
 @app.post("/api/contracts/ask")
 async def ask_question(
-    question_data: QuestionRequest
+    question_data: QuestionRequest,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Ask a question about contracts using RAG.
@@ -737,13 +1007,259 @@ async def ask_question(
     - "What are the payment terms in contract #12345?"
     - "Which contracts have termination clauses?"
     - "Summarize the renewal terms"
+    
+    Add "filters" to ask about a group of contracts, e.g.
+    {"status": ["active"], "risk_level": ["high", "critical"], "party": "acme"}
+    
+    Simple factual questions ("When does CNT-2024-1000 expire?", "How many
+    contracts expire next quarter?") are answered from the database
+    without calling the AI - see src/question_router.py.
+    
+    Common questions about one contract ("What are the payment terms?")
+    get the answer precomputed at upload time - see src/faq.py.
+    
+    Add "clause_type" (e.g. "liability") to answer from that kind of clause
+    only - see src/clauses.py.
     """
+    filters = question_data.filters.model_dump(exclude_none=True) if question_data.filters else None
+    
+    if question_data.clause_type:
+        return await answer_from_clauses(db, question_data, filters)
+    
+    if not filters:
+        routed = await question_router.route(db, question_data.question, question_data.contract_id)
+        if routed is not None:
+            QUESTIONS_ANSWERED.inc(source="database", intent=routed.intent)
+            return {
+                "question": question_data.question,
+                "answer": routed.answer,
+                "source": "database",
+                "intent": routed.intent
+            }
+    
+    topic = faq.match_topic(question_data.question) if question_data.contract_id and not filters else None
+    if topic:
+        # Only the small answer-sheet column, not the whole contract
+        faq_answers = (await db.execute(
+            select(Contract.faq_answers).where(Contract.id == question_data.contract_id)
+        )).scalar_one_or_none()
+        saved = faq.cached_answer(faq_answers, topic)
+        if saved is not None:
+            QUESTIONS_ANSWERED.inc(source="faq", intent=topic)
+            return {
+                "question": question_data.question,
+                "answer": saved["answer"],
+                "source": "faq",
+                "intent": topic,
+                "generated_at": saved["generated_at"],
+                "age_seconds": saved["age_seconds"]
+            }
+    
     answer = await rag_system.answer_question(
         question=question_data.question,
-        contract_id=question_data.contract_id
+        contract_id=question_data.contract_id,
+        filters=filters or None
+    )
+    QUESTIONS_ANSWERED.inc(source="ai", intent="filtered" if filters else "rag")
+    
+    return {"question": question_data.question, "answer": answer, "source": "ai"}
+
+
+async def answer_from_clauses(db: AsyncSession, question_data: QuestionRequest, filters: Optional[dict]):
+    """Answer a question using only the stored clauses of one type."""
+    clause_type = question_data.clause_type
+    if clause_type not in CLAUSE_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown clause type. Choose from: {', '.join(CLAUSE_TYPES)}")
+    
+    if question_data.contract_id:
+        clauses = await clause_store.find(db, clause_type, [question_data.contract_id], limit=settings.CLAUSE_CONTEXT_LIMIT)
+    else:
+        clauses = await clause_store.find(db, clause_type, filters=filters, limit=settings.CLAUSE_CONTEXT_LIMIT)
+    excerpts = [
+        f"{clause['contract_name']} ({clause['contract_number']}) - {clause_type.replace('_', ' ')}:\n{clause['text']}"
+        for clause in clauses
+    ]
+    
+    answer = await rag_system.answer_question(question=question_data.question, excerpts=excerpts)
+    QUESTIONS_ANSWERED.inc(source="ai", intent="clauses")
+    return {
+        "question": question_data.question,
+        "answer": answer,
+        "source": "ai",
+        "clause_type": clause_type,
+        "contract_ids": [clause["contract_id"] for clause in clauses]
+    }
+
+
+# ============================================================================
+# CLAUSE ENDPOINTS
+# ============================================================================
+
+@app.get("/api/clauses")
+async def list_clauses(
+    clause_type: str,
+    status: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    party: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    One kind of clause across the portfolio, e.g. every liability clause.
+    
+    Optionally only contracts with a given status, risk level or party.
+    """
+    if clause_type not in CLAUSE_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown clause type. Choose from: {', '.join(CLAUSE_TYPES)}")
+    
+    filters = {key: value for key, value in {"status": status, "risk_level": risk_level, "party": party}.items() if value}
+    clauses = await clause_store.find(db, clause_type, filters=filters, limit=min(limit, 1000), offset=skip)
+    return {"clause_type": clause_type, "clauses": clauses}
+
+
+@app.get("/api/clauses/types")
+async def clause_type_counts(db: AsyncSession = Depends(get_db)):
+    """Each clause type and how many contracts have it."""
+    counts = await clause_store.type_counts(db)
+    return {"clause_types": {clause_type: counts.get(clause_type, 0) for clause_type in CLAUSE_TYPES}}
+
+
+@app.get("/api/contracts/{contract_id}/clauses")
+async def get_contract_clauses(contract_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    The key clauses of one contract, with where they appear in its text.
+    
+    start_offset/end_offset point into the stored (compacted) text;
+    original_start/original_end into the text as it was extracted.
+    """
+    row = (await db.execute(select(Contract.offset_map).where(Contract.id == contract_id))).one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    
+    clauses = await clause_store.for_contract(db, contract_id)
+    return {"contract_id": contract_id, "clauses": with_original_offsets(clauses, row[0])}
+
+
+def with_original_offsets(clauses: List[dict], offset_map_json: Optional[str]) -> List[dict]:
+    """Add original_start/original_end (positions in the text as extracted) to each clause."""
+    offset_map = OffsetMap.from_json(offset_map_json)
+    for clause in clauses:
+        clause["original_start"] = offset_map.to_original(clause["start_offset"]) if offset_map else clause["start_offset"]
+        clause["original_end"] = offset_map.to_original(clause["end_offset"]) if offset_map else clause["end_offset"]
+    return clauses
+
+
+# ============================================================================
+# CONTRACT VERSION ENDPOINTS
+# ============================================================================
+
+@app.post("/api/contracts/{contract_id}/versions")
+async def upload_contract_version(
+    contract_id: int,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload a renewed or amended version of an existing contract.
+    
+    The current version is kept (GET /api/contracts/{id}/versions), the two
+    texts are compared section by section, and only the analyses that read a
+    changed section are redone - see src/versioning.py.
+    """
+    contract = (await db.execute(select(Contract).where(Contract.id == contract_id))).scalar_one_or_none()
+    if not contract:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    
+    file_extension = os.path.splitext(file.filename)[1].lower()
+    if file_extension not in settings.ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"File type {file_extension} not allowed. Use PDF or TXT files.")
+    
+    content = await file.read()
+    if file_extension == ".pdf":
+        try:
+            # PDF parsing is slow, pure-Python work - keep it off the event loop
+            contract_text = join_pages(await asyncio.to_thread(read_pdf_pages, content))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to read PDF: {str(e)}")
+    else:
+        contract_text = content.decode("utf-8", errors="ignore")
+    
+    if len(contract_text) < 100:
+        raise HTTPException(status_code=400, detail="Contract file appears empty or could not be read")
+    
+    contract_text, compaction_columns, compaction = text_compactor.for_storage(contract_text)
+    
+    try:
+        result = await contract_versioning.amend(db, contract, contract_text)
+        if result.get("unchanged"):
+            return {"message": "This version is the same as the current one - nothing to update", "contract_id": contract_id, **result}
+        for column, value in compaction_columns.items():
+            setattr(contract, column, value)
+        await db.commit()
+        await db.refresh(contract)
+    except Exception as e:
+        await db.rollback()
+        logger.exception(f"Failed to add a version to contract {contract_id}")
+        raise HTTPException(status_code=500, detail=f"Failed to update contract: {str(e)}")
+    
+    # Search the new text from now on
+    await rag_system.add_contract_to_vectordb(contract.id, contract_text, rag_metadata(contract))
+    event_hub.publish_contract_change(events.CONTRACT_UPDATED, contract.id, fields=["contract_text", "version"])
+    
+    logger.info(
+        f"Contract {contract_id} is now version {result['version']} ({result['mode']}: "
+        f"re-analyzed {result['reanalyzed'] or 'nothing'}, reused {result['reused'] or 'nothing'})"
     )
+    return {
+        "message": f"Contract updated to version {result['version']}",
+        "contract_id": contract_id,
+        "risk_level": contract.risk_level,
+        "risk_reason": contract.risk_reason,
+        "compaction": compaction,
+        **result
+    }
+
+
+@app.get("/api/contracts/{contract_id}/versions")
+async def list_contract_versions(contract_id: int, db: AsyncSession = Depends(get_db)):
+    """The current version number and the earlier versions of a contract."""
+    current = (await db.execute(select(Contract.version).where(Contract.id == contract_id))).one_or_none()
+    if current is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return {
+        "contract_id": contract_id,
+        "current_version": current[0] or 1,
+        "versions": await contract_versioning.history(db, contract_id),
+    }
+
+
+@app.get("/api/contracts/{contract_id}/versions/{version}")
+async def get_contract_version(contract_id: int, version: int, db: AsyncSession = Depends(get_db)):
+    """One earlier version of a contract, with its text and analysis."""
+    saved = await contract_versioning.get(db, contract_id, version)
+    if saved is None:
+        raise HTTPException(status_code=404, detail="Version not found")
     
-    return {"question": question_data.question, "answer": answer}
+    # That version's clauses, located in its text and in its original text
+    clauses = with_original_offsets(parse_key_clauses_blob(saved.key_clauses, saved.contract_text or ""), saved.offset_map)
+    return {
+        "contract_id": contract_id,
+        "version": saved.version,
+        "valid_from": saved.valid_from,
+        "replaced_at": saved.replaced_at,
+        "contract_text": saved.contract_text,
+        "original_text": saved.original_text,
+        "summary": saved.summary,
+        "key_clauses": saved.key_clauses,
+        "clauses": clauses,
+        "risk_level": saved.risk_level,
+        "risk_reason": saved.risk_reason,
+        "contract_value": saved.contract_value,
+        "start_date": saved.start_date,
+        "end_date": saved.end_date,
+        "changes": json.loads(saved.changes) if saved.changes else None,
+    }
 
 
 # ============================================================================
@@ -751,7 +1267,11 @@ async def ask_question(
 # ============================================================================
 
 @app.get("/api/warnings")
-async def get_warnings(db: AsyncSession = Depends(get_db)):
+async def get_warnings(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
     """
     Get all active warnings and alerts.
     
@@ -759,7 +1279,16 @@ async def get_warnings(db: AsyncSession = Depends(get_db)):
     - Contracts expiring soon
     - Expired contracts
     - High-risk contracts
+    
+    Supports conditional GET (the ETag also changes daily, since
+    "days remaining" depends on today's date).
     """
+    headers = await cache_headers(request, "warnings", daily=True)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    response.headers.update(headers)
+    
     warnings = await early_warning_system.get_all_warnings(db)
     stats = early_warning_system.get_dashboard_stats(warnings)
     
@@ -786,7 +1315,11 @@ async def get_contract_warnings(
 # ============================================================================
 
 @app.get("/api/dashboard/stats")
-async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
+async def get_dashboard_stats(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
     """
     Get statistics for the dashboard.
     
@@ -798,42 +1331,36 @@ async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
     - Pending contracts
     - Total contract value
     - Risk distribution
-    """
-    # Total contracts
-    total_result = await db.execute(select(func.count(Contract.id)))
-    total_contracts = total_result.scalar()
     
-    # Active contracts
-    active_result = await db.execute(
-        select(func.count(Contract.id)).where(Contract.status == "active")
-    )
-    active_contracts = active_result.scalar()
+    Supports conditional GET (ETag changes on writes and daily).
+    """
+    headers = await cache_headers(request, "dashboard-stats", daily=True)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    response.headers.update(headers)
     
-    # Expired contracts (by date comparison, not status field)
-    from datetime import datetime
+    return await compute_dashboard_stats(db)
+
+
+async def compute_dashboard_stats(db: AsyncSession) -> dict:
+    """
+    Calculate the dashboard numbers with two queries:
+    one pass of conditional counts, plus the risk distribution.
+    """
+    # Expired contracts are counted by date comparison, not status field
     current_date = datetime.utcnow()
-    expired_result = await db.execute(
-        select(func.count(Contract.id)).where(Contract.end_date < current_date)
-    )
-    expired_contracts = expired_result.scalar()
-    
-    # Renewed contracts
-    renewed_result = await db.execute(
-        select(func.count(Contract.id)).where(Contract.status == "renewed")
-    )
-    renewed_contracts = renewed_result.scalar()
-    
-    # Pending contracts
-    pending_result = await db.execute(
-        select(func.count(Contract.id)).where(Contract.status == "pending")
-    )
-    pending_contracts = pending_result.scalar()
-    
-    # Total value
-    value_result = await db.execute(
-        select(func.sum(Contract.contract_value)).where(Contract.status == "active")
+    counts_result = await db.execute(
+        select(
+            func.count(Contract.id),
+            func.count(case((Contract.status == "active", 1))),
+            func.count(case((Contract.end_date < current_date, 1))),
+            func.count(case((Contract.status == "renewed", 1))),
+            func.count(case((Contract.status == "pending", 1))),
+            func.sum(case((Contract.status == "active", Contract.contract_value))),
+        )
     )
-    total_value = value_result.scalar() or 0
+    total_contracts, active_contracts, expired_contracts, renewed_contracts, pending_contracts, total_value = counts_result.one()
     
     # Risk distribution
     risk_results = await db.execute(
@@ -849,19 +1376,157 @@ async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
         "expired_contracts": expired_contracts,
         "renewed_contracts": renewed_contracts,
         "pending_contracts": pending_contracts,
-        "total_value": float(total_value),
+        "total_value": float(total_value or 0),
         "risk_distribution": risk_distribution
     }
 
 
+# ============================================================================
+# DASHBOARD BOOTSTRAP ENDPOINT
+# ============================================================================
+
+# Columns needed to list contracts (no summary, clauses or full text)
+SLIM_CONTRACT_COLUMNS = (
+    Contract.id, Contract.contract_name, Contract.contract_number,
+    Contract.party_a, Contract.party_b, Contract.start_date, Contract.end_date,
+    Contract.created_at, Contract.status, Contract.contract_value,
+    Contract.currency, Contract.risk_level,
+)
+
+
+@app.get("/api/bootstrap")
+async def get_bootstrap(
+    request: Request,
+    response: Response,
+    warnings_limit: int = 10,
+    contracts_limit: int = 100,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Everything the dashboard needs for its first screen, in one request.
+    
+    Returns:
+    - stats: same numbers as /api/dashboard/stats
+    - warnings: top warnings (most severe first) plus warning counts
+    - risk_counts: contracts per risk level (all statuses)
+    - contracts: first page of contracts with list columns only
+    
+    All parts are read in one session and one transaction, so they agree
+    with each other. Supports conditional GET.
+    """
+    headers = await cache_headers(request, "bootstrap", daily=True)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    response.headers.update(headers)
+    
+    # Postgres: make every query in this transaction see the same snapshot
+    # (SQLite transactions already read from a single snapshot)
+    if engine.dialect.name == "postgresql":
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    
+    stats = await compute_dashboard_stats(db)
+    
+    warnings = await early_warning_system.get_all_warnings(db)
+    warning_stats = early_warning_system.get_dashboard_stats(warnings)
+    contracts_with_warnings = len({w["contract_id"] for w in warnings if w.get("contract_id")})
+    
+    risk_result = await db.execute(
+        select(func.lower(Contract.risk_level), func.count(Contract.id))
+        .group_by(func.lower(Contract.risk_level))
+    )
+    risk_counts = {"low": 0, "medium": 0, "high": 0, "critical": 0}
+    for level, count in risk_result:
+        risk_counts[level or "low"] = risk_counts.get(level or "low", 0) + count
+    
+    contracts_result = await db.execute(
+        select(*SLIM_CONTRACT_COLUMNS)
+        .order_by(Contract.created_at.desc())
+        .limit(max(0, contracts_limit))
+    )
+    contracts = []
+    for row in contracts_result:
+        item = dict(row._mapping)
+        for field in ("start_date", "end_date", "created_at"):
+            if item[field] is not None:
+                item[field] = item[field].isoformat()
+        contracts.append(item)
+    
+    return {
+        "stats": stats,
+        "warnings": {
+            "items": warnings[:max(0, warnings_limit)],
+            "total": len(warnings),
+            "contracts_with_warnings": contracts_with_warnings,
+            "stats": warning_stats
+        },
+        "risk_counts": risk_counts,
+        "contracts": contracts,
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+
+# ============================================================================
+# LIVE EVENTS (Server-Sent Events)
+# ============================================================================
+
+@app.get("/api/events")
+async def stream_events(request: Request):
+    """
+    Stream portfolio changes to the browser as Server-Sent Events.
+    
+    Event types:
+    - contract-created / contract-updated / contract-deleted
+    - warning-changed
+    - upload-stage (progress of uploads in flight)
+    - resync (this client fell behind - reload everything)
+    """
+    subscriber = event_hub.subscribe()
+    
+    async def event_stream():
+        try:
+            # Tell the browser how long to wait before reconnecting
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscriber.queue.get(),
+                        timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if event is None:  # Server shutting down
+                    break
+                yield event_hub.format_sse(event)
+        finally:
+            event_hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+        }
+    )
+
+
 # ============================================================================
 # HEALTH CHECK
 # ============================================================================
 
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
     """
-    Check if the API is running.
+    Liveness check: is the API process up and answering?
+    
+    Always cheap - it never touches the database or the AI.
     """
     return {
         "status": "healthy",
@@ -870,6 +1535,32 @@ async def health_check():
     }
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness check: is contract retrieval warm?
+    
+    Returns 503 while existing contracts are still being loaded into the
+    RAG system after startup, with progress so far.
+    """
+    status = rag_system.warmup_status()
+    return JSONResponse(
+        status_code=200 if rag_system.ready else 503,
+        content={"ready": rag_system.ready, "rag": status, "event_loop": loop_monitor.status()}
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Server metrics in the Prometheus text format.
+    
+    Includes request latency per route, upload stage durations, AI call
+    latency and sizes, retrieval latency, RAG index size and SQL timings.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/debug/rag-status")
 async def check_rag_status(db: AsyncSession = Depends(get_db)):
     """
@@ -896,6 +1587,7 @@ async def check_rag_status(db: AsyncSession = Depends(get_db)):
         "contracts_loaded": rag_count > 0,
         "rag_contract_ids": rag_contract_ids,
         "db_contracts": [{"id": c[0], "number": c[1]} for c in db_contracts],
+        "map_reduce_cache": map_reduce.cache.stats(),
         "status": "OK" if rag_count == db_count else "MISMATCH - Contracts not loaded into RAG!",
         "message": "RAG system is properly loaded" if rag_count == db_count else f"Database has {db_count} contracts but RAG only has {rag_count}. Use /api/debug/reload-rag to fix."
     }
@@ -908,7 +1600,7 @@ async def reload_rag_system(db: AsyncSession = Depends(get_db)):
     Use this if contracts aren't showing up in AI queries.
     """
     try:
-        print("[DEBUG] Starting manual RAG reload...")
+        logger.info("Starting manual RAG reload...")
         
         # Clear existing RAG storage
         rag_system.clear_all()
@@ -917,7 +1609,7 @@ async def reload_rag_system(db: AsyncSession = Depends(get_db)):
         result = await db.execute(select(Contract))
         contracts = result.scalars().all()
         
-        print(f"[DEBUG] Found {len(contracts)} contracts in database")
+        logger.debug(f"Found {len(contracts)} contracts in database")
         
         loaded_count = 0
         failed_count = 0
@@ -931,31 +1623,21 @@ async def reload_rag_system(db: AsyncSession = Depends(get_db)):
                     await rag_system.add_contract_to_vectordb(
                         contract_id=contract.id,
                         contract_text=contract.contract_text,
-                        contract_metadata={
-                            "name": contract.contract_name,
-                            "number": contract.contract_number,
-                            "party_a": contract.party_a,
-                            "party_b": contract.party_b
-                        }
+                        contract_metadata=rag_metadata(contract)
                     )
                     loaded_count += 1
-                    print(f"[DEBUG] Loaded contract {contract.id} from database text: {contract.contract_number}")
+                    logger.debug(f"Loaded contract {contract.id} from database text: {contract.contract_number}")
                 # Fall back to file if contract_text not available
                 elif contract.file_path and os.path.exists(contract.file_path):
                     await rag_system.load_contract_from_file(
                         contract_id=contract.id,
                         file_path=contract.file_path,
-                        contract_metadata={
-                            "name": contract.contract_name,
-                            "number": contract.contract_number,
-                            "party_a": contract.party_a,
-                            "party_b": contract.party_b
-                        }
+                        contract_metadata=rag_metadata(contract)
                     )
                     loaded_count += 1
-                    print(f"[DEBUG] Loaded contract {contract.id} from file: {contract.contract_number}")
+                    logger.debug(f"Loaded contract {contract.id} from file: {contract.contract_number}")
                 else:
-                    print(f"[DEBUG] No text or file found for contract {contract.id}: {contract.contract_number}")
+                    logger.warning(f"No text or file found for contract {contract.id}: {contract.contract_number}")
                     failed_count += 1
                     failed_contracts.append({
                         "id": contract.id,
@@ -964,7 +1646,7 @@ async def reload_rag_system(db: AsyncSession = Depends(get_db)):
                         "path": contract.file_path
                     })
             except Exception as e:
-                print(f"[DEBUG] Failed to load contract {contract.id}: {e}")
+                logger.warning(f"Failed to load contract {contract.id}: {e}")
                 failed_count += 1
                 failed_contracts.append({
                     "id": contract.id,
@@ -973,7 +1655,7 @@ async def reload_rag_system(db: AsyncSession = Depends(get_db)):
                     "path": contract.file_path
                 })
         
-        print(f"[DEBUG] RAG reload complete: {loaded_count} loaded, {failed_count} failed")
+        logger.info(f"RAG reload complete: {loaded_count} loaded, {failed_count} failed")
         
         return {
             "status": "success",
@@ -986,12 +1668,126 @@ async def reload_rag_system(db: AsyncSession = Depends(get_db)):
         }
         
     except Exception as e:
-        print(f"[ERROR] Failed to reload RAG system: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Failed to reload RAG system: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to reload RAG: {str(e)}")
 
 
+# ============================================================================
+# PROFILING ENDPOINTS (admin only)
+# ============================================================================
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Only allow requests that send the ADMIN_TOKEN in an X-Admin-Token header.
+    
+    Without ADMIN_TOKEN configured the profiling endpoints don't exist (404).
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/api/debug/profile/cpu", dependencies=[Depends(require_admin)])
+async def profile_cpu(seconds: float = 10, format: str = "collapsed"):
+    """
+    Profile the server's CPU use for a few seconds while it keeps serving traffic.
+    
+    Formats:
+    - collapsed: sampled call stacks of all threads (drop the file on
+      https://www.speedscope.app for a flame graph). Low overhead.
+    - pstats:    cProfile of the event loop as a .pstats file
+      (`python -m pstats cpu.pstats`). Slows requests down while running.
+    - text:      the same cProfile, as the top functions by cumulative time.
+    """
+    if not 0 < seconds <= profiling.MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {profiling.MAX_PROFILE_SECONDS}")
+    if format not in ("collapsed", "pstats", "text"):
+        raise HTTPException(status_code=400, detail="format must be collapsed, pstats or text")
+    
+    if format == "collapsed":
+        try:
+            # The sampler runs in a worker thread so the event loop stays free
+            result = await asyncio.to_thread(profiling.sampling_profiler.run, seconds)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return Response(
+            content=profiling.SamplingProfiler.collapsed(result["stacks"]),
+            media_type="text/plain",
+            headers={
+                "Content-Disposition": 'attachment; filename="cpu.collapsed.txt"',
+                "X-Profile-Samples": str(result["samples"]),
+            }
+        )
+    
+    try:
+        profiling.event_loop_profiler.enable()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        await asyncio.sleep(seconds)  # Everything the event loop does meanwhile is recorded
+    finally:
+        profile = profiling.event_loop_profiler.disable()
+    
+    if format == "text":
+        return PlainTextResponse(profiling.EventLoopProfiler.to_text(profile))
+    return Response(
+        content=profiling.EventLoopProfiler.to_pstats_bytes(profile),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="cpu.pstats"'}
+    )
+
+
+@app.post("/api/debug/memory/snapshot", dependencies=[Depends(require_admin)])
+async def take_memory_snapshot(top: int = 20, group_by: str = "lineno"):
+    """
+    Take a tracemalloc snapshot (the first call starts tracing).
+    
+    Returns its id and the code lines holding the most traced memory.
+    Compare two snapshots with /api/debug/memory/diff.
+    """
+    if group_by not in ("lineno", "filename"):
+        raise HTTPException(status_code=400, detail="group_by must be lineno or filename")
+    info = await asyncio.to_thread(profiling.memory_snapshots.take)
+    info["top"] = await asyncio.to_thread(profiling.memory_snapshots.top, info["snapshot_id"], top, group_by)
+    return info
+
+
+@app.get("/api/debug/memory/diff", dependencies=[Depends(require_admin)])
+async def diff_memory_snapshots(
+    from_id: int,
+    to_id: Optional[int] = None,
+    top: int = 20,
+    group_by: str = "lineno"
+):
+    """
+    What memory grew between two snapshots.
+    
+    Without to_id a new snapshot is taken now and compared to from_id.
+    """
+    if group_by not in ("lineno", "filename"):
+        raise HTTPException(status_code=400, detail="group_by must be lineno or filename")
+    if to_id is None:
+        to_id = (await asyncio.to_thread(profiling.memory_snapshots.take))["snapshot_id"]
+    try:
+        return await asyncio.to_thread(profiling.memory_snapshots.diff, from_id, to_id, top, group_by)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+@app.post("/api/debug/memory/stop", dependencies=[Depends(require_admin)])
+async def stop_memory_tracing():
+    """Stop tracemalloc (it slows every allocation down) and drop the snapshots."""
+    profiling.memory_snapshots.stop()
+    return {"status": "stopped"}
+
+
+@app.get("/api/debug/memory/rag", dependencies=[Depends(require_admin)])
+async def rag_memory_usage(top: int = 50):
+    """Memory used by each contract in the RAG storage (text, chunks, metadata), largest first."""
+    return await asyncio.to_thread(profiling.rag_storage_usage, rag_system.contracts_storage, top)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,163 @@
+"""
+Map-Reduce Analysis
+Full coverage for contracts too long for one prompt.
+
+The summary, clause, risk and FAQ prompts each have a token budget (see
+src/sections.py). When the sections a task needs don't fit, nothing is cut
+off any more. Instead:
+
+1. Map:    the sections are split into parts that each fit the budget, and
+           every part gets a short "take notes for this task" prompt. The
+           parts run at the same time (still within LLM_MAX_CONCURRENCY).
+2. Reduce: the usual task prompt runs once, on the notes of all parts
+           (trimmed to the task's budget if they don't fit).
+
+Cost: a contract that needs N parts makes N + 1 AI calls per task instead
+of 1, and up to four tasks (summary, clauses, risk, FAQ) can need it - all
+inside the upload request, sharing LLM_MAX_CONCURRENCY. MAP_REDUCE_MAX_PARTS
+caps N per task, so one upload makes at most 4 x (MAP_REDUCE_MAX_PARTS + 1)
+calls plus metadata.
+
+Notes are cached by a hash of (task, part text), so re-analyzing a
+contract - or a new version whose early parts are unchanged - doesn't send
+the same part to the AI twice.
+"""
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+from src.config import settings
+from src.metrics import MAP_REDUCE_PARTS
+from src.sections import SEPARATOR, budget_chars_for, fit_parts
+
+logger = logging.getLogger(__name__)
+
+
+# What to note down from each part, per task
+MAP_INSTRUCTIONS = {
+    "summary": (
+        "Summarize this part: parties, dates, amounts, obligations, deliverables, "
+        "termination and renewal terms, and anything unusual."
+    ),
+    "clauses": (
+        "Note any of these clauses in this part, quoting the key wording: payment terms, "
+        "termination, renewal, liability limitations, confidentiality, dispute resolution, "
+        "penalties/damages. Leave out the ones that are not in this part."
+    ),
+    "risk": (
+        "List the terms in this part that affect risk: contract value and payment amounts, "
+        "penalties and termination fees, liability caps (or unlimited liability), indemnities, "
+        "auto-renewal, insurance, exclusivity, strict deadlines. Quote exact figures."
+    ),
+    "faq": (
+        "Note everything in this part about the parties, key dates, payment, termination "
+        "and renewal. Quote exact dates, amounts and notice periods."
+    ),
+}
+
+
+class PartialResultCache:
+    """Least-recently-used cache of map notes, keyed by a hash of (task, part text)."""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(task: str, part: str) -> str:
+        return hashlib.sha256(f"{task}\0{part}".encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        notes = self.entries.get(key)
+        if notes is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return notes
+    
+    def put(self, key: str, notes: str):
+        self.entries[key] = notes
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+class MapReduceAnalyzer:
+    """Turns a too-long contract into per-part notes for one analysis task."""
+    
+    def __init__(self):
+        self.cache = PartialResultCache(settings.MAP_REDUCE_CACHE_SIZE)
+    
+    async def condense(
+        self,
+        generate: Callable[..., Awaitable],
+        parts: List[str],
+        task: str
+    ) -> str:
+        """
+        The map step: notes for every part, joined for the reduce prompt.
+        
+        Args:
+            generate: The AI call (rag_system._generate)
+            parts: Consecutive parts of the contract (from split_for_task)
+            task: "summary", "clauses", "risk" or "faq"
+        """
+        if len(parts) > settings.MAP_REDUCE_MAX_PARTS:
+            logger.warning(
+                f"Contract needs {len(parts)} parts for '{task}' - only the first "
+                f"{settings.MAP_REDUCE_MAX_PARTS} are analyzed (MAP_REDUCE_MAX_PARTS)"
+            )
+            parts = parts[:settings.MAP_REDUCE_MAX_PARTS]
+        
+        notes = await asyncio.gather(*(
+            self._map_part(generate, part, task, number, len(parts))
+            for number, part in enumerate(parts, 1)
+        ))
+        
+        header = (
+            f"(This contract was too long to send at once. Below are notes taken from "
+            f"each of its {len(parts)} parts, in order. Treat them as the contract text.)"
+        )
+        blocks = [f"[Part {number} of {len(parts)}]\n{part_notes}" for number, part_notes in enumerate(notes, 1)]
+        
+        # The AI doesn't always keep to "at most 200 words": the reduce prompt
+        # gets the same budget as any other, every part keeping a fair share
+        budget_chars = budget_chars_for(task) - len(header) - len(SEPARATOR)
+        if len(SEPARATOR.join(blocks)) > budget_chars:
+            logger.info(f"Notes of {len(parts)} parts trimmed to the '{task}' budget ({budget_chars} characters)")
+            blocks = fit_parts(blocks, budget_chars)
+        return SEPARATOR.join([header] + blocks)
+    
+    async def _map_part(self, generate, part: str, task: str, number: int, total: int) -> str:
+        key = self.cache.key(task, part)
+        notes = self.cache.get(key)
+        if notes is not None:
+            MAP_REDUCE_PARTS.inc(task=task, cache="hit")
+            return notes
+        MAP_REDUCE_PARTS.inc(task=task, cache="miss")
+        
+        prompt = f"""
+        You are a contract excerpt analyst. This is part {number} of {total} of a long contract.
+        {MAP_INSTRUCTIONS[task]}
+        Use short bullet points (at most 200 words). If nothing relevant is in this part, answer "Nothing relevant."
+        
+        Contract part:
+        {part}
+        """
+        response = await generate(prompt, operation=f"{task}.map")
+        notes = response.text.strip()
+        self.cache.put(key, notes)
+        return notes
+
+
+# Create global instance
+map_reduce = MapReduceAnalyzer()
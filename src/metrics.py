@@ -0,0 +1,360 @@
+"""
+Metrics (Prometheus format)
+Counts and times what the server is doing, exposed at /metrics.
+
+Three kinds of metric:
+- Counter:   a number that only goes up (requests served, characters sent to the AI)
+- Gauge:     a number that goes up and down (contracts loaded in memory)
+- Histogram: how long things take, sorted into buckets (0.1s, 0.5s, 1s...)
+
+Everything is kept in memory in this process - no external service or
+library is needed. Prometheus (or a curl) reads /metrics whenever it likes.
+Recording a value is just a dict lookup and an addition, so it is cheap
+enough to do on every request and every database query.
+"""
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.tracing import record_span
+
+
+# Default histogram buckets (seconds) - from a fast DB query to a slow AI call
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Database queries are usually much faster
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Shared plumbing: name, help text, label names and a lock."""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+    
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """A value that only increases."""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}")
+        return lines
+
+
+class Gauge(Metric):
+    """
+    A value that can go up and down.
+    
+    Either set it directly, or give it a function that is called when
+    /metrics is read (handy for "current size of X").
+    """
+    
+    kind = "gauge"
+    
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.function = function
+    
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+    
+    def render(self) -> List[str]:
+        lines = super().render()
+        if self.function is not None:
+            try:
+                lines.append(f"{self.name} {_format_number(self.function())}")
+            except Exception:
+                pass  # A broken gauge must never break /metrics
+            return lines
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    """Records how long something took, counted into buckets."""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+1 for +Inf), sum, count]
+        self.series: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def time(self, **labels) -> "Timer":
+        """Use as `with histogram.time(stage="x"):` to time a block."""
+        return Timer(self, labels)
+    
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Timer:
+    """Context manager that records the elapsed time into a histogram."""
+    
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class StageTimer:
+    """
+    Times consecutive stages of one job (like the steps of an upload).
+    
+    Each lap() records the time since the previous lap into the histogram,
+    and (with a span_prefix) as a "<prefix>.<stage>" span of the current request.
+    """
+    
+    def __init__(self, histogram: Histogram, span_prefix: Optional[str] = None):
+        self.histogram = histogram
+        self.span_prefix = span_prefix
+        self.last = time.perf_counter()
+    
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.histogram.observe(now - self.last, stage=stage)
+        if self.span_prefix:
+            record_span(f"{self.span_prefix}.{stage}", self.last, now)
+        self.last = now
+    
+    def reset(self):
+        """Start the next stage now (time since the last lap is not recorded)."""
+        self.last = time.perf_counter()
+
+
+class MetricsRegistry:
+    """All metrics of this process, in registration order."""
+    
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+    
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, help_text, labels, function))
+    
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+    
+    def render(self) -> str:
+        """Everything, in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Create global instance
+metrics = MetricsRegistry()
+
+
+# ============================================================================
+# METRIC DEFINITIONS
+# ============================================================================
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "Time to serve an HTTP request",
+    labels=("method", "route", "status")
+)
+UPLOAD_STAGE_SECONDS = metrics.histogram(
+    "upload_stage_duration_seconds",
+    "Time spent in each contract upload stage (save, extract, compact, metadata, summary, clauses, risk, faq, db, index)",
+    labels=("stage",)
+)
+LLM_REQUEST_SECONDS = metrics.histogram(
+    "llm_request_duration_seconds", "Time for one AI (Gemini) call, including queueing for a slot",
+    labels=("operation", "outcome")
+)
+LLM_PROMPT_CHARS = metrics.counter(
+    "llm_prompt_characters_total", "Characters sent to the AI", labels=("operation",)
+)
+LLM_RESPONSE_CHARS = metrics.counter(
+    "llm_response_characters_total", "Characters received from the AI", labels=("operation",)
+)
+RETRIEVAL_SECONDS = metrics.histogram(
+    "retrieval_duration_seconds", "Time to find relevant contract chunks for a question",
+    labels=("scope",), buckets=DB_BUCKETS
+)
+DB_QUERY_SECONDS = metrics.histogram(
+    "db_query_duration_seconds", "Time for one SQL statement", labels=("operation",), buckets=DB_BUCKETS
+)
+QUESTIONS_ANSWERED = metrics.counter(
+    "questions_answered_total", "Questions answered, by source (database lookup or AI) and intent",
+    labels=("source", "intent")
+)
+MAP_REDUCE_PARTS = metrics.counter(
+    "map_reduce_parts_total", "Parts of long contracts analyzed separately (cache hit = notes reused)",
+    labels=("task", "cache")
+)
+TEXT_COMPACTION_CHARS = metrics.counter(
+    "text_compaction_characters_total",
+    "Characters of extracted contract text removed by compaction, by reason (\"kept\" = what was left)",
+    labels=("reason",)
+)
+EVENT_LOOP_LAG_SECONDS = metrics.histogram(
+    "event_loop_lag_seconds", "How late the event loop woke up a timer (time other requests had to wait)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+EVENT_LOOP_STALLS = metrics.counter(
+    "event_loop_stalls_total", "Times the event loop was blocked longer than LOOP_BLOCK_THRESHOLD_MS"
+)
+EVENT_LOOP_BLOCKING_CALLS = metrics.counter(
+    "event_loop_blocking_calls_total", "Distinct code sites found doing blocking I/O on the event loop",
+    labels=("kind",)
+)
+
+
+# ============================================================================
+# DATABASE AND HTTP INSTRUMENTATION
+# ============================================================================
+
+def instrument_engine(engine):
+    """Time every SQL statement on an (async) engine via SQLAlchemy events."""
+    from sqlalchemy import event
+    
+    sync_engine = getattr(engine, "sync_engine", engine)
+    
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+    
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("query_start", None)
+        if start is not None:
+            words = statement.split(None, 1)
+            operation = words[0].upper() if words else "OTHER"
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that times every HTTP request.
+    
+    The route label is the route's path template (/api/contracts/{contract_id}),
+    not the real URL, so the number of series stays small.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self._routes: Optional[Dict[int, str]] = None
+    
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._routes is None:
+            routes = {}
+            for route in getattr(scope.get("app"), "routes", []):
+                routes.setdefault(id(getattr(route, "endpoint", None)), route.path)
+            self._routes = routes
+        return self._routes.get(id(endpoint), getattr(endpoint, "__name__", "unknown"))
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope["method"], route=self._route_label(scope), status=status_code
+            )
@@ -0,0 +1,275 @@
+"""
+Profiling Tools
+Look inside the running server when it gets slow or uses too much memory.
+
+Used by the /api/debug/profile/* and /api/debug/memory/* endpoints.
+Nothing here costs anything until an endpoint is called.
+
+CPU:
+- Sampling profiler: a background thread looks at what every thread is
+  doing ~200 times a second and counts the call stacks it sees. The result
+  is in "collapsed stack" format - one line per stack, e.g.
+      MainThread;main.py:ask_question;rag_system.py:search_contracts 42
+  which speedscope.app or flamegraph.pl turn into a flame graph.
+  Very low overhead, and it also sees worker threads (PDF parsing, AI calls).
+- cProfile: exact call counts and times for the event loop thread,
+  returned as a .pstats file (open with `python -m pstats` or snakeviz).
+  Slows the server down noticeably while it runs.
+
+Memory:
+- tracemalloc snapshots: which lines of code allocated the memory that is
+  still in use, and what grew between two snapshots.
+- RAG storage size: how much memory each contract takes in contracts_storage.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+
+# Longest profile an endpoint may request
+MAX_PROFILE_SECONDS = 60
+
+
+# ============================================================================
+# CPU PROFILING
+# ============================================================================
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Counts the call stacks of all threads, sampled at a fixed interval."""
+    
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.lock = threading.Lock()  # One profile at a time
+    
+    def run(self, seconds: float) -> Dict[str, Any]:
+        """
+        Sample for `seconds` (blocking - call it from a worker thread).
+        
+        Returns the collapsed stacks and how many samples were taken.
+        """
+        if not self.lock.acquire(blocking=False):
+            raise RuntimeError("A CPU profile is already running")
+        try:
+            stacks: Counter = Counter()
+            samples = 0
+            own_thread = threading.get_ident()
+            thread_names = {}
+            deadline = time.perf_counter() + seconds
+            
+            while time.perf_counter() < deadline:
+                if len(thread_names) != threading.active_count():
+                    thread_names = {t.ident: t.name for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+                    stacks[";".join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(self.interval)
+            
+            return {"samples": samples, "stacks": stacks}
+        finally:
+            self.lock.release()
+    
+    @staticmethod
+    def collapsed(stacks: Counter) -> str:
+        """The stacks in collapsed format, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class EventLoopProfiler:
+    """
+    cProfile of the event loop thread.
+    
+    enable() must be called from the event loop itself; everything the loop
+    runs until disable() is recorded.
+    """
+    
+    def __init__(self):
+        self.profile: Optional[cProfile.Profile] = None
+    
+    @property
+    def running(self) -> bool:
+        return self.profile is not None
+    
+    def enable(self):
+        if self.running:
+            raise RuntimeError("A cProfile run is already in progress")
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+    
+    def disable(self) -> cProfile.Profile:
+        profile, self.profile = self.profile, None
+        profile.disable()
+        return profile
+    
+    @staticmethod
+    def to_pstats_bytes(profile: cProfile.Profile) -> bytes:
+        """The binary .pstats file (what `python -m pstats` opens)."""
+        fd, path = tempfile.mkstemp(suffix=".pstats")
+        os.close(fd)
+        try:
+            profile.dump_stats(path)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+    
+    @staticmethod
+    def to_text(profile: cProfile.Profile, limit: int = 60) -> str:
+        """Top functions by cumulative time, as a readable table."""
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+
+# ============================================================================
+# MEMORY PROFILING
+# ============================================================================
+
+class MemorySnapshots:
+    """
+    tracemalloc snapshots that can be compared with each other.
+    
+    The first snapshot starts tracemalloc, so it only sees memory allocated
+    from then on - take one, do the suspicious thing, take another, diff.
+    """
+    
+    MAX_SNAPSHOTS = 5  # Snapshots are large; older ones are dropped
+    
+    def __init__(self):
+        self.snapshots: Dict[int, tracemalloc.Snapshot] = {}
+        self.next_id = 1
+    
+    def take(self, frames: int = 10) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        snapshot_id = self.next_id
+        self.next_id += 1
+        self.snapshots[snapshot_id] = snapshot
+        while len(self.snapshots) > self.MAX_SNAPSHOTS:
+            del self.snapshots[min(self.snapshots)]
+        
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "snapshot_id": snapshot_id,
+            "traced_mb": round(current / 1024 / 1024, 2),
+            "peak_traced_mb": round(peak / 1024 / 1024, 2),
+            "tracemalloc_overhead_mb": round(tracemalloc.get_tracemalloc_memory() / 1024 / 1024, 2),
+        }
+    
+    def top(self, snapshot_id: int, limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """The lines (or files) holding the most memory in a snapshot."""
+        stats = self._get(snapshot_id).statistics(group_by)
+        return [
+            {"where": self._where(stat.traceback), "size_kb": round(stat.size / 1024, 1), "blocks": stat.count}
+            for stat in stats[:limit]
+        ]
+    
+    def diff(self, old_id: int, new_id: int, limit: int = 20, group_by: str = "lineno") -> Dict[str, Any]:
+        """What grew (or shrank) between two snapshots, biggest change first."""
+        stats = self._get(new_id).compare_to(self._get(old_id), group_by)
+        return {
+            "from": old_id,
+            "to": new_id,
+            "total_change_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+            "top": [
+                {
+                    "where": self._where(stat.traceback),
+                    "size_kb": round(stat.size / 1024, 1),
+                    "change_kb": round(stat.size_diff / 1024, 1),
+                    "blocks_change": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+    
+    def stop(self):
+        """Stop tracing (it slows allocations down) and forget all snapshots."""
+        self.snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    
+    def _get(self, snapshot_id: int) -> tracemalloc.Snapshot:
+        snapshot = self.snapshots.get(snapshot_id)
+        if snapshot is None:
+            raise KeyError(f"Snapshot {snapshot_id} not found (available: {sorted(self.snapshots)})")
+        return snapshot
+    
+    @staticmethod
+    def _where(traceback: tracemalloc.Traceback) -> str:
+        frame = traceback[0]
+        return f"{frame.filename}:{frame.lineno}"
+
+
+def deep_sizeof(value: Any, seen: Optional[set] = None) -> int:
+    """Memory used by a value and everything inside it (dicts, lists, strings)."""
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in value)
+    return size
+
+
+def rag_storage_usage(contracts_storage: Dict[int, Dict[str, Any]], limit: int = 50) -> Dict[str, Any]:
+    """Memory used per contract in the RAG storage, largest first."""
+    contracts = []
+    for contract_id, data in list(contracts_storage.items()):
+        seen: set = set()
+        text_bytes = deep_sizeof(data.get("text", ""), seen)
+        chunks = data.get("chunks", [])
+        chunk_bytes = deep_sizeof(chunks, seen)
+        metadata_bytes = deep_sizeof(data.get("metadata", {}), seen)
+        contracts.append({
+            "contract_id": contract_id,
+            "number": (data.get("metadata") or {}).get("number"),
+            "text_kb": round(text_bytes / 1024, 1),
+            "chunks": len(chunks),
+            "chunks_kb": round(chunk_bytes / 1024, 1),
+            "metadata_kb": round(metadata_bytes / 1024, 1),
+            "total_kb": round((text_bytes + chunk_bytes + metadata_bytes + sys.getsizeof(data)) / 1024, 1),
+        })
+    contracts.sort(key=lambda c: c["total_kb"], reverse=True)
+    
+    total_kb = sum(c["total_kb"] for c in contracts)
+    return {
+        "contracts": len(contracts),
+        "total_mb": round(total_kb / 1024, 2),
+        "average_kb": round(total_kb / len(contracts), 1) if contracts else 0,
+        "total_chunks": sum(c["chunks"] for c in contracts),
+        "largest": contracts[:limit],
+    }
+
+
+# Create global instances
+sampling_profiler = SamplingProfiler()
+event_loop_profiler = EventLoopProfiler()
+memory_snapshots = MemorySnapshots()
@@ -0,0 +1,271 @@
+"""
+Question Router
+Answers simple, factual questions straight from the database - no AI needed.
+
+"When does CNT-2024-1000 expire?" or "How many contracts expire next
+quarter?" already have exact answers in the contracts table. Looking them
+up takes a few milliseconds; asking Gemini takes seconds (and costs quota).
+
+How it works:
+1. Spot the intent with a few patterns (expiry date, start date, parties,
+   value, status, risk level - or a portfolio count/total). Questions
+   that mention a clause (fees, notice, warranty, termination...) are
+   about the contract text and are never routed
+2. Find the contract: the one selected in the UI, or a contract number
+   mentioned in the question
+3. Answer from SQL
+
+Anything else - or anything that looks like more than a simple lookup
+("...and what are the renewal conditions?") - returns None, and the
+question goes to the normal RAG + Gemini path.
+"""
+
+import calendar
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import Contract
+
+
+# Longer or multi-part questions need the AI
+MAX_ROUTED_WORDS = 14
+FREE_FORM_WORDS = re.compile(r"\b(and|why|explain|summari[sz]e|describe|compare|clause|terms|conditions|should)\b")
+
+# Things like CNT-2024-1000 or MSA_2023_17
+CONTRACT_NUMBER = re.compile(r"\b[A-Z]{2,}[-_][A-Z0-9_-]*\d[A-Z0-9_-]*\b", re.IGNORECASE)
+
+STATUSES = ("active", "expired", "renewed", "pending")
+RISK_LEVELS = ("low", "medium", "high", "critical")
+
+# Questions about a clause ("How much are the late fees?", "When does the
+# notice period end?") are about the contract's TEXT, not its columns
+CLAUSE_NOUNS = re.compile(
+    r"\b(fees?|penalt(y|ies)|late|interest|payments?|invoices?|deposit|notice|warrant(y|ies)|terminat\w*|"
+    r"convenience|breach|shipping|delivery|liabilit(y|ies)|indemn\w*|insurance|damages|renew\w*|"
+    r"period|obligations?|responsibilit(y|ies)|rights?|pays?)\b"
+)
+
+# Per-contract questions: (intent, pattern) - each one names what it asks about
+CONTRACT_INTENTS = [
+    ("end_date", re.compile(r"\b(expire|expires|expiry|expiration|end date)\b|\bwhen (does|will|is) .*\b(end|over|finish)\b")),
+    ("start_date", re.compile(r"\b(start|starts|started|begin|begins|effective date|commence)\b")),
+    ("party_b", re.compile(r"\b(who is|name of) (the )?(party b|vendor|supplier|provider|other party)\b")),
+    ("party_a", re.compile(r"\b(who is|name of) (the )?(party a|client|customer)\b")),
+    ("parties", re.compile(r"\bwho (are|were) the parties\b|\b(parties|party) (to|of|in)\b|\bwho (is|was) .* (with|between)\b|\bwho signed\b")),
+    ("value", re.compile(r"\b(contract|total) value\b|\bvalue of (it|this|the)\b|\bworth\b")),
+    ("risk_level", re.compile(r"\brisk (level|rating|score)\b|\bhow risky\b")),
+    ("status", re.compile(r"\bstatus\b|\bis .* (active|expired)\b")),
+]
+
+
+@dataclass
+class RoutedAnswer:
+    """An answer found in the database."""
+    answer: str
+    intent: str
+    contract_id: Optional[int] = None
+
+
+def _format_date(value: datetime) -> str:
+    return value.strftime("%B %d, %Y")
+
+
+def _format_money(amount: Optional[float], currency: Optional[str]) -> str:
+    if amount is None:
+        return "not recorded"
+    return f"{amount:,.2f} {currency or 'USD'}"
+
+
+def _counted(count: int, described: List[str]) -> str:
+    """ "1 active contract", "3 active contracts" """
+    noun = "contract" if count == 1 else "contracts"
+    return " ".join([str(count)] + described + [noun])
+
+
+def _is_simple(question: str) -> bool:
+    return len(question.split()) <= MAX_ROUTED_WORDS and not FREE_FORM_WORDS.search(question)
+
+
+# ============================================================================
+# DATE WINDOWS ("next quarter", "in the next 30 days"...)
+# ============================================================================
+
+def _month_window(year: int, month: int, months: int) -> Tuple[datetime, datetime]:
+    """From the 1st of year/month, `months` whole months long (end is exclusive)."""
+    start = datetime(year, month, 1)
+    end_month = month - 1 + months
+    end = datetime(year + end_month // 12, end_month % 12 + 1, 1)
+    return start, end
+
+
+def parse_time_window(question: str, now: datetime) -> Optional[Tuple[datetime, datetime, str]]:
+    """Find a period in the question. Returns (start, end exclusive, description)."""
+    today = datetime(now.year, now.month, now.day)
+    
+    match = re.search(r"\b(?:next|within|in the next|in)\s+(\d+)\s+(day|week|month)s?\b", question)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        days = amount * {"day": 1, "week": 7, "month": 30}[unit]
+        return today, today + timedelta(days=days + 1), f"in the next {amount} {unit}{'s' if amount != 1 else ''}"
+    
+    match = re.search(r"\b(this|next|last)\s+(month|quarter|year)\b", question)
+    if match:
+        which, unit = match.groups()
+        offset = {"this": 0, "next": 1, "last": -1}[which]
+        if unit == "month":
+            index = now.year * 12 + now.month - 1 + offset
+            start, end = _month_window(index // 12, index % 12 + 1, 1)
+            label = f"in {calendar.month_name[start.month]} {start.year}"
+        elif unit == "quarter":
+            index = now.year * 4 + (now.month - 1) // 3 + offset
+            start, end = _month_window(index // 4, (index % 4) * 3 + 1, 3)
+            label = f"in Q{index % 4 + 1} {start.year}"
+        else:
+            start, end = datetime(now.year + offset, 1, 1), datetime(now.year + offset + 1, 1, 1)
+            label = f"in {start.year}"
+        return start, end, label
+    
+    match = re.search(r"\bin (20\d\d)\b", question)
+    if match:
+        year = int(match.group(1))
+        return datetime(year, 1, 1), datetime(year + 1, 1, 1), f"in {year}"
+    return None
+
+
+# ============================================================================
+# ROUTER
+# ============================================================================
+
+class QuestionRouter:
+    """Decides whether a question can be answered from the database, and answers it."""
+    
+    async def route(
+        self,
+        db: AsyncSession,
+        question: str,
+        contract_id: Optional[int] = None,
+        now: Optional[datetime] = None
+    ) -> Optional[RoutedAnswer]:
+        """The database answer, or None if the question needs the AI."""
+        text = question.strip().lower()
+        if not text or not _is_simple(text):
+            return None
+        # Clause words make it a question about contract text - but "renewed"
+        # is also a status ("How many renewed contracts are there?")
+        without_statuses = re.sub(rf"\b({'|'.join(STATUSES)})\b", " ", text)
+        if CLAUSE_NOUNS.search(without_statuses):
+            return None
+        now = now or datetime.now()
+        
+        # "How many contracts..." is about the portfolio, even with a contract selected
+        if re.search(r"\bcontracts\b|\bportfolio\b", text):
+            return await self._answer_about_portfolio(db, text, now)
+        
+        contract = await self._find_contract(db, question, contract_id)
+        if contract is not None:
+            return self._answer_about_contract(text, contract, now)
+        return None
+    
+    async def _find_contract(self, db: AsyncSession, question: str, contract_id: Optional[int]):
+        if contract_id is not None:
+            return await db.get(Contract, contract_id)
+        for number in CONTRACT_NUMBER.findall(question):
+            # Exact values (not upper(...)) so the contract_number index is used
+            result = await db.execute(select(Contract).where(Contract.contract_number.in_({number, number.upper()})))
+            contract = result.scalar_one_or_none()
+            if contract is not None:
+                return contract
+        return None
+    
+    # ---- one contract -------------------------------------------------------
+    
+    def _answer_about_contract(self, text: str, contract: Contract, now: datetime) -> Optional[RoutedAnswer]:
+        name = f"{contract.contract_name} ({contract.contract_number})"
+        for intent, pattern in CONTRACT_INTENTS:
+            if not pattern.search(text):
+                continue
+            
+            if intent == "end_date":
+                days = (contract.end_date - now).days
+                when = f"in {days} days" if days >= 0 else f"{-days} days ago"
+                verb = "expires" if days >= 0 else "expired"
+                answer = f"{name} {verb} on {_format_date(contract.end_date)} ({when})."
+            elif intent == "start_date":
+                answer = f"{name} started on {_format_date(contract.start_date)}."
+            elif intent == "party_b":
+                answer = f"Party B of {name} is {contract.party_b or 'not recorded'}."
+            elif intent == "party_a":
+                answer = f"Party A of {name} is {contract.party_a or 'not recorded'}."
+            elif intent == "parties":
+                answer = (f"The parties to {name} are {contract.party_a or 'unknown'} (Party A) "
+                          f"and {contract.party_b or 'unknown'} (Party B).")
+            elif intent == "value":
+                answer = f"The total value of {name} is {_format_money(contract.contract_value, contract.currency)}."
+            elif intent == "risk_level":
+                answer = f"{name} is rated {(contract.risk_level or 'unknown').upper()} risk."
+                if contract.risk_reason:
+                    answer += f" Reason: {contract.risk_reason}"
+            else:
+                answer = f"{name} is {contract.status}."
+            return RoutedAnswer(answer=answer, intent=intent, contract_id=contract.id)
+        return None
+    
+    # ---- the whole portfolio ------------------------------------------------
+    
+    async def _answer_about_portfolio(self, db: AsyncSession, text: str, now: datetime) -> Optional[RoutedAnswer]:
+        conditions, described = [], []
+        for status in STATUSES:
+            if re.search(rf"\b{status}\b", text):
+                conditions.append(Contract.status == status)
+                described.append(status)
+        for level in RISK_LEVELS:
+            if re.search(rf"\b{level}[- ]risk\b", text):
+                conditions.append(Contract.risk_level == level)
+                described.append(f"{level}-risk")
+        label = " ".join(described + ["contracts"])
+        
+        if re.search(r"\bhow many\b|\bnumber of\b|\bcount\b", text):
+            window = parse_time_window(text, now)
+            expiring = re.search(r"\b(expire|expires|expiring|end|ends|ending|due)\b", text)
+            if expiring and window:
+                start, end, period = window
+                conditions += [Contract.end_date >= start, Contract.end_date < end]
+                result = await db.execute(
+                    select(Contract.contract_number, Contract.end_date)
+                    .where(*conditions).order_by(Contract.end_date)
+                )
+                rows = result.all()
+                verb = "expires" if len(rows) == 1 else "expire"
+                answer = f"{_counted(len(rows), described)} {verb} {period}."
+                if rows:
+                    listed = ", ".join(f"{number} ({_format_date(end_date)})" for number, end_date in rows[:10])
+                    more = f" and {len(rows) - 10} more" if len(rows) > 10 else ""
+                    answer += f" {listed}{more}."
+                return RoutedAnswer(answer=answer, intent="count_expiring")
+            if expiring:
+                return None  # "How many contracts expire?" without a period - let the AI ask back
+            
+            count = (await db.execute(select(func.count(Contract.id)).where(*conditions))).scalar() or 0
+            verb = "is" if count == 1 else "are"
+            return RoutedAnswer(answer=f"There {verb} {_counted(count, described)}.", intent="count")
+        
+        if re.search(r"\b(total|combined|sum|overall)\b.*\bvalue\b|\bvalue of (all|our|the)\b", text):
+            result = await db.execute(
+                select(Contract.currency, func.sum(Contract.contract_value), func.count(Contract.id))
+                .where(*conditions).group_by(Contract.currency)
+            )
+            totals = [(currency, total, count) for currency, total, count in result.all() if total]
+            if not totals:
+                return RoutedAnswer(answer=f"No contract values are recorded for {label}.", intent="total_value")
+            parts = [f"{_format_money(total, currency)} across {count} contracts" for currency, total, count in totals]
+            return RoutedAnswer(answer=f"The total value of {label} is " + "; ".join(parts) + ".", intent="total_value")
+        return None
+
+
+# Create global instance
+question_router = QuestionRouter()
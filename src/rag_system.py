@@ -9,14 +9,39 @@ What is RAG?
 - The AI generates answers based on actual contract content
 """
 
-import google.generativeai as genai
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
+import heapq
+import logging
 import os
+import time
 from datetime import datetime
+from itertools import islice
 from src.config import settings
+from src.tracing import span, record_span
+from src.llm_backends import create_backend
+from src.filter_index import ContractFilterIndex
+from src.context_packer import context_packer, estimate_tokens, Passage
+from src.sections import select_for_task, split_for_task
+from src.map_reduce import map_reduce
+from src.metrics import (
+    metrics, LLM_REQUEST_SECONDS, LLM_PROMPT_CHARS, LLM_RESPONSE_CHARS, RETRIEVAL_SECONDS
+)
 
-# Initialize Google Gemini
-genai.configure(api_key=settings.GEMINI_API_KEY)
+logger = logging.getLogger(__name__)
+
+# Contracts are split into chunks of CHUNK_SIZE characters, each starting
+# CHUNK_SIZE - CHUNK_OVERLAP characters after the previous one
+CHUNK_SIZE = 3000
+CHUNK_OVERLAP = 500
+
+# What the AI (or the metadata fallback) writes when a field isn't known
+MISSING_VALUES = {"", "unknown", "none", "null", "n/a", "not specified"}
+
+
+def is_missing(value: Any) -> bool:
+    """True for None and placeholder values like "Unknown"."""
+    return value is None or str(value).strip().lower() in MISSING_VALUES
 
 
 class ContractRAGSystem:
@@ -31,11 +56,99 @@ class ContractRAGSystem:
         # Create uploads directory if it doesn't exist
         os.makedirs(settings.UPLOAD_DIRECTORY, exist_ok=True)
         
-        # Initialize Google Gemini model (using gemini-2.5-flash, the latest stable model)
-        self.model = genai.GenerativeModel('models/gemini-2.5-flash')
+        # The AI backend (Gemini, or the offline fake - see LLM_BACKEND).
+        # Anything with generate_content(prompt) -> .text can be assigned here.
+        # The Gemini client itself is only created on the first AI call.
+        self.model = create_backend()
         
         # Simple in-memory storage for contracts (replaces ChromaDB temporarily)
         self.contracts_storage = {}
+        
+        # Status / risk / party / date / value lookup tables for filtered questions
+        self.filter_index = ContractFilterIndex()
+        
+        # Cap on simultaneous Gemini calls (protects rate limits during bulk work)
+        self.llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        
+        # Warm-up progress (contracts are loaded in the background after startup)
+        self.ready = False
+        self.warmup = {
+            "state": "pending",      # pending -> loading -> ready (or failed)
+            "loaded": 0,
+            "total": 0,
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+    
+    def start_warmup(self, total: int):
+        """Record that background loading has started."""
+        self.ready = False
+        self.warmup.update(
+            state="loading", loaded=0, total=total,
+            started_at=time.time(), finished_at=None, error=None
+        )
+    
+    def finish_warmup(self, error: Optional[str] = None):
+        """Record that background loading finished (successfully or not)."""
+        self.warmup.update(state="failed" if error else "ready", finished_at=time.time(), error=error)
+        self.ready = error is None
+    
+    def warmup_status(self) -> Dict[str, Any]:
+        """Progress report for the readiness endpoint."""
+        status = dict(self.warmup)
+        if status["started_at"]:
+            end = status["finished_at"] or time.time()
+            status["elapsed_seconds"] = round(end - status["started_at"], 2)
+        status["contracts_in_memory"] = len(self.contracts_storage)
+        return status
+    
+    async def _generate(self, prompt: str, operation: str = "generate"):
+        """
+        Call Gemini without blocking the event loop.
+        
+        generate_content() is a blocking network call, so it runs in a worker
+        thread. The semaphore keeps at most LLM_MAX_CONCURRENCY calls in flight.
+        
+        Args:
+            prompt: The prompt text
+            operation: What the call is for (summary, clauses...) - used in /metrics
+        """
+        LLM_PROMPT_CHARS.inc(len(prompt), operation=operation)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with span("llm.wait"):
+                await self.llm_semaphore.acquire()
+            try:
+                with span(f"llm.{operation}"):
+                    response = await asyncio.to_thread(self.model.generate_content, prompt)
+            finally:
+                self.llm_semaphore.release()
+            outcome = "ok"
+        finally:
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, operation=operation, outcome=outcome)
+        
+        try:
+            LLM_RESPONSE_CHARS.inc(len(response.text), operation=operation)
+        except Exception:
+            pass  # Blocked/empty responses have no .text - the caller deals with that
+        return response
+    
+    async def _text_for_task(self, contract_text: str, task: str) -> str:
+        """
+        The contract text to put in one analysis prompt.
+        
+        Normally the sections the task needs (src/sections.py). If those don't
+        fit the task's token budget, the parts are analyzed separately first
+        and the prompt gets their notes instead (src/map_reduce.py).
+        """
+        if settings.MAP_REDUCE_ENABLED:
+            parts = split_for_task(contract_text, task)
+            if len(parts) > 1:
+                with span(f"map_reduce.{task}"):
+                    return await map_reduce.condense(self._generate, parts, task)
+        return select_for_task(contract_text, task)
     
     def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
         """
@@ -82,7 +195,7 @@ class ContractRAGSystem:
             contract_metadata: Additional info (name, parties, dates, etc.)
         """
         # Chunk the contract text for better retrieval
-        chunks = self.chunk_text(contract_text, chunk_size=3000, overlap=500)
+        chunks = self.chunk_text(contract_text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
         
         # Store contract with chunks
         self.contracts_storage[contract_id] = {
@@ -90,8 +203,21 @@ class ContractRAGSystem:
             "chunks": chunks,
             "metadata": contract_metadata
         }
+        self.filter_index.add(contract_id, contract_metadata)
         
-        print(f"[INFO] Added contract ID {contract_id} to RAG storage. Total contracts: {len(self.contracts_storage)}")
+        logger.debug(f"Added contract ID {contract_id} to RAG storage. Total contracts: {len(self.contracts_storage)}")
+    
+    def update_contract_metadata(self, contract_id: int, contract_metadata: Dict[str, Any]):
+        """Refresh a loaded contract's metadata (and filters) after it was edited."""
+        contract_data = self.contracts_storage.get(contract_id)
+        if contract_data is not None:
+            contract_data["metadata"] = contract_metadata
+            self.filter_index.add(contract_id, contract_metadata)
+    
+    def remove_contract(self, contract_id: int):
+        """Forget a deleted contract."""
+        self.contracts_storage.pop(contract_id, None)
+        self.filter_index.remove(contract_id)
     
     async def load_contract_from_file(
         self,
@@ -111,7 +237,7 @@ class ContractRAGSystem:
         try:
             # Check if file exists
             if not os.path.exists(file_path):
-                print(f"[WARNING] Contract file not found: {file_path}")
+                logger.warning(f"Contract file not found: {file_path}")
                 return
             
             # Read contract text based on file type
@@ -128,7 +254,7 @@ class ContractRAGSystem:
                     for page in reader.pages:
                         contract_text += page.extract_text()
                 except Exception as e:
-                    print(f"[ERROR] Failed to read PDF {file_path}: {e}")
+                    logger.error(f"Failed to read PDF {file_path}: {e}")
                     return
             
             # Add to RAG system if we got content
@@ -138,18 +264,19 @@ class ContractRAGSystem:
                     contract_text=contract_text,
                     contract_metadata=contract_metadata
                 )
-                print(f"[INFO] Loaded contract {contract_metadata.get('number', contract_id)} into RAG system")
+                logger.debug(f"Loaded contract {contract_metadata.get('number', contract_id)} into RAG system")
             else:
-                print(f"[WARNING] Contract file is empty or too short: {file_path}")
+                logger.warning(f"Contract file is empty or too short: {file_path}")
                 
         except Exception as e:
-            print(f"[ERROR] Failed to load contract {contract_id}: {e}")
+            logger.error(f"Failed to load contract {contract_id}: {e}")
     
     def search_contracts(
         self,
         query: str,
         n_results: int = 5,
-        contract_id: int = None
+        contract_id: int = None,
+        filters: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Search across contracts using enhanced keyword matching on chunks.
@@ -159,11 +286,86 @@ class ContractRAGSystem:
             query: Search question
             n_results: Number of results to return
             contract_id: Optional - search only in specific contract
+            filters: Optional - only search contracts matching these filters
+                     (status, risk_level, party, date and value ranges - see
+                     ContractFilterIndex.match)
         
         Returns:
-            Dictionary with relevant text chunks
+            Dictionary with relevant text chunks, the ids of the contracts
+            they came from, and "passages": where each chunk is in its
+            contract's text (for the context packer)
         """
         documents = []
+        contract_ids = []
+        passages = []
+        keywords, expanded_keywords = self._query_keywords(query)
+        
+        if contract_id and contract_id in self.contracts_storage:
+            # Search specific contract chunks
+            contract_data = self.contracts_storage[contract_id]
+            chunks = contract_data.get("chunks", [contract_data["text"]])
+            
+            # Score chunks and get top chunks
+            ranked = self._rank_chunk_indices(chunks, keywords, expanded_keywords)[:n_results]
+            
+            # If no keyword matches, return first few chunks (likely contains intro/key info)
+            if not ranked:
+                ranked = [(0, idx) for idx in range(min(3, len(chunks)))]
+            documents = [chunks[idx] for _, idx in ranked]
+            passages = [self._passage(contract_id, chunks, idx, score) for score, idx in ranked]
+            contract_ids = [contract_id]
+        
+        elif not contract_id:
+            matching_ids = self.filter_index.match(filters) if filters else None
+            
+            if matching_ids is None:
+                # Search all contracts: first chunk of the first few contracts
+                # (islice stops early instead of copying the whole storage)
+                for cid, data in islice(self.contracts_storage.items(), n_results):
+                    chunks = data.get("chunks", [data["text"][:CHUNK_SIZE]])
+                    # Get first chunk of each contract
+                    if chunks:
+                        documents.append(chunks[0])
+                        contract_ids.append(cid)
+                        passages.append(self._passage(cid, chunks, 0, 0))
+            else:
+                # Filtered: every matching contract is scored by its best chunk,
+                # and the most relevant ones win. Finding the matches is a few set
+                # lookups; scoring is capped so a broad filter ("all active
+                # contracts") stays cheap - the newest matches are scored first.
+                candidates = heapq.nlargest(settings.RAG_FILTERED_MAX_CANDIDATES, matching_ids)
+                best_chunks = []
+                for cid in candidates:
+                    data = self.contracts_storage.get(cid)
+                    if data is None:
+                        continue
+                    chunks = data.get("chunks", [data["text"][:CHUNK_SIZE]])
+                    if not chunks:
+                        continue
+                    ranked = self._rank_chunk_indices(chunks, keywords, expanded_keywords)
+                    score, best = ranked[0] if ranked else (0, 0)
+                    best_chunks.append((score, cid, chunks, best))
+                
+                # Highest score first; equal scores keep the newest contract first
+                for score, cid, chunks, best in heapq.nlargest(n_results, best_chunks, key=lambda item: (item[0], item[1])):
+                    documents.append(chunks[best])
+                    contract_ids.append(cid)
+                    passages.append(self._passage(cid, chunks, best, score))
+        
+        return {
+            "documents": [documents] if documents else [[]],
+            "contract_ids": contract_ids,
+            "passages": passages
+        }
+    
+    @staticmethod
+    def _passage(contract_id: int, chunks: List[str], idx: int, score: float) -> Passage:
+        """Where chunk number idx sits in the contract text."""
+        start = idx * (CHUNK_SIZE - CHUNK_OVERLAP)
+        return Passage(source=contract_id, start=start, end=start + len(chunks[idx]), score=score)
+    
+    def _query_keywords(self, query: str):
+        """Keywords of a question, plus related words (e.g. "payment" -> fee, invoice...)."""
         query_lower = query.lower()
         
         # Enhanced keyword extraction with semantic mappings
@@ -191,49 +393,31 @@ class ContractRAGSystem:
                     expanded_keywords.update(values)
         
         # Convert back to list
-        expanded_keywords = list(expanded_keywords)
-        
-        if contract_id and contract_id in self.contracts_storage:
-            # Search specific contract chunks
-            contract_data = self.contracts_storage[contract_id]
-            chunks = contract_data.get("chunks", [contract_data["text"]])
+        return keywords, list(expanded_keywords)
+    
+    def _rank_chunk_indices(self, chunks: List[str], keywords: List[str], expanded_keywords: List[str]):
+        """(score, chunk index) of the chunks that match the keywords, best first."""
+        chunk_scores = []
+        for idx, chunk in enumerate(chunks):
+            chunk_lower = chunk.lower()
             
-            # Score chunks based on keyword matches with expanded keywords
-            chunk_scores = []
-            for idx, chunk in enumerate(chunks):
-                chunk_lower = chunk.lower()
-                
-                # Calculate score with original keywords (higher weight)
-                original_score = sum(chunk_lower.count(keyword) * 3 for keyword in keywords)
-                
-                # Calculate score with expanded keywords (lower weight)
-                expanded_score = sum(chunk_lower.count(keyword) for keyword in expanded_keywords)
-                
-                # Bonus for chunks at the beginning (often contain key info)
-                position_bonus = max(0, 10 - idx)
-                
-                total_score = original_score + expanded_score + position_bonus
-                
-                if total_score > 0:
-                    chunk_scores.append((total_score, chunk))
+            # Calculate score with original keywords (higher weight)
+            original_score = sum(chunk_lower.count(keyword) * 3 for keyword in keywords)
             
-            # Sort by score and get top chunks
-            chunk_scores.sort(reverse=True, key=lambda x: x[0])
-            documents = [chunk for score, chunk in chunk_scores[:n_results]]
+            # Calculate score with expanded keywords (lower weight)
+            expanded_score = sum(chunk_lower.count(keyword) for keyword in expanded_keywords)
             
-            # If no keyword matches, return first few chunks (likely contains intro/key info)
-            if not documents:
-                documents = chunks[:min(3, len(chunks))]
-                
-        elif not contract_id:
-            # Search all contracts
-            for cid, data in list(self.contracts_storage.items())[:n_results]:
-                chunks = data.get("chunks", [data["text"][:3000]])
-                # Get first chunk of each contract
-                if chunks:
-                    documents.append(chunks[0])
-        
-        return {"documents": [documents] if documents else [[]]}
+            # Bonus for chunks at the beginning (often contain key info)
+            position_bonus = max(0, 10 - idx)
+            
+            total_score = original_score + expanded_score + position_bonus
+            
+            if total_score > 0:
+                chunk_scores.append((total_score, idx))
+        
+        # Sort by score (stable, so equal scores keep their order)
+        chunk_scores.sort(reverse=True, key=lambda x: x[0])
+        return chunk_scores
     
     async def generate_contract_summary(self, contract_text: str) -> str:
         """
@@ -245,10 +429,8 @@ class ContractRAGSystem:
         Returns:
             AI-generated summary
         """
-        # Truncate if too long (Gemini has token limits)
-        max_chars = 30000
-        if len(contract_text) > max_chars:
-            contract_text = contract_text[:max_chars] + "..."
+        # Every section, fitted into the summary's token budget (Gemini has token limits)
+        contract_text = await self._text_for_task(contract_text, "summary")
         
         prompt = f"""
         You are a legal contract analyst. Analyze the following contract and provide a structured summary with MAIN SECTIONS and SUB-SECTIONS.
@@ -321,7 +503,7 @@ class ContractRAGSystem:
         Structured Summary (with main sections and subsections):
         """
         
-        response = self.model.generate_content(prompt)
+        response = await self._generate(prompt, operation="summary")
         return response.text
     
     async def extract_key_clauses(self, contract_text: str) -> Dict[str, str]:
@@ -334,9 +516,8 @@ class ContractRAGSystem:
         Returns:
             Dictionary of clause types and their content
         """
-        max_chars = 30000
-        if len(contract_text) > max_chars:
-            contract_text = contract_text[:max_chars] + "..."
+        # Only the sections that hold these clauses (payment, termination...)
+        contract_text = await self._text_for_task(contract_text, "clauses")
         
         prompt = f"""
         You are a legal contract analyst. Extract and identify the following key clauses from this contract.
@@ -360,7 +541,7 @@ class ContractRAGSystem:
         ... etc
         """
         
-        response = self.model.generate_content(prompt)
+        response = await self._generate(prompt, operation="clauses")
         return {"extracted_clauses": response.text}
     
     async def extract_contract_metadata(self, contract_text: str) -> Dict[str, Any]:
@@ -369,9 +550,8 @@ class ContractRAGSystem:
         
         Extracts: contract name, number, parties, dates, value, etc.
         """
-        max_chars = 15000  # Use first part of contract
-        if len(contract_text) > max_chars:
-            contract_text = contract_text[:max_chars]
+        # Opening, parties, term, payment and signature sections
+        contract_text = select_for_task(contract_text, "metadata")
         
         prompt = f"""
         You are a contract metadata extractor. Analyze this contract and extract key information.
@@ -394,11 +574,12 @@ class ContractRAGSystem:
         {contract_text}
         """
         
+        result_text = ""
         try:
-            response = self.model.generate_content(prompt)
+            response = await self._generate(prompt, operation="metadata")
             result_text = response.text.strip()
             
-            print(f"[DEBUG] AI Response (first 300 chars): {result_text[:300]}")
+            logger.debug(f"AI Response (first 300 chars): {result_text[:300]}")
             
             # Extract JSON from response (handle various formats)
             import json
@@ -407,12 +588,12 @@ class ContractRAGSystem:
             # Strategy 1: Remove markdown code blocks if present
             if "```json" in result_text:
                 result_text = result_text.split("```json")[1].split("```")[0].strip()
-                print("[DEBUG] Extracted from ```json block")
+                logger.debug("Extracted from ```json block")
             elif "```" in result_text:
                 parts = result_text.split("```")
                 if len(parts) >= 3:
                     result_text = parts[1].strip()
-                    print("[DEBUG] Extracted from ``` block")
+                    logger.debug("Extracted from ``` block")
             
             # Strategy 2: Find JSON by looking for outermost braces
             # This handles nested objects properly
@@ -432,12 +613,12 @@ class ContractRAGSystem:
                 
                 if brace_end != -1:
                     result_text = result_text[brace_start:brace_end]
-                    print(f"[DEBUG] Extracted JSON by brace matching: {len(result_text)} chars")
+                    logger.debug(f"Extracted JSON by brace matching: {len(result_text)} chars")
             
             # Clean up the text
             result_text = result_text.strip()
             
-            print(f"[DEBUG] Final JSON to parse (first 200 chars): {result_text[:200]}")
+            logger.debug(f"Final JSON to parse (first 200 chars): {result_text[:200]}")
             
             # Parse JSON
             metadata = json.loads(result_text)
@@ -451,21 +632,8 @@ class ContractRAGSystem:
             return metadata
             
         except Exception as e:
-            print(f"[ERROR] Error extracting metadata: {e}")
-            print(f"[ERROR] Full AI Response:")
-            print("="*80)
-            if 'response' in locals():
-                print(response.text)
-            else:
-                print("No response received")
-            print("="*80)
-            print(f"[ERROR] Text we tried to parse:")
-            print("="*80)
-            if 'result_text' in locals():
-                print(result_text)
-            else:
-                print("No result_text")
-            print("="*80)
+            # Only a short preview of the AI output goes in the log (full responses can be huge)
+            logger.error(f"Error extracting metadata: {e}", extra={"parse_preview": result_text[:200]})
             
             # Return defaults
             return {
@@ -476,7 +644,8 @@ class ContractRAGSystem:
                 "start_date": None,
                 "end_date": None,
                 "contract_value": None,
-                "currency": "USD"
+                "currency": "USD",
+                "extraction_failed": True  # Placeholders - callers must not treat these as real values
             }
     
     async def assess_risk_level(self, contract_text: str) -> Dict[str, Any]:
@@ -485,9 +654,8 @@ class ContractRAGSystem:
         
         Returns risk level and identified risks.
         """
-        max_chars = 30000
-        if len(contract_text) > max_chars:
-            contract_text = contract_text[:max_chars] + "..."
+        # Financial and liability sections (payment, penalties, insurance...)
+        contract_text = await self._text_for_task(contract_text, "risk")
         
         prompt = f"""
         You are a risk assessment specialist for legal contracts.
@@ -595,9 +763,12 @@ class ContractRAGSystem:
         Risk Assessment:
         """
         
-        response = self.model.generate_content(prompt)
-        risk_text = response.text
-        
+        response = await self._generate(prompt, operation="risk")
+        return self.parse_risk_assessment(response.text)
+    
+    @staticmethod
+    def parse_risk_assessment(risk_text: str) -> Dict[str, Any]:
+        """Turn a "RISK LEVEL: ... PRIMARY REASON: ..." answer into risk_level/risk_reason/risk_analysis."""
         # Parse risk level from response
         risk_level_lower = risk_text.lower()
         if "critical" in risk_level_lower:
@@ -626,13 +797,110 @@ class ContractRAGSystem:
         return {
             "risk_level": risk_level,
             "risk_reason": risk_reason,
-            "risk_analysis": response.text
+            "risk_analysis": risk_text
         }
     
+    async def revise_analysis(self, task: str, previous: str, changes: str) -> str:
+        """
+        Update an earlier analysis for an amended contract, from its changed sections only.
+        
+        Args:
+            task: "summary" or "risk"
+            previous: The analysis of the previous version
+            changes: The changed sections, old and new wording (sections.describe_changes)
+        
+        Returns:
+            The updated analysis, in the same format as the original prompt's
+        """
+        if task == "risk":
+            instructions = """Re-assess the risk. Keep the previous level unless the changes move the contract value,
+        penalties, termination fees, liability caps or compliance duties into another band
+        (value: LOW under $25,000, MEDIUM $25,000-$100,000, HIGH $100,000-$500,000, CRITICAL over $500,000).
+        
+        Provide your response in this EXACT format:
+        
+        RISK LEVEL: [LOW/MEDIUM/HIGH/CRITICAL]
+        
+        PRIMARY REASON: [One sentence: mention base financial risk + any escalators that increased it]
+        
+        KEY RISKS:
+        - [Risk 1]
+        - [Risk 2]
+        - [Risk 3]"""
+        else:
+            instructions = """Rewrite the summary so it describes the amended contract. Change only what the
+        changed sections affect, and keep the same headings, formatting and bold values."""
+        
+        prompt = f"""
+        You are a contract amendment reviewer. A contract was amended; only the sections
+        below changed, everything else is the same as before.
+        {instructions}
+        
+        Previous {task} analysis:
+        {previous}
+        
+        Changed sections:
+        {changes}
+        
+        Updated {task} analysis:
+        """
+        response = await self._generate(prompt, operation=f"{task}.revise")
+        return response.text
+    
+    async def generate_faq_answers(self, contract_text: str, questions: Dict[str, str]) -> Dict[str, str]:
+        """
+        Answer a set of common questions about one contract in a single AI call.
+        
+        Args:
+            contract_text: Full contract text
+            questions: topic key -> canonical question (see src/faq.py)
+        
+        Returns:
+            topic key -> answer (topics the AI skipped are left out)
+        """
+        if not questions:
+            return {}
+        
+        contract_text = await self._text_for_task(contract_text, "faq")
+        
+        question_lines = "\n".join(f"        - {key}: {question}" for key, question in questions.items())
+        prompt = f"""
+        You are a contract FAQ writer. Answer each question below using ONLY the contract text.
+        Keep each answer short (1-4 sentences or a few bullet points) and quote exact
+        dates, amounts and notice periods. If the contract does not say, answer
+        "Not specified in the contract."
+        
+        Questions (key: question):
+{question_lines}
+        
+        Return ONLY a valid JSON object mapping each key to its answer, e.g. {{"{next(iter(questions))}": "..."}}
+        
+        Contract Text:
+        {contract_text}
+        """
+        
+        response = await self._generate(prompt, operation="faq")
+        result_text = response.text.strip()
+        
+        # Remove markdown code blocks and anything around the JSON object
+        if "```" in result_text:
+            parts = result_text.split("```")
+            if len(parts) >= 3:
+                result_text = parts[1].removeprefix("json").strip()
+        brace_start, brace_end = result_text.find("{"), result_text.rfind("}")
+        if brace_start != -1 and brace_end > brace_start:
+            result_text = result_text[brace_start:brace_end + 1]
+        
+        import json
+        answers = json.loads(result_text)
+        return {key: str(answers[key]).strip() for key in questions if answers.get(key)}
+    
     async def answer_question(
         self,
         question: str,
-        contract_id: int = None
+        contract_id: int = None,
+        filters: Optional[Dict[str, Any]] = None,
+        excerpts: Optional[List[str]] = None
     ) -> str:
         """
         Answer questions about contracts using RAG.
@@ -645,25 +913,43 @@ class ContractRAGSystem:
         Args:
             question: User's question
             contract_id: Optional - limit to specific contract
+            filters: Optional - limit to contracts matching these filters
+            excerpts: Optional - answer from these texts instead of searching
+                      (e.g. the stored clauses of one type)
         
         Returns:
             AI-generated answer based on contract content
         """
-        # Step 1: Retrieve relevant chunks
-        search_results = self.search_contracts(
-            query=question,
-            n_results=5,
-            contract_id=contract_id
-        )
-        
-        # Extract the relevant text chunks
-        relevant_chunks = search_results.get('documents', [[]])[0]
-        
+        # Step 1: Retrieve relevant chunks (as passages: where they are in which text)
+        if excerpts is not None:
+            scope = "clauses"
+            relevant_chunks = excerpts
+            texts = dict(enumerate(excerpts))
+            passages = [Passage(i, 0, len(excerpt), score=len(excerpts) - i) for i, excerpt in enumerate(excerpts)]
+        else:
+            scope = "contract" if contract_id else ("filtered" if filters else "portfolio")
+            with RETRIEVAL_SECONDS.time(scope=scope), span("retrieval"):
+                search_results = self.search_contracts(
+                    query=question,
+                    n_results=settings.RAG_CANDIDATE_CHUNKS,
+                    contract_id=contract_id,
+                    filters=filters
+                )
+            
+            # Extract the relevant text chunks
+            relevant_chunks = search_results.get('documents', [[]])[0]
+            passages = search_results.get("passages", [])
+            texts = {cid: self.contracts_storage[cid]["text"] for cid in search_results.get("contract_ids", [])}
+        
+        if not relevant_chunks and scope == "clauses":
+            return "None of the selected contracts has a clause of this type."
+        if not relevant_chunks and scope == "filtered":
+            return "No contracts match the selected filters."
         if not relevant_chunks:
             return "I couldn't find relevant information in the contracts to answer this question."
         
-        # Combine chunks for context
-        context = "\n\n---\n\n".join(relevant_chunks)
+        # Prompt building (incl. context packing) is timed as the "prompt" span
+        prompt_start = time.perf_counter()
         
         # Detect question type for better prompting
         question_lower = question.lower()
@@ -705,28 +991,40 @@ class ContractRAGSystem:
             """
         
         # Step 2 & 3: Generate answer using context
-        prompt = f"""
-        You are a helpful contract management assistant with expertise in contract analysis.
-        
-        Based on the following contract excerpts, please answer the user's question accurately and comprehensively.
-        {special_instructions}
-        
-        IMPORTANT GUIDELINES:
-        - Extract ALL relevant information from the provided excerpts
-        - Use bullet points for clarity when listing multiple items
-        - Quote exact text from the contract when appropriate
-        - If the information is not in the provided context, say so clearly
-        - Be specific and precise with dates, amounts, and names
-        
-        Contract Excerpts:
-        {context}
-        
-        User Question: {question}
+        def build_prompt(context: str) -> str:
+            return f"""
+            You are a helpful contract management assistant with expertise in contract analysis.
+            
+            Based on the following contract excerpts, please answer the user's question accurately and comprehensively.
+            {special_instructions}
+            
+            IMPORTANT GUIDELINES:
+            - Extract ALL relevant information from the provided excerpts
+            - Use bullet points for clarity when listing multiple items
+            - Quote exact text from the contract when appropriate
+            - If the information is not in the provided context, say so clearly
+            - Be specific and precise with dates, amounts, and names
+            
+            Contract Excerpts:
+            {context}
+            
+            User Question: {question}
+            
+            Answer (be thorough and extract all relevant information):
+            """
         
-        Answer (be thorough and extract all relevant information):
-        """
+        # Fill what's left of the token budget after the fixed instructions
+        # with the best passages (overlaps removed, neighbours joined)
+        budget = settings.RAG_CONTEXT_TOKEN_BUDGET - estimate_tokens(build_prompt(""))
+        packed = context_packer.pack(passages, texts, budget_tokens=max(budget, 0))
+        prompt = build_prompt(packed.text)
+        logger.debug(
+            f"Packed {len(packed.spans)} spans ({packed.tokens} tokens, {packed.dropped} passages dropped) "
+            f"from {len(passages)} passages"
+        )
+        record_span("prompt", prompt_start, time.perf_counter())
         
-        response = self.model.generate_content(prompt)
+        response = await self._generate(prompt, operation="answer")
         return response.text
     
     def clear_all(self):
@@ -735,8 +1033,19 @@ class ContractRAGSystem:
         Used when resetting the database.
         """
         self.contracts_storage.clear()
-        print(f"[INFO] Cleared all contracts from RAG storage")
+        self.filter_index.clear()
+        logger.info("Cleared all contracts from RAG storage")
 
 
 # Create a global instance
 rag_system = ContractRAGSystem()
+
+# Size of the in-memory retrieval index (read whenever /metrics is scraped)
+metrics.gauge(
+    "rag_index_contracts", "Contracts loaded into the RAG system",
+    function=lambda: len(rag_system.contracts_storage)
+)
+metrics.gauge(
+    "rag_index_chunks", "Text chunks held by the RAG system",
+    function=lambda: sum(len(data.get("chunks", ())) for data in list(rag_system.contracts_storage.values()))
+)
@@ -6,8 +6,8 @@ Think of these as "data contracts" - they validate data going in and out.
 """
 
 from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, date
+from typing import Optional, List
 
 
 class ContractCreate(BaseModel):
@@ -58,12 +58,50 @@ class ContractResponse(BaseModel):
     file_type: Optional[str]
     summary: Optional[str]
     key_clauses: Optional[str]
+    version: Optional[int] = 1  # Goes up with each amended version uploaded
     
     class Config:
         from_attributes = True  # Allows Pydantic to work with SQLAlchemy models
 
 
+class ContractFilters(BaseModel):
+    """Which contracts a question is about (all filters must match)."""
+    status: Optional[List[str]] = Field(None, description="Any of these statuses, e.g. [\"active\"]")
+    risk_level: Optional[List[str]] = Field(None, description="Any of these risk levels, e.g. [\"high\", \"critical\"]")
+    party: Optional[str] = Field(None, description="Part of a party name (case-insensitive)")
+    start_date_from: Optional[date] = Field(None, description="Started on or after")
+    start_date_to: Optional[date] = Field(None, description="Started on or before")
+    end_date_from: Optional[date] = Field(None, description="Ends on or after")
+    end_date_to: Optional[date] = Field(None, description="Ends on or before")
+    min_value: Optional[float] = Field(None, description="Contract value at least")
+    max_value: Optional[float] = Field(None, description="Contract value at most")
+
+
 class QuestionRequest(BaseModel):
     """Schema for asking questions about contracts."""
     question: str = Field(..., description="The question to ask")
     contract_id: Optional[int] = Field(None, description="Optional: limit to specific contract")
+    filters: Optional[ContractFilters] = Field(None, description="Optional: limit to contracts matching these filters")
+    clause_type: Optional[str] = Field(None, description="Optional: answer from one kind of clause only, e.g. \"liability\"")
+
+
+class ContractSearchHit(BaseModel):
+    """One full-text search result."""
+    contract_id: int
+    contract_number: Optional[str]
+    contract_name: Optional[str]
+    party_a: Optional[str]
+    party_b: Optional[str]
+    status: Optional[str]
+    risk_level: Optional[str]
+    score: float = Field(..., description="Relevance score (higher is better)")
+    snippet: Optional[str] = Field(None, description="Matching excerpt with <mark> highlights")
+
+
+class ContractSearchResponse(BaseModel):
+    """Schema for full-text search responses."""
+    query: str
+    backend: Optional[str] = Field(None, description="fts5, tsvector or like")
+    total: int
+    took_ms: float
+    hits: List[ContractSearchHit]
@@ -0,0 +1,285 @@
+"""
+Full-Text Search Index
+Fast keyword search over contract contents - no AI call needed.
+
+How it works:
+- SQLite: an FTS5 virtual table mirrors contract_text, summary and key_clauses.
+  Triggers on the contracts table keep it in sync on every insert/update/delete.
+- Postgres: a generated tsvector column with a GIN index does the same job,
+  and Postgres keeps it up to date automatically.
+- Anything else (or SQLite built without FTS5): a slower LIKE-based fallback.
+
+Results are ranked (BM25 / ts_rank) and come with a highlighted snippet.
+Snippets are HTML: the contract text is escaped, and only the <mark> tags
+around matching words are markup.
+"""
+
+import html
+import logging
+import re
+from typing import List, Dict, Any
+from sqlalchemy import text, select, or_
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from src.database import Contract
+
+logger = logging.getLogger(__name__)
+
+
+# Markers placed around matching words in snippets
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+
+# The database marks matches with these control characters (they never occur in
+# contract text); the snippet is HTML-escaped before they become <mark> tags
+MATCH_OPEN = "\x02"
+MATCH_CLOSE = "\x03"
+
+
+def snippet_html(raw: str) -> str:
+    """Escape a snippet's text and turn the match markers into <mark> tags."""
+    return html.escape(raw or "").replace(MATCH_OPEN, HIGHLIGHT_OPEN).replace(MATCH_CLOSE, HIGHLIGHT_CLOSE)
+
+
+class ContractSearchIndex:
+    """
+    Maintains the full-text index and runs ranked searches against it.
+    """
+    
+    def __init__(self):
+        """Backend is detected when setup() runs at startup."""
+        self.backend = None  # "fts5", "tsvector" or "like"
+    
+    async def setup(self, engine: AsyncEngine):
+        """
+        Create the index structures if they don't exist yet.
+        Safe to call on every startup.
+        """
+        dialect = engine.dialect.name
+        
+        if dialect == "sqlite":
+            try:
+                await self._setup_fts5(engine)
+                self.backend = "fts5"
+            except Exception as e:
+                logger.warning(f"FTS5 not available, using LIKE search fallback: {e}")
+                self.backend = "like"
+        elif dialect == "postgresql":
+            try:
+                await self._setup_tsvector(engine)
+                self.backend = "tsvector"
+            except Exception as e:
+                logger.warning(f"Could not create tsvector index, using LIKE search fallback: {e}")
+                self.backend = "like"
+        else:
+            self.backend = "like"
+        
+        logger.info(f"Full-text search backend: {self.backend}")
+    
+    async def _setup_fts5(self, engine: AsyncEngine):
+        """Create the FTS5 table and sync triggers (SQLite)."""
+        async with engine.begin() as conn:
+            existing = await conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'contracts_fts'"
+            ))
+            is_new = existing.scalar() is None
+            
+            # External-content table: the text lives in "contracts", FTS5 only stores the index
+            await conn.execute(text("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS contracts_fts USING fts5(
+                    contract_text, summary, key_clauses,
+                    content='contracts', content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            """))
+            await conn.execute(text("""
+                CREATE TRIGGER IF NOT EXISTS contracts_fts_insert AFTER INSERT ON contracts BEGIN
+                    INSERT INTO contracts_fts(rowid, contract_text, summary, key_clauses)
+                    VALUES (new.id, new.contract_text, new.summary, new.key_clauses);
+                END
+            """))
+            await conn.execute(text("""
+                CREATE TRIGGER IF NOT EXISTS contracts_fts_delete AFTER DELETE ON contracts BEGIN
+                    INSERT INTO contracts_fts(contracts_fts, rowid, contract_text, summary, key_clauses)
+                    VALUES ('delete', old.id, old.contract_text, old.summary, old.key_clauses);
+                END
+            """))
+            await conn.execute(text("""
+                CREATE TRIGGER IF NOT EXISTS contracts_fts_update
+                AFTER UPDATE OF contract_text, summary, key_clauses ON contracts BEGIN
+                    INSERT INTO contracts_fts(contracts_fts, rowid, contract_text, summary, key_clauses)
+                    VALUES ('delete', old.id, old.contract_text, old.summary, old.key_clauses);
+                    INSERT INTO contracts_fts(rowid, contract_text, summary, key_clauses)
+                    VALUES (new.id, new.contract_text, new.summary, new.key_clauses);
+                END
+            """))
+            
+            # First time: index the contracts that already exist
+            if is_new:
+                await conn.execute(text("INSERT INTO contracts_fts(contracts_fts) VALUES ('rebuild')"))
+                logger.info("Built FTS5 index for existing contracts")
+    
+    async def _setup_tsvector(self, engine: AsyncEngine):
+        """Create the generated tsvector column and GIN index (Postgres)."""
+        async with engine.begin() as conn:
+            # Weights: summary (A) > key clauses (B) > full text (C)
+            await conn.execute(text("""
+                ALTER TABLE contracts ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english', coalesce(summary, '')), 'A') ||
+                    setweight(to_tsvector('english', coalesce(key_clauses, '')), 'B') ||
+                    setweight(to_tsvector('english', coalesce(contract_text, '')), 'C')
+                ) STORED
+            """))
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_contracts_search_vector ON contracts USING GIN (search_vector)"
+            ))
+    
+    @staticmethod
+    def _to_fts5_query(query: str) -> str:
+        """
+        Turn free text into a safe FTS5 query.
+        Every word is quoted (so FTS5 operators in user input can't break the query)
+        and the last word is a prefix match, so "termin" finds "termination".
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return ""
+        terms = [f'"{word}"' for word in words[:-1]]
+        terms.append(f'"{words[-1]}"*')
+        return " ".join(terms)
+    
+    async def search(
+        self,
+        db: AsyncSession,
+        query: str,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a ranked full-text search.
+        
+        Args:
+            db: Database session
+            query: Words to search for
+            limit: Maximum number of hits
+        
+        Returns:
+            List of hits (best first) with contract info, score and snippet
+        """
+        if not query or not query.strip():
+            return []
+        
+        if self.backend == "fts5":
+            return await self._search_fts5(db, query, limit)
+        if self.backend == "tsvector":
+            return await self._search_tsvector(db, query, limit)
+        return await self._search_like(db, query, limit)
+    
+    async def _search_fts5(self, db: AsyncSession, query: str, limit: int) -> List[Dict[str, Any]]:
+        fts_query = self._to_fts5_query(query)
+        if not fts_query:
+            return []
+        
+        # bm25() weights follow the column order: contract_text, summary, key_clauses
+        # (lower bm25 = better match)
+        result = await db.execute(text("""
+            SELECT c.id, c.contract_number, c.contract_name, c.party_a, c.party_b,
+                   c.status, c.risk_level,
+                   bm25(contracts_fts, 1.0, 2.0, 1.5) AS rank,
+                   snippet(contracts_fts, -1, :open, :close, '…', 24) AS snippet
+            FROM contracts_fts
+            JOIN contracts c ON c.id = contracts_fts.rowid
+            WHERE contracts_fts MATCH :query
+            ORDER BY rank
+            LIMIT :limit
+        """), {"query": fts_query, "open": MATCH_OPEN, "close": MATCH_CLOSE, "limit": limit})
+        
+        return [self._hit(row, score=-row.rank) for row in result]
+    
+    async def _search_tsvector(self, db: AsyncSession, query: str, limit: int) -> List[Dict[str, Any]]:
+        # Rank first, then build headlines only for the rows we return (ts_headline is costly)
+        result = await db.execute(text("""
+            SELECT hits.*,
+                   ts_headline('english', coalesce(hits.body, ''), hits.q,
+                               'StartSel=' || :open || ', StopSel=' || :close || ', MaxWords=35, MinWords=15')
+                       AS snippet
+            FROM (
+                SELECT c.id, c.contract_number, c.contract_name, c.party_a, c.party_b,
+                       c.status, c.risk_level,
+                       coalesce(c.summary, '') || ' ' || coalesce(c.contract_text, '') AS body,
+                       q, ts_rank_cd(c.search_vector, q) AS rank
+                FROM contracts c, websearch_to_tsquery('english', :query) AS q
+                WHERE c.search_vector @@ q
+                ORDER BY rank DESC
+                LIMIT :limit
+            ) AS hits
+            ORDER BY hits.rank DESC
+        """), {"query": query, "open": MATCH_OPEN, "close": MATCH_CLOSE, "limit": limit})
+        
+        return [self._hit(row, score=row.rank) for row in result]
+    
+    async def _search_like(self, db: AsyncSession, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Fallback: substring match, scored by number of occurrences."""
+        words = [word.lower() for word in re.findall(r"\w+", query)]
+        if not words:
+            return []
+        
+        columns = (Contract.contract_text, Contract.summary, Contract.key_clauses)
+        conditions = [column.ilike(f"%{word}%") for word in words for column in columns]
+        result = await db.execute(select(Contract).where(or_(*conditions)))
+        
+        hits = []
+        for contract in result.scalars().all():
+            body = " ".join(filter(None, [contract.summary, contract.key_clauses, contract.contract_text]))
+            body_lower = body.lower()
+            score = sum(body_lower.count(word) for word in words)
+            hit = {
+                "contract_id": contract.id,
+                "contract_number": contract.contract_number,
+                "contract_name": contract.contract_name,
+                "party_a": contract.party_a,
+                "party_b": contract.party_b,
+                "status": contract.status,
+                "risk_level": contract.risk_level,
+                "score": float(score),
+                "snippet": self._make_snippet(body, words),
+            }
+            hits.append(hit)
+        
+        hits.sort(key=lambda h: h["score"], reverse=True)
+        return hits[:limit]
+    
+    @staticmethod
+    def _make_snippet(body: str, words: List[str], width: int = 200) -> str:
+        """Cut a window around the first match and highlight the search words."""
+        body_lower = body.lower()
+        positions = [body_lower.find(word) for word in words if word in body_lower]
+        start = max(0, min(positions) - width // 2) if positions else 0
+        snippet = body[start:start + width].replace(MATCH_OPEN, "").replace(MATCH_CLOSE, "")
+        for word in words:
+            snippet = re.sub(
+                f"({re.escape(word)})",
+                f"{MATCH_OPEN}\\1{MATCH_CLOSE}",
+                snippet,
+                flags=re.IGNORECASE
+            )
+        prefix = "…" if start > 0 else ""
+        suffix = "…" if start + width < len(body) else ""
+        return snippet_html(f"{prefix}{snippet}{suffix}")
+    
+    @staticmethod
+    def _hit(row, score: float) -> Dict[str, Any]:
+        return {
+            "contract_id": row.id,
+            "contract_number": row.contract_number,
+            "contract_name": row.contract_name,
+            "party_a": row.party_a,
+            "party_b": row.party_b,
+            "status": row.status,
+            "risk_level": row.risk_level,
+            "score": float(score),
+            "snippet": snippet_html(row.snippet),
+        }
+
+
+# Create global instance
+contract_search_index = ContractSearchIndex()
@@ -0,0 +1,373 @@
+"""
+Contract Sections
+Splits a contract into its sections, so each AI analysis gets the parts it
+needs instead of "the first 30,000 characters".
+
+Contracts are organized under headings:
+    
+    2. PAYMENT TERMS
+    ARTICLE 7 - LIABILITY AND INDEMNIFICATION
+    SIGNATURES:
+
+Cutting the text at a fixed length wastes tokens on boilerplate at the
+start and silently drops everything after the cut in long contracts. With
+the sections known, each task picks by heading:
+
+- metadata: parties, term, payment and signature sections
+- clauses:  payment, termination, renewal, liability, confidentiality...
+- risk:     financial and liability sections (payment, penalties, insurance...)
+- faq:      parties, term, payment, termination and renewal
+- summary:  every section
+
+The opening section (title, parties, dates) is always included. The
+selection must fit the task's token budget (ANALYSIS_TOKEN_BUDGETS); if it
+doesn't, every selected section gets a fair share and is cut at a
+sentence end. Text without recognizable headings
+falls back to its beginning, cut to the budget.
+
+diff_sections() compares two versions of a contract section by section, so
+an amendment only needs the changed sections analyzed (src/versioning.py).
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from src.config import settings
+from src.context_packer import trim_to_sentence
+
+
+@dataclass
+class Section:
+    """One section of a contract: text[start:end], starting with its heading."""
+    title: str
+    start: int
+    end: int
+
+
+# "2. PAYMENT TERMS", "2) Payment Terms", "ARTICLE 7 - LIABILITY", "Section IV: Term"
+# (a bare number needs its "." or ")" - "123 Business Street" is an address)
+NUMBERED_HEADING = re.compile(
+    r"^[ \t]{0,3}(?:(?:ARTICLE|Article|SECTION|Section)\s+(?:\d{1,3}|[IVXLC]{1,6})[.):]?|(?:\d{1,2}|[IVXLC]{1,6})[.)])"
+    r"[ \t]*(?:[-:][ \t]*)?(?P<title>[A-Z][^\n]{2,80}?)[ \t]*:?[ \t]*$",
+    re.MULTILINE
+)
+# "SIGNATURES:", "TERMS AND CONDITIONS:" (capitals only, nothing after the colon)
+CAPITALS_HEADING = re.compile(r"^[ \t]{0,3}(?P<title>[A-Z][A-Z &/,-]{3,60}):?[ \t]*$", re.MULTILINE)
+
+PREAMBLE = "PREAMBLE"
+
+# Which section headings each analysis task needs (None = all sections)
+TASK_SECTIONS: Dict[str, Optional[re.Pattern]] = {
+    "metadata": re.compile(r"part(y|ies)|\bterm\b|duration|payment|compensation|fees?\b|price|value|signature"),
+    "clauses": re.compile(
+        r"payment|compensation|fees?\b|terminat|renew|liabilit|indemn|confiden|non-disclosure"
+        r"|dispute|arbitration|governing law|penalt|damages|service level"
+    ),
+    "risk": re.compile(
+        r"payment|compensation|fees?\b|price|terminat|renew|liabilit|indemn|penalt|damages"
+        r"|insurance|warrant|service level|compliance|intellectual property|exclusiv|non-compet"
+    ),
+    "faq": re.compile(r"part(y|ies)|\bterm\b|duration|payment|compensation|fees?\b|terminat|renew"),
+    "summary": None,
+}
+
+# Longest heading-less stretch we still call a heading (avoids treating sentences as headings)
+MAX_TITLE_WORDS = 10
+
+SEPARATOR = "\n\n"
+OMITTED = " [...]"
+
+# Below this many characters per section, fewer sections are sent instead
+MIN_SECTION_CHARS = 300
+
+
+def _is_heading_title(title: str) -> bool:
+    words = title.split()
+    if not words or len(words) > MAX_TITLE_WORDS or title.rstrip().endswith((".", ",", ";")):
+        return False
+    letters = [c for c in title if c.isalpha()]
+    if letters and all(c.isupper() for c in letters):
+        return True
+    # Title Case: every longer word capitalized ("Payment Terms and Conditions")
+    return all(word[0].isupper() for word in words if len(word) > 3 and word[0].isalpha())
+
+
+def segment(text: str) -> List[Section]:
+    """
+    The sections of a contract, in order.
+    
+    Text before the first heading becomes the PREAMBLE section. A contract
+    without recognizable headings is a single PREAMBLE.
+    """
+    headings = {}
+    for pattern in (NUMBERED_HEADING, CAPITALS_HEADING):
+        for match in pattern.finditer(text):
+            title = match.group("title").strip()
+            if _is_heading_title(title):
+                headings.setdefault(match.start(), title)
+    
+    sections = []
+    starts = sorted(headings)
+    if not starts or starts[0] > 0:
+        sections.append(Section(PREAMBLE, 0, starts[0] if starts else len(text)))
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        sections.append(Section(headings[start], start, end))
+    return [section for section in sections if text[section.start:section.end].strip()]
+
+
+def task_budgets() -> Dict[str, int]:
+    """Token budget per task, from ANALYSIS_TOKEN_BUDGETS ("metadata=3750,summary=7500,...")."""
+    budgets = {}
+    for item in settings.ANALYSIS_TOKEN_BUDGETS.split(","):
+        name, _, value = item.partition("=")
+        if value.strip().isdigit():
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+def budget_chars_for(task: str, budget_tokens: Optional[int] = None) -> int:
+    """A task's token budget in characters."""
+    budget_tokens = budget_tokens or task_budgets().get(task) or 7500
+    return int(budget_tokens * settings.CHARS_PER_TOKEN)
+
+
+def task_sections(text: str, task: str) -> List[Section]:
+    """The sections one analysis task needs, in document order."""
+    selected = segment(text)
+    pattern = TASK_SECTIONS.get(task)
+    if pattern is not None and len(selected) > 1:
+        # The opening section (title, parties, dates) is always kept
+        relevant = [s for s in selected[1:] if pattern.search(s.title.lower())]
+        if relevant:  # If no heading looks relevant, don't guess - keep them all
+            selected = selected[:1] + relevant
+    return selected
+
+
+def split_for_task(text: str, task: str, budget_tokens: Optional[int] = None) -> List[str]:
+    """
+    The sections a task needs, as consecutive parts that each fit its budget.
+    
+    One part means everything fits in a single prompt. Sections are kept
+    whole where possible; a section longer than the budget is split at
+    sentence ends.
+    """
+    budget_chars = budget_chars_for(task, budget_tokens)
+    pieces = []
+    for section in task_sections(text, task) or [Section(PREAMBLE, 0, len(text))]:
+        remaining = text[section.start:section.end].strip()
+        while len(remaining) > budget_chars:
+            piece = trim_to_sentence(remaining, budget_chars)
+            pieces.append(piece)
+            remaining = remaining[len(piece):].strip()
+        if remaining:
+            pieces.append(remaining)
+    
+    parts, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(SEPARATOR) + len(piece) > budget_chars:
+            parts.append(current)
+            current = piece
+        else:
+            current = current + SEPARATOR + piece if current else piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def select_for_task(text: str, task: str, budget_tokens: Optional[int] = None) -> str:
+    """
+    The parts of a contract that one analysis task needs, within its token budget.
+    
+    Args:
+        text: Full contract text
+        task: "metadata", "summary", "clauses", "risk" or "faq"
+        budget_tokens: Override the task's budget from ANALYSIS_TOKEN_BUDGETS
+    """
+    budget_chars = budget_chars_for(task, budget_tokens)
+    selected = task_sections(text, task)
+    
+    if len(selected) <= 1:
+        # No structure to work with: the beginning of the text, as before
+        return text if len(text) <= budget_chars else trim_to_sentence(text, budget_chars) + OMITTED
+    
+    # Too many sections to give each a useful share: send the first ones,
+    # and name the rest so the AI knows they exist
+    skipped_note = ""
+    max_sections = max(budget_chars // MIN_SECTION_CHARS, 2)
+    if len(selected) > max_sections:
+        skipped = selected[max_sections:]
+        selected = selected[:max_sections]
+        titles = ", ".join(s.title for s in skipped[:30]) + (", ..." if len(skipped) > 30 else "")
+        skipped_note = f"[Sections not included: {titles}]"
+        budget_chars -= len(skipped_note) + len(SEPARATOR)
+    
+    packed = fit_parts([text[s.start:s.end].strip() for s in selected], budget_chars)
+    return SEPARATOR.join(packed + ([skipped_note] if skipped_note else []))
+
+
+def fit_parts(parts: List[str], budget_chars: int) -> List[str]:
+    """
+    Trim parts so that, joined with blank lines, they fit in budget_chars.
+    
+    Every part gets its fair share (_fair_shares); parts that had to be
+    cut end in " [...]".
+    """
+    shares = _fair_shares([len(part) for part in parts], budget_chars - len(SEPARATOR) * (len(parts) - 1))
+    return [
+        part if len(part) <= share else trim_to_sentence(part, share) + OMITTED
+        for part, share in zip(parts, shares)
+        if share > 0
+    ]
+
+
+def _fair_shares(lengths: List[int], budget: int) -> List[int]:
+    """
+    Split a character budget between sections: short sections get all they
+    need, and what's left is divided evenly between the long ones.
+    """
+    shares = [0] * len(lengths)
+    remaining = max(budget, 0)
+    pending = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    while pending:
+        share = remaining // len(pending)
+        index = pending[0]
+        if lengths[index] <= share:
+            shares[index] = lengths[index]
+            remaining -= lengths[index]
+            pending.pop(0)
+        else:
+            for index in pending:
+                shares[index] = share
+            break
+    return shares
+
+
+# ============================================================================
+# SECTION DIFF (contract versions)
+# ============================================================================
+
+# "2. Payment Terms" and "3) PAYMENT TERMS" are the same section, renumbered
+TITLE_NUMBERING = re.compile(r"^(?:(?:article|section)\s+)?(?:\d{1,3}|[ivxlc]{1,6})?[.):]?\s*(?:[-:]\s*)?", re.IGNORECASE)
+
+
+@dataclass
+class SectionDiff:
+    """How the sections of a new contract version differ from the old one (titles)."""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    # Where each section is: title -> (start, end) in the old / new text
+    old_spans: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    new_spans: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    # The opening section of either version (always part of every task's input)
+    opening: List[str] = field(default_factory=list)
+    
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+    
+    def touched(self) -> List[str]:
+        """Every section title that was added, removed or changed."""
+        return self.changed + self.added + self.removed
+    
+    def affects(self, task: str) -> bool:
+        """Does the change touch any section this analysis task reads?"""
+        pattern = TASK_SECTIONS.get(task)
+        return any(
+            pattern is None or title in self.opening or pattern.search(title.lower())
+            for title in self.touched()
+        )
+    
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {"added": self.added, "removed": self.removed, "changed": self.changed, "unchanged": self.unchanged}
+
+
+def _section_key(title: str) -> str:
+    return " ".join(re.findall(r"\w+", TITLE_NUMBERING.sub("", title).lower())) or title.lower()
+
+
+def _section_body(text: str, section: Section) -> str:
+    """The section without its heading line, whitespace collapsed (so renumbering or re-wrapping isn't a change)."""
+    body = text[section.start:section.end]
+    if section.title != PREAMBLE:
+        body = body.split("\n", 1)[1] if "\n" in body else ""
+    return " ".join(body.split())
+
+
+def _keyed_sections(text: str) -> Dict[str, Section]:
+    keyed = {}
+    for section in segment(text):
+        key = _section_key(section.title)
+        # A repeated title ("NOTICES" twice) gets a counter: "notices#2"
+        count = 1
+        while (key if count == 1 else f"{key}#{count}") in keyed:
+            count += 1
+        keyed[key if count == 1 else f"{key}#{count}"] = section
+    return keyed
+
+
+def diff_sections(old_text: str, new_text: str) -> SectionDiff:
+    """
+    Compare two versions of a contract section by section.
+    
+    Sections are matched by heading (ignoring numbering), and a section is
+    "changed" if its wording differs (ignoring whitespace). Titles in the
+    result are the new version's headings (the old one's for removed sections).
+    """
+    old_sections, new_sections = _keyed_sections(old_text), _keyed_sections(new_text)
+    diff = SectionDiff()
+    for key, section in new_sections.items():
+        diff.new_spans[section.title] = (section.start, section.end)
+        old = old_sections.get(key)
+        if old is None:
+            diff.added.append(section.title)
+        else:
+            diff.old_spans[section.title] = (old.start, old.end)
+            same = _section_body(old_text, old) == _section_body(new_text, section)
+            (diff.unchanged if same else diff.changed).append(section.title)
+    for key, section in old_sections.items():
+        if key not in new_sections:
+            diff.removed.append(section.title)
+            diff.old_spans[section.title] = (section.start, section.end)
+    diff.opening = [sections[0].title for sections in (segment(old_text), segment(new_text)) if sections]
+    return diff
+
+
+def describe_changes(diff: SectionDiff, old_text: str, new_text: str, task: str, budget_tokens: Optional[int] = None) -> str:
+    """
+    The changed sections a task reads, old and new wording, for an update prompt.
+    
+    Fitted into the task's token budget like select_for_task().
+    """
+    pattern = TASK_SECTIONS.get(task)
+    blocks = []
+    for title in diff.touched():
+        if pattern is not None and title not in diff.opening and not pattern.search(title.lower()):
+            continue
+        old = old_text[slice(*diff.old_spans[title])].strip() if title in diff.old_spans else ""
+        new = new_text[slice(*diff.new_spans[title])].strip() if title in diff.new_spans else ""
+        if title in diff.added:
+            blocks.append(f"[ADDED SECTION] {title}\n{new}")
+        elif title in diff.removed:
+            blocks.append(f"[REMOVED SECTION] {title}\n{old}")
+        else:
+            blocks.append(f"[CHANGED SECTION] {title}\nBefore:\n{old}\n\nAfter:\n{new}")
+    
+    budget_chars = budget_chars_for(task, budget_tokens) - len(SEPARATOR) * max(len(blocks) - 1, 0)
+    shares = _fair_shares([len(block) for block in blocks], budget_chars)
+    return SEPARATOR.join(
+        block if len(block) <= share else trim_to_sentence(block, share) + OMITTED
+        for block, share in zip(blocks, shares)
+        if share > 0
+    )
+
+
+def changed_fraction(diff: SectionDiff, old_text: str, new_text: str) -> float:
+    """How much of the new version (by characters) is in added or changed sections."""
+    if not new_text:
+        return 1.0
+    touched = sum(end - start for title, (start, end) in diff.new_spans.items() if title in diff.added or title in diff.changed)
+    return touched / len(new_text)
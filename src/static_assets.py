@@ -0,0 +1,150 @@
+"""
+Static Asset Cache
+Serves the frontend (index.html, app.js, styles.css) straight from memory.
+
+At startup every file in static/ is:
+1. Read once into memory
+2. Fingerprinted with a hash of its contents (app.js -> app.3f9a1c2b7e.js)
+3. Pre-compressed to gzip and brotli at maximum quality (done once, not per request)
+
+index.html is rewritten to point at the fingerprinted names. Because a
+fingerprinted URL can never change its contents, browsers may cache it
+"forever" - repeat visits only re-check index.html itself.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from src.compression import choose_encoding
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+# Fingerprinted files never change, so they can be cached for a year
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Un-fingerprinted files (index.html, old URLs) must be re-checked every time
+REVALIDATE_CACHE = "no-cache"
+
+# Only text assets are worth compressing
+COMPRESSIBLE_EXTENSIONS = {".html", ".js", ".css", ".svg", ".json", ".txt", ".map"}
+
+
+class StaticAsset:
+    """One file held in memory with its pre-compressed variants."""
+    
+    def __init__(self, name: str, content: bytes, fingerprinted_name: str):
+        self.name = name
+        self.fingerprinted_name = fingerprinted_name
+        self.content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.etag = f'"{hashlib.sha256(content).hexdigest()[:16]}"'
+        self.variants: Dict[Optional[str], bytes] = {None: content}
+        
+        if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            self.variants["gzip"] = gzip.compress(content, compresslevel=9)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(content, quality=11)
+    
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """ETag of one variant ("abc" for identity, "abc-gzip" / "abc-br" when compressed)."""
+        if encoding is None:
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+
+class StaticAssetCache:
+    """
+    In-memory store of the frontend files, keyed by both their plain
+    and fingerprinted names.
+    """
+    
+    def __init__(self):
+        self.assets: Dict[str, StaticAsset] = {}
+        self.index_html: Optional[StaticAsset] = None
+    
+    def load(self, directory: str = "static"):
+        """Read, fingerprint and compress every file in the static directory."""
+        self.assets.clear()
+        if not os.path.isdir(directory):
+            logger.warning(f"Static directory not found: {directory}")
+            return
+        
+        raw_files = {}
+        for root, _dirs, files in os.walk(directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    raw_files[name] = f.read()
+        
+        # Fingerprint everything except index.html (its URL is always "/")
+        fingerprints = {}
+        for name, content in raw_files.items():
+            if name == "index.html":
+                continue
+            base, extension = os.path.splitext(name)
+            digest = hashlib.sha256(content).hexdigest()[:10]
+            fingerprints[name] = f"{base}.{digest}{extension}"
+        
+        for name, content in raw_files.items():
+            if name == "index.html":
+                content = self._rewrite_references(content, fingerprints)
+            asset = StaticAsset(name, content, fingerprints.get(name, name))
+            self.assets[name] = asset
+            self.assets[asset.fingerprinted_name] = asset
+        
+        self.index_html = self.assets.get("index.html")
+        
+        total = sum(len(asset.variants[None]) for asset in set(self.assets.values()))
+        logger.info(f"Cached {len(raw_files)} static files in memory ({total / 1024:.0f} KB, "
+              f"{'gzip + brotli' if brotli else 'gzip'} pre-compressed)")
+    
+    @staticmethod
+    def _rewrite_references(html: bytes, fingerprints: Dict[str, str]) -> bytes:
+        """Point /static/<name> references in index.html at the fingerprinted names."""
+        def replace(match):
+            name = match.group(1).decode("utf-8")
+            return f"/static/{fingerprints.get(name, name)}".encode("utf-8")
+        
+        return re.sub(rb"/static/([\w./-]+)", replace, html)
+    
+    def response(self, request: Request, asset: StaticAsset, immutable: bool) -> Response:
+        """
+        Build the response for an asset: 304 if the browser's copy is current,
+        otherwise the best pre-compressed variant the browser accepts.
+        """
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        if encoding not in asset.variants:
+            encoding = None
+        
+        headers = {
+            # Each variant is a different byte sequence, so each gets its own strong ETag
+            "ETag": asset.etag_for(encoding),
+            "Cache-Control": IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+            "Vary": "Accept-Encoding",
+        }
+        
+        if_none_match = request.headers.get("if-none-match", "")
+        client_tags = [tag.strip() for tag in if_none_match.split(",")]
+        if any(asset.etag_for(variant) in client_tags for variant in asset.variants):
+            return Response(status_code=304, headers=headers)
+        
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        
+        return Response(content=asset.variants[encoding], media_type=asset.content_type, headers=headers)
+
+
+# Create global instance
+static_assets = StaticAssetCache()
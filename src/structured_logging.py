@@ -0,0 +1,253 @@
+"""
+Structured Logging
+One JSON object per log line, written by a background thread.
+
+Why not print()?
+- print() writes to stdout right there on the event loop. A slow terminal or
+  log collector then slows down every request.
+- Plain text is hard to search. JSON lines can be filtered by level,
+  request id, file name...
+
+How it works:
+- Code logs as usual:  logger.info("Contract saved", extra={"contract_id": 5})
+- The record is tagged with the current request id and put on a queue
+  (that is all the request itself pays for)
+- A background thread takes records off the queue, formats them as JSON
+  and writes them to stdout (and optionally a file)
+
+Request ids:
+Every HTTP request gets an id (or keeps the X-Request-ID it arrived with).
+All log lines written while handling it carry that id, and the response
+sends it back in the X-Request-ID header.
+
+Debug sampling:
+With LOG_LEVEL=DEBUG, only LOG_DEBUG_SAMPLE_RATE of requests keep their
+DEBUG lines - but a sampled request keeps ALL of them, so its story is complete.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Optional
+
+from src.config import settings
+
+
+# Id of the request being handled (contextvars follow asyncio tasks and to_thread calls)
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has - anything else was passed in extra={...}
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the id of the request that produced it."""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keep DEBUG records for only a share of requests.
+    
+    The decision is made from the request id, so a request keeps either all
+    of its debug lines or none of them. Records outside a request are sampled
+    one by one.
+    """
+    
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            return (zlib.crc32(request_id.encode("utf-8")) % 10000) < self.rate * 10000
+        return random.random() < self.rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+    
+    If the log thread falls behind and the queue is full, new records are
+    dropped (and counted) instead of making the request wait.
+    """
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message now (arguments may change later), but leave
+        # JSON formatting to the background thread
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JSONFormatter(logging.Formatter):
+    """Format a record as a single line of JSON."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-friendly format for local development (LOG_FORMAT=text)."""
+    
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s%(request_tag)s: %(message)s")
+    
+    def format(self, record: logging.LogRecord) -> str:
+        request_id = getattr(record, "request_id", None)
+        record.request_tag = f" [{request_id}]" if request_id else ""
+        return super().format(record)
+
+
+class LoggingPipeline:
+    """
+    Owns the log queue and the background thread that drains it.
+    """
+    
+    def __init__(self):
+        self.queue_handler: Optional[DroppingQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+    
+    def setup(self):
+        """Send all logging through the queue (safe to call more than once)."""
+        if self.listener is not None:
+            return
+        
+        formatter = JSONFormatter() if settings.LOG_FORMAT.lower() == "json" else TextFormatter()
+        output_handlers = [logging.StreamHandler(sys.stdout)]
+        if settings.LOG_FILE:
+            output_handlers.append(logging.FileHandler(settings.LOG_FILE, encoding="utf-8"))
+        for handler in output_handlers:
+            handler.setFormatter(formatter)
+        
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        self.queue_handler = DroppingQueueHandler(log_queue)
+        # Filters run in the calling thread, before the record is queued
+        self.queue_handler.addFilter(RequestIdFilter())
+        self.queue_handler.addFilter(DebugSampler(settings.LOG_DEBUG_SAMPLE_RATE))
+        
+        # LOG_LEVEL applies to our own code ("src.*"); libraries never go below INFO,
+        # otherwise DEBUG would drown the app's lines in driver chatter
+        level = logging.getLevelName(settings.LOG_LEVEL.upper())
+        level = level if isinstance(level, int) else logging.INFO
+        root = logging.getLogger()
+        root.setLevel(max(level, logging.INFO))
+        root.addHandler(self.queue_handler)
+        logging.getLogger("src").setLevel(level)
+        
+        self.listener = logging.handlers.QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.shutdown)
+    
+    def shutdown(self):
+        """Write out everything still queued and stop the thread."""
+        if self.listener is None:
+            return
+        self.listener.stop()
+        self.listener = None
+        logging.getLogger().removeHandler(self.queue_handler)
+        if self.queue_handler.dropped:
+            print(f"[WARNING] {self.queue_handler.dropped} log records were dropped (log queue full)", file=sys.stderr)
+
+
+# Create global instance
+logging_pipeline = LoggingPipeline()
+
+
+def setup_logging():
+    """Start the logging pipeline (call once at startup)."""
+    logging_pipeline.setup()
+
+
+class BoundLogger(logging.LoggerAdapter):
+    """
+    A logger that adds the same fields to every line, e.g. the file being
+    uploaded. Fields passed in extra={...} on a single call are added too.
+    """
+    
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return msg, kwargs
+
+
+def bind_logger(logger: logging.Logger, **fields) -> BoundLogger:
+    """Return a logger that adds `fields` to every line it writes."""
+    return BoundLogger(logger, fields)
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware that gives every request an id.
+    
+    Uses the incoming X-Request-ID header when there is one (so ids can be
+    followed across services), otherwise makes a new one.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,352 @@
+"""
+Text Compaction
+Cleans up extracted contract text before it is stored and sent to the AI.
+
+Text that PyPDF2 pulls out of a PDF is full of things that cost tokens
+without adding meaning:
+    
+    The Vendor shall pro-          ->  The Vendor shall provide
+    vide monthly reports...            monthly reports...
+    
+    Acme Corp - Master Agreement   ->  (header repeated on every page: removed)
+    Page 3 of 12                   ->  (page number: removed)
+    Name:   ______________         ->  (empty signature line: removed)
+
+Compaction:
+1. Strips page furniture: lines repeated at the top or bottom of most pages,
+   and page numbers ("Page 3 of 12", "- 3 -")
+2. Drops signature-block boilerplate near the end: blank signature
+   lines ("____", "By: ______", "Name: [Authorized Signatory]") and
+   "IN WITNESS WHEREOF..."
+3. Joins words hyphenated across line breaks ("pro-" + "vide" -> "provide"),
+   keeping the hyphen of compound words ("non-" + "compete" -> "non-compete")
+4. Collapses runs of spaces, indentation and blank lines
+
+Every character of the compacted text still points back to a position in
+the original through an OffsetMap, so a clause found at characters
+1200-1350 of the compacted text can be shown at its real place in the
+original (see GET /api/contracts/{id}/clauses).
+
+Pages are separated by form feeds ("\f") - see join_pages().
+"""
+
+import bisect
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import settings
+from src.metrics import TEXT_COMPACTION_CHARS
+
+
+# How PDF pages are joined into one text (a form feed is whitespace to everything else)
+PAGE_BREAK = "\f"
+
+# "Page 3", "Page 3 of 12", "- 3 -", "3/12", "3" (alone on a line)
+PAGE_NUMBER = re.compile(r"^(?:page\s+\d{1,4}(?:\s+of\s+\d{1,4})?|-\s*\d{1,4}\s*-|\d{1,4}\s*/\s*\d{1,4}|\d{1,4})$", re.IGNORECASE)
+# "Page 3 of 12" is a page number anywhere, not only at the edge of a page
+EXPLICIT_PAGE_NUMBER = re.compile(r"^page\s+\d{1,4}(?:\s+of\s+\d{1,4})?$", re.IGNORECASE)
+
+# Lines checked for repeated headers/footers at the top and bottom of each page
+EDGE_LINES = 2
+MAX_FURNITURE_CHARS = 100
+
+# Where the signature block starts, and the lines in it that carry nothing.
+# Only looked for at the end: the last SIGNATURE_TAIL of the lines, or the
+# last page if that is longer ("Signed copies shall be kept..." in the body
+# is not a signature block)
+SIGNATURE_TAIL = 0.25
+SIGNATURE_START = re.compile(r"^(?:signatures?\b|signed\b|in witness whereof\b|executed by\b)", re.IGNORECASE)
+BLANK_SIGNATURE_LINE = re.compile(
+    r"^(?:[_.\-=\s]{3,}|(?:by|name|signature|signed|title|date|print name)\s*:?\s*(?:_{2,}|\[[^\]]*\])?\s*"
+    r"|in witness whereof\b.*)$",
+    re.IGNORECASE
+)
+
+# Spaces, tabs and the no-break spaces PDFs are full of
+SPACES = " \t\r\v\u00a0"
+HORIZONTAL_SPACE = re.compile(f"[{SPACES}]+")
+# "pro-" at the end of a line: group 1 is the word fragment before the hyphen
+HYPHENATED_END = re.compile(r"([A-Za-z]+(?:-[A-Za-z]+)*)-$")
+# Compound words keep their hyphen when joined: "non-\ncompete" -> "non-compete"
+# (unless the document itself writes the word without one: "sub-\nject" -> "subject")
+HYPHEN_PREFIXES = {
+    "anti", "co", "counter", "cross", "extra", "multi", "non", "post", "pre",
+    "self", "semi", "sub", "super", "third", "vice", "well",
+}
+WORD = re.compile(r"[A-Za-z]+(?:-[A-Za-z]+)*")
+
+
+@dataclass
+class OffsetMap:
+    """
+    Maps positions in the compacted text back to the original text.
+    
+    Stored as anchors: from compact[i] on, the compacted text is copied from
+    original[i] onwards (until the next anchor). Characters that replace
+    something (a single space for a run of spaces) point at what they replaced.
+    """
+    compact: List[int] = field(default_factory=list)
+    original: List[int] = field(default_factory=list)
+    original_length: int = 0
+    
+    def add(self, compact_pos: int, original_pos: int):
+        if self.compact:
+            # Still copying the same stretch of the original: no new anchor needed
+            if original_pos - self.original[-1] == compact_pos - self.compact[-1]:
+                return
+            if compact_pos == self.compact[-1]:
+                self.original[-1] = original_pos
+                return
+        self.compact.append(compact_pos)
+        self.original.append(original_pos)
+    
+    def to_original(self, position: Optional[int]) -> Optional[int]:
+        """Position in the original text of a position in the compacted text."""
+        if position is None or not self.compact:
+            return position
+        index = max(bisect.bisect_right(self.compact, position) - 1, 0)
+        return min(self.original[index] + position - self.compact[index], self.original_length)
+    
+    def to_json(self) -> str:
+        return json.dumps({"compact": self.compact, "original": self.original, "length": self.original_length})
+    
+    @classmethod
+    def from_json(cls, value: Optional[str]) -> Optional["OffsetMap"]:
+        if not value:
+            return None
+        try:
+            data = json.loads(value)
+            return cls(data["compact"], data["original"], data.get("length", 0))
+        except (ValueError, KeyError, TypeError):
+            return None
+
+
+@dataclass
+class CompactedText:
+    """The result of compacting one document."""
+    text: str
+    offset_map: OffsetMap
+    original_chars: int
+    removed: Dict[str, int]   # reason -> characters removed
+    
+    @property
+    def changed(self) -> bool:
+        return len(self.text) != self.original_chars or any(self.removed.values())
+    
+    def report(self) -> Dict[str, object]:
+        """Character and (estimated) token reduction, for logs and API responses."""
+        original_tokens = _tokens(self.original_chars)
+        compacted_tokens = _tokens(len(self.text))
+        return {
+            "original_chars": self.original_chars,
+            "compacted_chars": len(self.text),
+            "char_reduction_pct": _percent(self.original_chars - len(self.text), self.original_chars),
+            "original_tokens": original_tokens,
+            "compacted_tokens": compacted_tokens,
+            "token_reduction_pct": _percent(original_tokens - compacted_tokens, original_tokens),
+            "removed": dict(self.removed),
+        }
+
+
+def _tokens(chars: int) -> int:
+    """Estimated tokens for a number of characters (same estimate as the prompt budgets)."""
+    return math.ceil(chars / settings.CHARS_PER_TOKEN)
+
+
+def _percent(part: int, whole: int) -> float:
+    return round(100.0 * part / whole, 1) if whole else 0.0
+
+
+def join_pages(pages: Iterable[Optional[str]]) -> str:
+    """One text from the text of each PDF page (pages separated by form feeds)."""
+    return PAGE_BREAK.join(page or "" for page in pages)
+
+
+def _lines(text: str) -> List[Tuple[int, int, int]]:
+    """(start, end, page) of every line; line and page breaks are not part of a line."""
+    lines, page, start = [], 0, 0
+    for match in re.finditer(r"\n|\f", text + "\n"):
+        lines.append((start, match.start(), page))
+        if match.group() == PAGE_BREAK:
+            page += 1
+        start = match.end()
+    return lines
+
+
+def _is_compound(before: str, next_line: str, words: set) -> bool:
+    """
+    Is "before-" + next_line a hyphenated compound word rather than one word split in two?
+    
+    Words with more hyphens ("state-of-" + "the-art") are compounds. Otherwise
+    the rest of the document decides ("subject" written elsewhere: a split
+    word), and then the prefix ("non-", "self-", "third-").
+    """
+    match = WORD.match(next_line)
+    next_word = match.group() if match else ""
+    if "-" in before or "-" in next_word:
+        return True
+    whole = (before + next_word).lower()
+    hyphenated = f"{before}-{next_word}".lower()
+    if whole in words and hyphenated not in words:
+        return False
+    return hyphenated in words or before.lower() in HYPHEN_PREFIXES
+
+
+def _furniture_key(line: str) -> str:
+    """Page headers/footers usually differ only in their numbers."""
+    return re.sub(r"\d+", "#", " ".join(line.split()).lower())
+
+
+class TextCompactor:
+    """Compacts extracted contract text and maps it back to the original."""
+    
+    def compact(self, text: str) -> CompactedText:
+        lines = _lines(text)
+        content = [text[start:end].strip(SPACES) for start, end, _page in lines]
+        removed = {"page_furniture": 0, "signature_boilerplate": 0, "hyphenation": 0, "whitespace": 0}
+        
+        dropped = self._page_furniture(lines, content)
+        removed["page_furniture"] = sum(lines[i][1] - lines[i][0] + 1 for i in dropped)
+        signature = self._signature_boilerplate(lines, content, dropped)
+        removed["signature_boilerplate"] = sum(lines[i][1] - lines[i][0] + 1 for i in signature)
+        dropped |= signature
+        
+        kept = [i for i in range(len(lines)) if i not in dropped and content[i]]
+        
+        out: List[str] = []
+        offset_map = OffsetMap(original_length=len(text))
+        length = 0
+        
+        def copy(start: int, end: int):
+            nonlocal length
+            offset_map.add(length, start)
+            out.append(text[start:end])
+            length += end - start
+        
+        def emit(value: str, original_pos: int):
+            nonlocal length
+            offset_map.add(length, original_pos)
+            out.append(value)
+            length += len(value)
+        
+        words = None      # every word of the text, lower-case (only built if a line ends in a hyphen)
+        previous = None   # index of the last line written
+        joined = False    # the last line ended in a hyphen that was removed
+        for position, i in enumerate(kept):
+            start, end, _page = lines[i]
+            if previous is not None and not joined:
+                # Blank (or dropped) lines in between become one blank line
+                gap = any(not content[j] for j in range(previous + 1, i) if j not in dropped)
+                emit("\n\n" if gap else "\n", lines[previous][1])
+            
+            # The line without its indentation and trailing spaces
+            line_start = start + (len(text[start:end]) - len(text[start:end].lstrip(SPACES)))
+            line_end = line_start + len(content[i])
+            
+            joined = False
+            following = kept[position + 1] if position + 1 < len(kept) else None
+            hyphenated = HYPHENATED_END.search(content[i])
+            if hyphenated and following is not None and content[following][:1].islower():
+                joined = True
+                if words is None:
+                    words = {word.lower() for word in WORD.findall(text)}
+                if _is_compound(hyphenated.group(1), content[following], words):
+                    removed["hyphenation"] += 1  # Only the line break: "non-" + "compete" -> "non-compete"
+                else:
+                    removed["hyphenation"] += 2  # The hyphen and the line break
+                    line_end -= 1  # "pro-" + "vide" -> "provide"
+            
+            # Runs of spaces inside the line become one space
+            cursor = line_start
+            for match in HORIZONTAL_SPACE.finditer(text, line_start, line_end):
+                if match.group() == " ":
+                    continue
+                copy(cursor, match.start())
+                emit(" ", match.start())
+                cursor = match.end()
+            copy(cursor, line_end)
+            previous = i
+        
+        compacted = "".join(out)
+        removed["whitespace"] = max(
+            len(text) - len(compacted) - removed["page_furniture"] - removed["signature_boilerplate"] - removed["hyphenation"], 0
+        )
+        return CompactedText(compacted, offset_map, len(text), removed)
+    
+    def for_storage(self, text: str) -> Tuple[str, Dict[str, Optional[str]], Optional[Dict[str, object]]]:
+        """
+        The text to store and analyze, the extra Contract columns, and the report.
+        
+        Returns:
+            (text, {"original_text", "offset_map"}, report) - the original text
+            and map are only kept if compaction changed something; with
+            TEXT_COMPACTION_ENABLED off the text is returned as it is.
+        """
+        if not settings.TEXT_COMPACTION_ENABLED:
+            return text, {"original_text": None, "offset_map": None}, None
+        
+        compacted = self.compact(text)
+        for reason, chars in compacted.removed.items():
+            TEXT_COMPACTION_CHARS.inc(chars, reason=reason)
+        TEXT_COMPACTION_CHARS.inc(len(compacted.text), reason="kept")
+        
+        if not compacted.changed:
+            return text, {"original_text": None, "offset_map": None}, compacted.report()
+        return compacted.text, {"original_text": text, "offset_map": compacted.offset_map.to_json()}, compacted.report()
+    
+    @staticmethod
+    def _page_furniture(lines: List[Tuple[int, int, int]], content: List[str]) -> set:
+        """Lines that are page numbers, or headers/footers repeated on most pages."""
+        pages: Dict[int, List[int]] = {}
+        for i, (_start, _end, page) in enumerate(lines):
+            if content[i]:
+                pages.setdefault(page, []).append(i)
+        
+        edges = {page: set(indices[:EDGE_LINES] + indices[-EDGE_LINES:]) for page, indices in pages.items()}
+        
+        dropped = set()
+        if len(pages) >= 2:
+            seen: Dict[str, set] = {}
+            for page, indices in edges.items():
+                for i in indices:
+                    if len(content[i]) <= MAX_FURNITURE_CHARS:
+                        seen.setdefault(_furniture_key(content[i]), set()).add(page)
+            repeated = {key for key, on_pages in seen.items() if len(on_pages) >= max(2, (len(pages) + 1) // 2)}
+            for indices in edges.values():
+                dropped.update(i for i in indices if _furniture_key(content[i]) in repeated)
+        
+        for page, indices in edges.items():
+            dropped.update(i for i in indices if PAGE_NUMBER.match(content[i]) and len(pages) >= 2)
+        dropped.update(i for i, line in enumerate(content) if EXPLICIT_PAGE_NUMBER.match(line))
+        return dropped
+    
+    @staticmethod
+    def _signature_boilerplate(lines: List[Tuple[int, int, int]], content: List[str], dropped: set) -> set:
+        """Empty signature lines, from the signature block (near the end) to the end."""
+        if not lines:
+            return set()
+        # The last SIGNATURE_TAIL of the lines, or the whole last page if that is longer
+        last_page = lines[-1][2]
+        last_page_start = next(i for i, (_start, _end, page) in enumerate(lines) if page == last_page)
+        tail_start = min(int(len(lines) * (1 - SIGNATURE_TAIL)), last_page_start if last_page > 0 else len(lines))
+        start = next(
+            (i for i in range(tail_start, len(content)) if SIGNATURE_START.match(content[i]) and i not in dropped),
+            None
+        )
+        if start is None:
+            return set()
+        boilerplate = {
+            i for i in range(start + 1, len(content))
+            if content[i] and i not in dropped and BLANK_SIGNATURE_LINE.match(content[i])
+        }
+        # The heading stays, unless it is the "IN WITNESS WHEREOF, the parties..." sentence itself
+        if content[start].lower().startswith("in witness"):
+            boilerplate.add(start)
+        return boilerplate
+
+
+# Create global instance
+text_compactor = TextCompactor()
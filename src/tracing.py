@@ -0,0 +1,227 @@
+"""
+Request Tracing
+Breaks one slow request into named, timed pieces ("spans").
+
+Example for /api/contracts/ask:
+    retrieval     2.1 ms   (finding the relevant chunks)
+    prompt        0.1 ms   (building the prompt)
+    llm.answer  850.0 ms   (waiting for Gemini)
+    db            3.4 ms   (4 SQL queries)
+
+Where the spans go:
+1. A Server-Timing response header - browser dev tools (Network tab ->
+   Timing) show it as a bar chart, no setup needed
+2. Optionally a trace file (TRACE_FILE) in the Chrome Trace Event format,
+   which can be opened in https://ui.perfetto.dev or chrome://tracing.
+   Only TRACE_SAMPLE_RATE of requests are written, to keep it small.
+
+Recording a span outside a request (e.g. during startup) does nothing.
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.config import settings
+
+
+# Each traced request gets its own row ("thread") in the trace viewer
+_track_ids = itertools.count(1)
+
+
+class Trace:
+    """The spans recorded while handling one request."""
+    
+    def __init__(self, name: str, sampled: bool):
+        self.name = name
+        self.sampled = sampled              # Write this trace to the trace file?
+        self.start = time.perf_counter()
+        self.wall_start = time.time()       # For absolute timestamps in the trace file
+        self.spans: List[tuple] = []        # (name, start, end) in perf_counter seconds
+        self.track = next(_track_ids)
+    
+    def add(self, name: str, start: float, end: float):
+        self.spans.append((name, start, end))
+    
+    def server_timing(self) -> str:
+        """
+        Build the Server-Timing header value.
+        
+        Spans with the same name (e.g. many "db" queries) are added together.
+        """
+        totals: Dict[str, list] = {}
+        for name, start, end in self.spans:
+            entry = totals.setdefault(name, [0.0, 0])
+            entry[0] += end - start
+            entry[1] += 1
+        
+        parts = []
+        for name, (duration, count) in totals.items():
+            part = f"{name};dur={duration * 1000:.1f}"
+            if count > 1:
+                part += f';desc="{count} calls"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(parts)
+    
+    def trace_events(self, end: float) -> List[dict]:
+        """Spans as Chrome Trace Event Format "complete" (ph=X) events."""
+        def to_us(moment: float) -> int:
+            return int((self.wall_start + (moment - self.start)) * 1_000_000)
+        
+        events = [{
+            "name": self.name, "ph": "X", "pid": os.getpid(), "tid": self.track,
+            "ts": to_us(self.start), "dur": int((end - self.start) * 1_000_000),
+        }]
+        for name, start, span_end in self.spans:
+            events.append({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": self.track,
+                "ts": to_us(start), "dur": int((span_end - start) * 1_000_000),
+            })
+        return events
+
+
+# The trace of the request being handled (follows asyncio tasks and to_thread calls)
+current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+
+
+def record_span(name: str, start: float, end: float):
+    """Add an already-timed span (perf_counter values) to the current request."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(name, start, end)
+
+
+class span:
+    """
+    Time a block of code as a span of the current request:
+        
+        with span("retrieval"):
+            chunks = search(...)
+    """
+    
+    __slots__ = ("name", "start")
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        record_span(self.name, self.start, time.perf_counter())
+        return False
+
+
+class TraceFileWriter:
+    """
+    Appends trace events to TRACE_FILE from a background thread,
+    so requests never wait for the disk.
+    """
+    
+    def __init__(self):
+        self.queue: "queue.Queue[Optional[List[dict]]]" = queue.Queue(maxsize=1000)
+        self.thread: Optional[threading.Thread] = None
+        self.path: Optional[str] = None
+    
+    def start(self, path: str):
+        if self.thread is not None:
+            return
+        self.path = path
+        self.thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self.thread.start()
+    
+    def write(self, events: List[dict]):
+        try:
+            self.queue.put_nowait(events)
+        except queue.Full:
+            pass  # Tracing is best effort - never slow the request down
+    
+    def stop(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+            self.thread = None
+    
+    def _run(self):
+        # JSON Array Format: "[" then comma-separated events. The closing "]"
+        # is optional, so events can keep being appended across restarts.
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", encoding="utf-8") as f:
+            if new_file:
+                f.write("[\n")
+            while True:
+                events = self.queue.get()
+                if events is None:
+                    break
+                for event in events:
+                    f.write(json.dumps(event) + ",\n")
+                f.flush()
+
+
+# Create global instance
+trace_file_writer = TraceFileWriter()
+
+
+# ============================================================================
+# DATABASE AND HTTP INSTRUMENTATION
+# ============================================================================
+
+def instrument_engine(engine):
+    """Record every SQL statement as a "db" span of the current request."""
+    from sqlalchemy import event
+    
+    sync_engine = getattr(engine, "sync_engine", engine)
+    
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["span_start"] = time.perf_counter()
+    
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("span_start", None)
+        if start is not None:
+            record_span("db", start, time.perf_counter())
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that starts a trace for every request and adds the
+    Server-Timing header to the response.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        if settings.TRACE_FILE:
+            trace_file_writer.start(settings.TRACE_FILE)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SERVER_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        
+        sampled = bool(settings.TRACE_FILE) and random.random() < settings.TRACE_SAMPLE_RATE
+        trace = Trace(f"{scope['method']} {scope['path']}", sampled)
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(token)
+            if trace.sampled:
+                trace_file_writer.write(trace.trace_events(time.perf_counter()))
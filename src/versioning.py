@@ -0,0 +1,235 @@
+"""
+Contract Versioning
+Uploading a renewed or amended contract as a new version of an existing one.
+
+A new upload runs every analysis over the whole text again - even if only
+the payment schedule changed. For a new version of a known contract we can
+do much less:
+
+1. The old version (text and analysis) is kept in the contract_versions table
+2. The two texts are compared section by section (sections.diff_sections)
+3. Each analysis is only redone if the change touches a section it reads:
+   - unchanged      -> the previous result is reused (no AI call)
+   - summary / risk -> the previous result is UPDATED from the changed
+                       sections only (a much smaller prompt)
+   - clauses        -> only the changed sections are extracted, and merged
+                       with the clauses of the unchanged ones
+   - metadata / FAQ -> re-run on the new text (their inputs are small)
+
+If most of the contract changed (VERSION_FULL_REANALYSIS_RATIO), updating
+makes no sense and everything is analyzed from scratch instead. Long
+contracts also reuse the map-reduce notes of their unchanged parts
+(src/map_reduce.py).
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.database import Contract, ContractVersion
+from src.rag_system import rag_system, is_missing
+from src.sections import SectionDiff, diff_sections, describe_changes, changed_fraction
+from src.clauses import clause_store, parse_clauses, format_clauses, CLAUSE_TYPES
+from src import faq
+from src.contract_dates import parse_contract_dates, contract_status
+
+logger = logging.getLogger(__name__)
+
+
+TASKS = ("metadata", "summary", "clauses", "risk", "faq")
+
+
+class ContractVersioning:
+    """Saves contract versions and re-analyzes amendments incrementally."""
+    
+    async def amend(self, db: AsyncSession, contract: Contract, new_text: str) -> Dict[str, Any]:
+        """
+        Make new_text the current version of a contract (the caller commits).
+        
+        Returns:
+            {"version", "changes" (section diff), "reanalyzed", "reused", "mode"}
+            - or {"version", "changes", "unchanged": True} if nothing changed
+        """
+        old_text = contract.contract_text or ""
+        diff = diff_sections(old_text, new_text)
+        if old_text and not diff.has_changes:
+            return {"version": contract.version or 1, "changes": diff.to_dict(), "unchanged": True}
+        
+        full = not old_text or changed_fraction(diff, old_text, new_text) > settings.VERSION_FULL_REANALYSIS_RATIO
+        reanalyze = [task for task in TASKS if full or diff.affects(task)]
+        
+        # Keep the current version before anything is overwritten
+        version = contract.version or 1
+        db.add(ContractVersion(
+            contract_id=contract.id,
+            version=version,
+            contract_text=old_text,
+            original_text=contract.original_text,
+            offset_map=contract.offset_map,
+            summary=contract.summary,
+            key_clauses=contract.key_clauses,
+            risk_level=contract.risk_level,
+            risk_reason=contract.risk_reason,
+            faq_answers=contract.faq_answers,
+            contract_value=contract.contract_value,
+            start_date=contract.start_date,
+            end_date=contract.end_date,
+            valid_from=contract.updated_at or contract.created_at,
+            replaced_at=datetime.utcnow(),
+            changes=json.dumps(diff.to_dict()),
+        ))
+        
+        # The affected analyses run at the same time
+        previous_clauses = await clause_store.for_contract(db, contract.id)
+        runs = {
+            "metadata": lambda: rag_system.extract_contract_metadata(new_text),
+            "summary": lambda: self._summary(contract, diff, old_text, new_text, full),
+            "clauses": lambda: self._clauses(previous_clauses, diff, old_text, new_text, full),
+            "risk": lambda: self._risk(contract, diff, old_text, new_text, full),
+            "faq": lambda: rag_system.generate_faq_answers(
+                new_text, {key: topic.question for key, topic in faq.enabled_topics().items()}
+            ),
+        }
+        results = await asyncio.gather(*(runs[task]() for task in reanalyze), return_exceptions=True)
+        
+        failed = []
+        for task, result in zip(reanalyze, results):
+            if task == "metadata" and not isinstance(result, Exception) and result.get("extraction_failed"):
+                # Placeholders ("Unknown" parties, no dates) must not replace real values
+                result = RuntimeError("metadata extraction returned placeholders")
+            if isinstance(result, Exception):
+                # The previous result stays - better slightly stale than empty
+                logger.warning(f"Re-analyzing {task} of contract {contract.id} failed: {result}")
+                failed.append(task)
+                continue
+            await self._apply(db, contract, task, result)
+        
+        if "clauses" not in reanalyze or "clauses" in failed:
+            # Same clauses, but their offsets moved with the text around them
+            await clause_store.replace(db, contract.id, parse_clauses(format_clauses(previous_clauses), new_text))
+        
+        contract.contract_text = new_text
+        contract.version = version + 1
+        contract.updated_at = datetime.utcnow()
+        
+        return {
+            "version": contract.version,
+            "previous_version": version,
+            "changes": diff.to_dict(),
+            "mode": "full" if full else "incremental",
+            "reanalyzed": [task for task in reanalyze if task not in failed],
+            "reused": [task for task in TASKS if task not in reanalyze],
+            "failed": failed,
+        }
+    
+    async def history(self, db: AsyncSession, contract_id: int) -> List[Dict[str, Any]]:
+        """Earlier versions of a contract, newest first (without their text)."""
+        result = await db.execute(
+            select(ContractVersion).where(ContractVersion.contract_id == contract_id).order_by(ContractVersion.version.desc())
+        )
+        return [
+            {
+                "version": version.version,
+                "valid_from": version.valid_from.isoformat() if version.valid_from else None,
+                "replaced_at": version.replaced_at.isoformat() if version.replaced_at else None,
+                "risk_level": version.risk_level,
+                "risk_reason": version.risk_reason,
+                "contract_value": version.contract_value,
+                "characters": len(version.contract_text or ""),
+                "changes": json.loads(version.changes) if version.changes else None,
+            }
+            for version in result.scalars()
+        ]
+    
+    async def get(self, db: AsyncSession, contract_id: int, version: int) -> Optional[ContractVersion]:
+        result = await db.execute(
+            select(ContractVersion).where(ContractVersion.contract_id == contract_id, ContractVersion.version == version)
+        )
+        return result.scalar_one_or_none()
+    
+    # ---- one analysis each ---------------------------------------------------
+    
+    async def _summary(self, contract: Contract, diff: SectionDiff, old_text: str, new_text: str, full: bool) -> str:
+        if full or not contract.summary:
+            return await rag_system.generate_contract_summary(new_text)
+        changes = describe_changes(diff, old_text, new_text, "summary")
+        return await rag_system.revise_analysis("summary", contract.summary, changes)
+    
+    async def _risk(self, contract: Contract, diff: SectionDiff, old_text: str, new_text: str, full: bool) -> Dict[str, Any]:
+        if full or not contract.risk_reason:
+            return await rag_system.assess_risk_level(new_text)
+        previous = f"RISK LEVEL: {(contract.risk_level or 'low').upper()}\n\nPRIMARY REASON: {contract.risk_reason}"
+        changes = describe_changes(diff, old_text, new_text, "risk")
+        return rag_system.parse_risk_assessment(await rag_system.revise_analysis("risk", previous, changes))
+    
+    async def _clauses(
+        self,
+        previous: List[Dict[str, Any]],
+        diff: SectionDiff,
+        old_text: str,
+        new_text: str,
+        full: bool
+    ) -> List[Dict[str, Any]]:
+        if full:
+            extracted = await rag_system.extract_key_clauses(new_text)
+            return parse_clauses(extracted.get("extracted_clauses", ""), new_text)
+        
+        # Extract from the new wording of the changed and added sections only
+        changed_text = "\n\n".join(
+            new_text[slice(*diff.new_spans[title])].strip() for title in diff.changed + diff.added
+        )
+        found = []
+        if changed_text.strip():
+            extracted = await rag_system.extract_key_clauses(changed_text)
+            found = parse_clauses(extracted.get("extracted_clauses", ""), new_text)
+        found_types = {clause["clause_type"] for clause in found}
+        
+        # Keep the old clauses that weren't in a changed or removed section
+        touched = [diff.old_spans[title] for title in diff.changed + diff.removed if title in diff.old_spans]
+        kept = [
+            clause for clause in previous
+            if clause["clause_type"] not in found_types
+            and not (clause["start_offset"] is not None and any(start <= clause["start_offset"] < end for start, end in touched))
+        ]
+        merged = {clause["clause_type"]: clause for clause in kept + found}
+        # Parsed again to find each clause in the new text (unchanged ones may have moved)
+        return parse_clauses(format_clauses([merged[key] for key in CLAUSE_TYPES if key in merged]), new_text)
+    
+    async def _apply(self, db: AsyncSession, contract: Contract, task: str, result: Any):
+        """Store one task's new result on the contract."""
+        if task == "metadata":
+            # Only real values replace what we have - a field the AI couldn't find stays as it was
+            for field in ("contract_name", "party_a", "party_b", "currency"):
+                if not is_missing(result.get(field)):
+                    setattr(contract, field, result[field])
+            try:
+                if not is_missing(result.get("contract_value")):
+                    contract.contract_value = float(result["contract_value"])
+            except (TypeError, ValueError):
+                pass
+            start_date, end_date = parse_contract_dates(result, fill_missing=False)
+            contract.start_date = start_date or contract.start_date
+            contract.end_date = end_date or contract.end_date
+            if contract.start_date and contract.end_date:
+                contract.status = contract_status(contract.start_date, contract.end_date)
+            # The contract number stays: it identifies the contract, not the version
+        elif task == "summary":
+            contract.summary = result
+        elif task == "risk":
+            contract.risk_level = result["risk_level"]
+            contract.risk_reason = result.get("risk_reason", "Risk level determined by contract analysis")
+        elif task == "clauses":
+            contract.key_clauses = json.dumps({"extracted_clauses": format_clauses(result)})
+            await clause_store.replace(db, contract.id, result)
+        elif task == "faq" and result:
+            contract.faq_answers = faq.build_answer_sheet(result)
+
+
+# Create global instance
+contract_versioning = ContractVersioning()
@@ -8,6 +8,35 @@
 // ============================================================================
 const API_BASE = '';  // Empty since we're on the same server
 
+// ============================================================================
+// CONDITIONAL FETCH (ETag caching)
+// ============================================================================
+// The server tags contracts/warnings/stats responses with an ETag.
+// We remember the last body per URL and send the tag back in If-None-Match;
+// "304 Not Modified" means nothing changed, so we reuse the cached body.
+const etagCache = new Map();
+
+async function fetchJSONWithETag(url) {
+    const cached = etagCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    
+    const response = await fetch(url, { headers });
+    
+    if (response.status === 304 && cached) {
+        return JSON.parse(cached.body);  // Fresh copy, so callers can modify it safely
+    }
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+    
+    const body = await response.text();
+    const etag = response.headers.get('ETag');
+    if (etag) {
+        etagCache.set(url, { etag, body });
+    }
+    return JSON.parse(body);
+}
+
 // ============================================================================
 // TAB SWITCHING
 // ============================================================================
@@ -42,33 +71,19 @@ let currentFilter = null;
 // ============================================================================
 // LOAD DASHBOARD STATS
 // ============================================================================
+// One request to /api/bootstrap returns stats, warnings, risk counts and the
+// contract list for the dropdown - all from the same database snapshot.
 async function loadDashboardStats() {
     console.log('[DASHBOARD] Loading dashboard stats...');
     
     try {
-        const response = await fetch(`${API_BASE}/api/dashboard/stats`);
+        const data = await fetchJSONWithETag(`${API_BASE}/api/bootstrap`);
+        console.log('[DASHBOARD] Bootstrap received:', data.stats);
         
-        if (!response.ok) {
-            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-        }
-        
-        const data = await response.json();
-        console.log('[DASHBOARD] Stats received:', data);
-        
-        // Update status counts with fallback to 0
-        document.getElementById('total-count').textContent = data.total_contracts ?? 0;
-        document.getElementById('active-count').textContent = data.active_contracts ?? 0;
-        document.getElementById('expired-count').textContent = data.expired_contracts ?? 0;
-        document.getElementById('renewed-count').textContent = data.renewed_contracts ?? 0;
-        document.getElementById('pending-count').textContent = data.pending_contracts ?? 0;
-        
-        console.log(`[DASHBOARD] Updated stats - Total: ${data.total_contracts}, Active: ${data.active_contracts}`);
-        
-        // Load warning count
-        await loadWarningCount();
-        
-        // Load risk level stats
-        await loadRiskStats();
+        renderDashboardStats(data.stats);
+        renderWarningCount(data.warnings.items, data.warnings.stats, data.warnings.contracts_with_warnings);
+        renderRiskStats(data.risk_counts);
+        renderContractSelect(data.contracts);
         
     } catch (error) {
         console.error('[DASHBOARD ERROR] Failed to load dashboard stats:', error);
@@ -85,15 +100,23 @@ async function loadDashboardStats() {
     }
 }
 
+function renderDashboardStats(data) {
+    // Update status counts with fallback to 0
+    document.getElementById('total-count').textContent = data.total_contracts ?? 0;
+    document.getElementById('active-count').textContent = data.active_contracts ?? 0;
+    document.getElementById('expired-count').textContent = data.expired_contracts ?? 0;
+    document.getElementById('renewed-count').textContent = data.renewed_contracts ?? 0;
+    document.getElementById('pending-count').textContent = data.pending_contracts ?? 0;
+    
+    console.log(`[DASHBOARD] Updated stats - Total: ${data.total_contracts}, Active: ${data.active_contracts}`);
+}
+
 // ============================================================================
 // LOAD WARNING COUNT WITH BREAKDOWN
 // ============================================================================
 async function loadWarningCount() {
     try {
-        const response = await fetch(`${API_BASE}/api/warnings`);
-        const data = await response.json();
-        
-        const warningCount = document.getElementById('warning-count');
+        const data = await fetchJSONWithETag(`${API_BASE}/api/warnings`);
         
         // Count unique contracts with warnings (not warning objects)
         const uniqueContracts = new Set();
@@ -103,27 +126,7 @@ async function loadWarningCount() {
             }
         });
         
-        const totalContractsWithWarnings = uniqueContracts.size;
-        warningCount.textContent = totalContractsWithWarnings;
-        
-        // Store warning data for breakdown
-        window.warningData = {
-            critical: data.stats.critical_count,
-            warning: data.stats.warning_count,
-            info: data.stats.info_count,
-            total: totalContractsWithWarnings,
-            totalWarnings: data.warnings.length,
-            warnings: data.warnings
-        };
-        
-        // Add tooltip with breakdown
-        const warningCard = document.getElementById('stat-card-warning');
-        if (warningCard) {
-            warningCard.title = `${totalContractsWithWarnings} contracts with warnings\nCritical: ${data.stats.critical_count} | Warning: ${data.stats.warning_count} | Info: ${data.stats.info_count}`;
-        }
-        
-        console.log(`[INFO] Found ${totalContractsWithWarnings} contracts with ${data.warnings.length} total warnings`);
-        console.log('[INFO] Warning breakdown:', data.stats);
+        renderWarningCount(data.warnings, data.stats, uniqueContracts.size);
         
     } catch (error) {
         console.error('Error loading warning count:', error);
@@ -131,13 +134,36 @@ async function loadWarningCount() {
     }
 }
 
+function renderWarningCount(warnings, stats, totalContractsWithWarnings) {
+    const warningCount = document.getElementById('warning-count');
+    warningCount.textContent = totalContractsWithWarnings;
+    
+    // Store warning data for breakdown
+    window.warningData = {
+        critical: stats.critical_count,
+        warning: stats.warning_count,
+        info: stats.info_count,
+        total: totalContractsWithWarnings,
+        totalWarnings: stats.total_warnings,
+        warnings: warnings
+    };
+    
+    // Add tooltip with breakdown
+    const warningCard = document.getElementById('stat-card-warning');
+    if (warningCard) {
+        warningCard.title = `${totalContractsWithWarnings} contracts with warnings\nCritical: ${stats.critical_count} | Warning: ${stats.warning_count} | Info: ${stats.info_count}`;
+    }
+    
+    console.log(`[INFO] Found ${totalContractsWithWarnings} contracts with ${stats.total_warnings} total warnings`);
+    console.log('[INFO] Warning breakdown:', stats);
+}
+
 // ============================================================================
 // LOAD RISK LEVEL STATS
 // ============================================================================
 async function loadRiskStats() {
     try {
-        const response = await fetch(`${API_BASE}/api/contracts`);
-        const contracts = await response.json();
+        const contracts = await fetchJSONWithETag(`${API_BASE}/api/contracts`);
         
         // Count by risk level
         const riskCounts = {
@@ -154,11 +180,7 @@ async function loadRiskStats() {
             }
         });
         
-        // Update risk stat cards
-        document.getElementById('risk-low-count').textContent = riskCounts.low;
-        document.getElementById('risk-medium-count').textContent = riskCounts.medium;
-        document.getElementById('risk-high-count').textContent = riskCounts.high;
-        document.getElementById('risk-critical-count').textContent = riskCounts.critical;
+        renderRiskStats(riskCounts);
         
     } catch (error) {
         console.error('Error loading risk stats:', error);
@@ -169,13 +191,20 @@ async function loadRiskStats() {
     }
 }
 
+function renderRiskStats(riskCounts) {
+    // Update risk stat cards
+    document.getElementById('risk-low-count').textContent = riskCounts.low ?? 0;
+    document.getElementById('risk-medium-count').textContent = riskCounts.medium ?? 0;
+    document.getElementById('risk-high-count').textContent = riskCounts.high ?? 0;
+    document.getElementById('risk-critical-count').textContent = riskCounts.critical ?? 0;
+}
+
 // ============================================================================
 // LOAD CRITICAL COUNT (kept for backward compatibility)
 // ============================================================================
 async function loadCriticalCount() {
     try {
-        const response = await fetch(`${API_BASE}/api/warnings`);
-        const data = await response.json();
+        const data = await fetchJSONWithETag(`${API_BASE}/api/warnings`);
         
         const criticalCount = document.getElementById('critical-count');
         
@@ -194,8 +223,7 @@ async function loadCriticalCount() {
 // ============================================================================
 async function loadWarnings() {
     try {
-        const response = await fetch(`${API_BASE}/api/warnings`);
-        const data = await response.json();
+        const data = await fetchJSONWithETag(`${API_BASE}/api/warnings`);
         
         const warningsContainer = document.getElementById('warnings-container');
         const warningCount = document.getElementById('warning-count');
@@ -273,24 +301,9 @@ async function loadContracts(filterType = null) {
             console.log('[LOAD CONTRACTS] Query params:', params.toString());
         }
         
-        // Add cache-busting parameter to ensure fresh data
-        const cacheBuster = `_t=${Date.now()}`;
-        url += (url.includes('?') ? '&' : '?') + cacheBuster;
-        
+        // Fresh data is guaranteed by the ETag check (the server answers 304 only if nothing changed)
         console.log('[LOAD CONTRACTS] Final URL:', url);
-        const response = await fetch(url, {
-            cache: 'no-cache',  // Disable browser caching
-            headers: {
-                'Cache-Control': 'no-cache',
-                'Pragma': 'no-cache'
-            }
-        });
-        
-        if (!response.ok) {
-            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-        }
-        
-        let contracts = await response.json();
+        let contracts = await fetchJSONWithETag(url);
         console.log(`[INFO] Received ${contracts.length} contracts from API`);
         
         // Debug: Log risk levels when filtering by risk
@@ -914,42 +927,14 @@ document.getElementById('upload-form').addEventListener('submit', async (e) => {
 // ============================================================================
 async function loadContractsForSelect() {
     try {
-        const response = await fetch(`${API_BASE}/api/contracts`);
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        const contracts = await response.json();
-        
-        const select = document.getElementById('contract-select');
-        if (!select) {
-            console.error('Contract select element not found');
-            return;
-        }
-        
-        // Clear and reset dropdown
-        select.innerHTML = '<option value="">All Contracts</option>';
+        const contracts = await fetchJSONWithETag(`${API_BASE}/api/contracts`);
         
         // Auto-check RAG status when loading contracts (only if we have contracts)
         if (contracts.length > 0) {
             checkRAGStatusSilently();
         }
         
-        console.log(`Loading ${contracts.length} contracts into dropdown`);
-        
-        // Add each contract to the dropdown
-        contracts.forEach(contract => {
-            const option = document.createElement('option');
-            option.value = contract.id;
-            option.textContent = `${contract.contract_name || 'Unnamed'} (#${contract.contract_number || 'N/A'})`;
-            select.appendChild(option);
-        });
-        
-        console.log(`Successfully loaded ${contracts.length} contracts into dropdown`);
-        
-        // Initialize chat history for the default "All Contracts" view
-        if (!chatHistories['all']) {
-            loadChatHistory('');
-        }
+        renderContractSelect(contracts);
         
     } catch (error) {
         console.error('Error loading contracts for select:', error);
@@ -960,6 +945,41 @@ async function loadContractsForSelect() {
     }
 }
 
+function renderContractSelect(contracts) {
+    const select = document.getElementById('contract-select');
+    if (!select) {
+        console.error('Contract select element not found');
+        return;
+    }
+    
+    // Keep the user's current choice across refreshes
+    const previousValue = select.value;
+    
+    // Clear and reset dropdown
+    select.innerHTML = '<option value="">All Contracts</option>';
+    
+    console.log(`Loading ${contracts.length} contracts into dropdown`);
+    
+    // Add each contract to the dropdown
+    contracts.forEach(contract => {
+        const option = document.createElement('option');
+        option.value = contract.id;
+        option.textContent = `${contract.contract_name || 'Unnamed'} (#${contract.contract_number || 'N/A'})`;
+        select.appendChild(option);
+    });
+    
+    if (previousValue && select.querySelector(`option[value="${previousValue}"]`)) {
+        select.value = previousValue;
+    }
+    
+    console.log(`Successfully loaded ${contracts.length} contracts into dropdown`);
+    
+    // Initialize chat history for the default "All Contracts" view
+    if (!chatHistories['all']) {
+        loadChatHistory('');
+    }
+}
+
 // Chat History Management - Store separate conversations for each contract
 const chatHistories = {};
 let currentContractId = ''; // '' means "All Contracts"
@@ -1028,6 +1048,12 @@ function addUserMessage(message) {
     scrollToBottom();
 }
 
+function formatAge(seconds) {
+    if (seconds < 3600) return `${Math.max(1, Math.round(seconds / 60))} min`;
+    if (seconds < 86400) return `${Math.round(seconds / 3600)} h`;
+    return `${Math.round(seconds / 86400)} days`;
+}
+
 function addAIMessage(message) {
     const chatMessages = document.getElementById('chat-messages');
     const messageDiv = document.createElement('div');
@@ -1157,8 +1183,12 @@ document.getElementById('ask-form').addEventListener('submit', async (e) => {
                 // Show RAG status banner
                 document.getElementById('rag-status-banner').style.display = 'block';
             }
-            // Add AI response to chat
-            addAIMessage(result.answer);
+            // Add AI response to chat (saved FAQ answers say how old they are)
+            let answer = result.answer;
+            if (result.source === 'faq') {
+                answer += `\n\n💾 Saved answer, prepared ${formatAge(result.age_seconds)} ago when the contract was analyzed.`;
+            }
+            addAIMessage(answer);
             // Save chat history after successful response
             saveChatHistory();
         } else {
@@ -1484,8 +1514,7 @@ async function filterWarningsByCategory(category) {
     
     try {
         // Fetch all contracts
-        const response = await fetch(`${API_BASE}/api/contracts`);
-        let contracts = await response.json();
+        let contracts = await fetchJSONWithETag(`${API_BASE}/api/contracts`);
         
         // Filter to only active contracts
         contracts = contracts.filter(contract => contract.status === 'active');
@@ -1999,8 +2028,7 @@ async function openDeleteModal() {
     
     // Fetch all contracts
     try {
-        const response = await fetch(`${API_BASE}/api/contracts?limit=1000`);
-        const contracts = await response.json();
+        const contracts = await fetchJSONWithETag(`${API_BASE}/api/contracts?limit=1000`);
         
         // Sort contracts by number
         contracts.sort((a, b) => {
@@ -2162,9 +2190,9 @@ document.getElementById('deleteContractsModal')?.addEventListener('click', (e) =
 // INITIALIZATION
 // ============================================================================
 document.addEventListener('DOMContentLoaded', () => {
+    // One request renders the first screen (stats, warnings, risk cards, Ask AI dropdown).
+    // The contracts list loads when its tab is opened.
     loadDashboardStats();
-    loadContracts();
-    loadContractsForSelect();  // Load contracts for the Ask AI dropdown on page load
     setupStatCardClickHandlers();
     
     // Setup delete contracts button
@@ -2173,8 +2201,69 @@ document.addEventListener('DOMContentLoaded', () => {
         deleteBtn.addEventListener('click', openDeleteModal);
     }
     
-    // Refresh critical count every 60 seconds
-    setInterval(() => {
-        loadDashboardStats();
-    }, 60000);
+    // Refresh when the server tells us something changed (no polling)
+    connectEventStream();
 });
+
+// ============================================================================
+// LIVE UPDATES (Server-Sent Events)
+// ============================================================================
+// The server pushes contract/warning changes over /api/events.
+// Several events often arrive together (e.g. created + warning-changed),
+// so refreshes are batched into one reload shortly after the last event.
+let refreshTimer = null;
+let fallbackPollTimer = null;
+
+function scheduleRefresh() {
+    clearTimeout(refreshTimer);
+    refreshTimer = setTimeout(() => {
+        // Also refreshes the Ask AI dropdown
+        loadDashboardStats();
+        
+        // Only reload the contracts list if the user can currently see it
+        const activeTab = document.querySelector('.tab-btn.active');
+        if (activeTab && activeTab.getAttribute('data-tab') === 'contracts') {
+            loadContracts(currentFilter);
+        }
+    }, 300);
+}
+
+function connectEventStream() {
+    if (!window.EventSource) {
+        // Very old browser: fall back to polling (cheap thanks to ETags)
+        fallbackPollTimer = setInterval(loadDashboardStats, 60000);
+        return;
+    }
+    
+    const source = new EventSource(`${API_BASE}/api/events`);
+    let hasConnected = false;
+    
+    source.addEventListener('open', () => {
+        // After a reconnect we may have missed events - catch up once
+        if (hasConnected) {
+            scheduleRefresh();
+        }
+        hasConnected = true;
+        console.log('[EVENTS] Connected to live updates');
+    });
+    
+    ['contract-created', 'contract-updated', 'contract-deleted', 'warning-changed', 'resync'].forEach(type => {
+        source.addEventListener(type, (event) => {
+            console.log(`[EVENTS] ${type}`, event.data);
+            scheduleRefresh();
+        });
+    });
+    
+    source.addEventListener('upload-stage', (event) => {
+        const data = JSON.parse(event.data);
+        console.log(`[EVENTS] Upload ${data.file}: ${data.stage}`);
+    });
+    
+    source.addEventListener('error', () => {
+        // The browser reconnects automatically; only poll if it gave up for good
+        if (source.readyState === EventSource.CLOSED && !fallbackPollTimer) {
+            console.warn('[EVENTS] Live updates unavailable, falling back to polling');
+            fallbackPollTimer = setInterval(loadDashboardStats, 60000);
+        }
+    });
+}
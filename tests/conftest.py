@@ -0,0 +1,13 @@
+"""
+Shared test setup.
+
+The settings need a Gemini key to load, and the tests must never touch the
+real contracts.db - so both are set before anything from src is imported.
+Nothing here calls Gemini: the tests cover the pure parts of the system.
+"""
+
+import os
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("LLM_BACKEND", "fake")
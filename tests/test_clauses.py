@@ -0,0 +1,32 @@
+"""
+Tests for src/clauses.py - splitting the AI's clause extraction into rows.
+"""
+
+from src.clauses import format_clauses, locate, parse_clauses
+
+
+CONTRACT = "1. PAYMENT\nThe Client shall pay all invoices within thirty (30) days of receipt.\n"
+
+EXTRACTED = """**Payment Terms:** The Client shall pay all invoices within thirty (30) days of receipt.
+**Termination Clause:** Not specified
+**Liability Limitations**: Capped at the fees paid in the last 12 months.
+"""
+
+
+def test_parse_clauses_types_text_and_offsets():
+    clauses = parse_clauses(EXTRACTED, CONTRACT)
+    assert [clause["clause_type"] for clause in clauses] == ["payment_terms", "liability"]
+    payment = clauses[0]
+    assert CONTRACT[payment["start_offset"]:payment["end_offset"]].startswith("The Client shall pay")
+    # Reworded by the AI: not found in the contract
+    assert clauses[1]["start_offset"] is None
+
+
+def test_format_clauses_round_trip():
+    clauses = parse_clauses(EXTRACTED, CONTRACT)
+    assert parse_clauses(format_clauses(clauses), CONTRACT) == clauses
+
+
+def test_locate_ignores_case_and_whitespace():
+    assert locate("the client  SHALL pay", CONTRACT) == (11, 31)
+    assert locate("nothing like this", CONTRACT) is None
@@ -0,0 +1,59 @@
+"""
+Tests for src/context_packer.py - overlap deduplication and the token budget.
+"""
+
+from src.config import settings
+from src.context_packer import ContextPacker, Passage, estimate_tokens, trim_to_sentence
+
+
+TEXT = " ".join(f"Sentence number {i} of the contract." for i in range(400))
+
+
+def test_overlapping_passages_are_sent_once():
+    packed = ContextPacker().pack(
+        [Passage(1, 0, 3000, score=5), Passage(1, 2500, 5500, score=4)],
+        {1: TEXT},
+        budget_tokens=10_000,
+    )
+    # Neighbouring chunks of the same contract become one span, without the overlap twice
+    assert packed.spans == [(1, 0, 5500)]
+    assert packed.text == TEXT[:5500].strip()
+    assert packed.dropped == 0
+
+
+def test_passage_already_covered_is_dropped():
+    packed = ContextPacker().pack(
+        [Passage(1, 0, 3000, score=5), Passage(1, 500, 1500, score=1)],
+        {1: TEXT},
+        budget_tokens=10_000,
+    )
+    assert packed.spans == [(1, 0, 3000)]
+    assert packed.dropped == 1
+
+
+def test_budget_is_respected_and_the_best_passage_comes_first():
+    budget = 500
+    packed = ContextPacker().pack(
+        [Passage(1, 0, 3000, score=1), Passage(2, 0, 3000, score=9)],
+        {1: TEXT, 2: TEXT},
+        budget_tokens=budget,
+    )
+    assert len(packed.text) <= budget * settings.CHARS_PER_TOKEN
+    assert packed.spans[0][0] == 2
+    # The passage that didn't fit whole is cut at a sentence end
+    assert packed.text.endswith(".")
+
+
+def test_sources_without_text_are_dropped():
+    packed = ContextPacker().pack([Passage(7, 0, 100, score=1)], {}, budget_tokens=1000)
+    assert packed.text == "" and packed.dropped == 1
+
+
+def test_trim_to_sentence():
+    text = "First sentence here. Second sentence is longer than that."
+    assert trim_to_sentence(text, 100) == text
+    assert trim_to_sentence(text, 30) == "First sentence here."
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("x" * 9) == 3
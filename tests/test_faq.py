@@ -0,0 +1,29 @@
+"""
+Tests for src/faq.py - matching questions to precomputed answers.
+"""
+
+from datetime import datetime, timedelta
+
+from src import faq
+
+
+def test_short_questions_match_one_topic():
+    assert faq.match_topic("When can we terminate?") == "termination"
+    assert faq.match_topic("How are invoices paid?") == "payment_terms"
+
+
+def test_multi_topic_or_free_form_questions_go_to_the_ai():
+    assert faq.match_topic("What are the payment and termination terms?") is None
+    assert faq.match_topic("Why is the penalty so high?") is None
+    assert faq.match_topic("") is None
+
+
+def test_answer_sheet_round_trip():
+    generated = datetime(2025, 1, 1, 12, 0, 0)
+    sheet = faq.build_answer_sheet({"termination": "30 days notice.", "renewal": ""}, generated_at=generated)
+    cached = faq.cached_answer(sheet, "termination", now=generated + timedelta(minutes=5))
+    assert cached["answer"] == "30 days notice."
+    assert cached["age_seconds"] == 300
+    # Empty answers aren't saved
+    assert faq.cached_answer(sheet, "renewal") is None
+    assert faq.cached_answer("not json", "termination") is None
@@ -0,0 +1,49 @@
+"""
+Tests for src/filter_index.py - ContractFilterIndex.match.
+"""
+
+from src.filter_index import ContractFilterIndex
+
+
+def _index() -> ContractFilterIndex:
+    index = ContractFilterIndex()
+    index.add(1, {"status": "active", "risk_level": "High", "party_a": "Acme Corp", "party_b": "Widget Ltd",
+                  "start_date": "2024-01-01", "end_date": "2025-12-31", "contract_value": 50000})
+    index.add(2, {"status": "expired", "risk_level": "low", "party_a": "Acme Corp", "party_b": "Globex",
+                  "start_date": "2020-01-01", "end_date": "2021-01-01", "contract_value": 1000})
+    index.add(3, {"status": "active", "risk_level": "critical", "party_a": "Initech", "party_b": "Globex",
+                  "start_date": "2024-06-01", "end_date": "2026-06-30", "contract_value": None})
+    return index
+
+
+def test_no_filters_means_every_contract():
+    assert _index().match({}) is None
+
+
+def test_categories_are_case_insensitive_and_any_of():
+    index = _index()
+    assert index.match({"risk_level": ["high", "critical"]}) == {1, 3}
+    assert index.match({"status": "ACTIVE"}) == {1, 3}
+
+
+def test_party_is_a_substring_of_either_party():
+    assert _index().match({"party": "globex"}) == {2, 3}
+
+
+def test_ranges_are_inclusive():
+    index = _index()
+    assert index.match({"end_date_from": "2025-12-31"}) == {1, 3}
+    assert index.match({"min_value": 1000, "max_value": 50000}) == {1, 2}
+
+
+def test_filters_combine():
+    assert _index().match({"status": ["active"], "party": "acme", "end_date_to": "2026-01-01"}) == {1}
+
+
+def test_removed_and_updated_contracts():
+    index = _index()
+    index.remove(1)
+    assert index.match({"party": "acme"}) == {2}
+    index.add(3, {"status": "expired", "risk_level": "low"})
+    assert index.match({"status": ["active"]}) == set()
+    assert index.match({"max_value": 10**9}) == {2}
@@ -0,0 +1,115 @@
+"""
+Tests for src/question_router.py - which questions are answered from the
+database, and which must go to the AI.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.database import Base, Contract
+from src.question_router import question_router
+
+
+NOW = datetime(2025, 6, 1)
+
+
+async def _route(questions, contract_id=1):
+    """Route each question against one contract in a fresh in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        db.add(Contract(
+            id=1,
+            contract_name="Supply Agreement",
+            contract_number="CNT-2024-1000",
+            party_a="Acme Corp",
+            party_b="Widget Ltd",
+            start_date=datetime(2024, 1, 1),
+            end_date=datetime(2026, 1, 1),
+            status="active",
+            contract_value=120000.0,
+            currency="USD",
+            risk_level="medium",
+        ))
+        await db.commit()
+        answers = [await question_router.route(db, question, contract_id, now=NOW) for question in questions]
+    await engine.dispose()
+    return answers
+
+
+# Questions about a clause: the contract's columns would give a confident, wrong answer
+CLAUSE_QUESTIONS = [
+    "How much are the late fees?",
+    "What is the cost of early termination?",
+    "When does the notice period end?",
+    "When does the warranty period end?",
+    "What is the risk of non-payment?",
+    "Who pays for shipping?",
+    "Who can terminate for convenience?",
+]
+
+
+@pytest.mark.parametrize("question", CLAUSE_QUESTIONS)
+def test_clause_questions_go_to_the_ai(question):
+    assert asyncio.run(_route([question])) == [None]
+
+
+@pytest.mark.parametrize("question, intent", [
+    ("When does CNT-2024-1000 expire?", "end_date"),
+    ("When does the contract end?", "end_date"),
+    ("When did it start?", "start_date"),
+    ("Who are the parties?", "parties"),
+    ("Who is party B?", "party_b"),
+    ("Who is the client?", "party_a"),
+    ("What is the total value?", "value"),
+    ("How much is the contract worth?", "value"),
+    ("What is the risk level?", "risk_level"),
+    ("What is the status?", "status"),
+])
+def test_simple_questions_are_answered_from_the_database(question, intent):
+    [answer] = asyncio.run(_route([question]))
+    assert answer is not None
+    assert answer.intent == intent
+    assert answer.contract_id == 1
+
+
+def test_answers_use_the_contract_columns():
+    expiry, parties, value = asyncio.run(_route([
+        "When does it expire?", "Who are the parties?", "What is the contract value?"
+    ]))
+    assert "January 01, 2026" in expiry.answer
+    assert "Acme Corp" in parties.answer and "Widget Ltd" in parties.answer
+    assert "120,000.00 USD" in value.answer
+
+
+def test_contract_number_in_the_question_finds_the_contract():
+    [answer] = asyncio.run(_route(["When does CNT-2024-1000 expire?"], contract_id=None))
+    assert answer is not None and answer.contract_id == 1
+
+
+def test_free_form_questions_go_to_the_ai():
+    assert asyncio.run(_route([
+        "Explain the renewal conditions",
+        "When does it expire and what are the renewal terms?",
+    ])) == [None, None]
+
+
+def test_portfolio_count_expiring_in_a_window():
+    [answer] = asyncio.run(_route(["How many contracts expire in 2026?"], contract_id=None))
+    assert answer.intent == "count_expiring"
+    assert answer.answer.startswith("1 contract expires in 2026")
+
+
+def test_portfolio_count_by_status():
+    answers = asyncio.run(_route([
+        "How many renewed contracts are there?",
+        "How many active contracts are there?",
+    ], contract_id=None))
+    assert [answer.intent for answer in answers] == ["count", "count"]
+    assert answers[0].answer == "There are 0 renewed contracts."
+    assert answers[1].answer == "There is 1 active contract."
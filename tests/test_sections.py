@@ -0,0 +1,83 @@
+"""
+Tests for src/sections.py - section budgets and the section diff of contract versions.
+"""
+
+from src.sections import PREAMBLE, _fair_shares, diff_sections, fit_parts, segment
+
+
+CONTRACT = """SERVICES AGREEMENT
+Between Acme Corp and Widget Ltd.
+
+1. PAYMENT TERMS
+The Client shall pay within 30 days of invoice.
+
+2. TERMINATION
+Either party may terminate with 30 days written notice.
+
+3. CONFIDENTIALITY
+All information exchanged is confidential.
+"""
+
+
+def test_fair_shares_short_sections_get_all_they_need():
+    assert _fair_shares([100, 1000, 1000], 1100) == [100, 500, 500]
+
+
+def test_fair_shares_everything_fits():
+    assert _fair_shares([10, 20, 30], 1000) == [10, 20, 30]
+
+
+def test_fair_shares_never_exceed_the_budget():
+    shares = _fair_shares([500, 700, 900, 50], 1000)
+    assert sum(shares) <= 1000
+    assert shares[3] == 50
+
+
+def test_fair_shares_negative_budget():
+    assert _fair_shares([10, 20], -5) == [0, 0]
+
+
+def test_fit_parts_trims_long_parts():
+    parts = ["Short part.", "A long sentence. " * 50]
+    fitted = fit_parts(parts, 300)
+    assert fitted[0] == "Short part."
+    assert fitted[1].endswith(" [...]")
+    assert len("\n\n".join(fitted)) <= 300 + len(" [...]")
+
+
+def test_segment_finds_numbered_headings():
+    titles = [section.title for section in segment(CONTRACT)]
+    assert titles[0] == "SERVICES AGREEMENT" or titles[0] == PREAMBLE
+    assert "PAYMENT TERMS" in titles and "TERMINATION" in titles and "CONFIDENTIALITY" in titles
+
+
+def test_diff_sections_unchanged():
+    diff = diff_sections(CONTRACT, CONTRACT)
+    assert not diff.has_changes
+
+
+def test_diff_sections_ignores_whitespace_and_renumbering():
+    renumbered = CONTRACT.replace("2. TERMINATION", "7) TERMINATION").replace("30 days written", "30  days\nwritten")
+    assert not diff_sections(CONTRACT, renumbered).has_changes
+
+
+def test_diff_sections_changed_added_removed():
+    new = CONTRACT.replace("within 30 days", "within 45 days").replace(
+        "3. CONFIDENTIALITY\nAll information exchanged is confidential.\n",
+        "3. GOVERNING LAW\nThe laws of Delaware apply.\n",
+    )
+    diff = diff_sections(CONTRACT, new)
+    assert diff.changed == ["PAYMENT TERMS"]
+    assert diff.added == ["GOVERNING LAW"]
+    assert diff.removed == ["CONFIDENTIALITY"]
+    assert "TERMINATION" in diff.unchanged
+    # Spans point at the section in each version
+    start, end = diff.new_spans["PAYMENT TERMS"]
+    assert "45 days" in new[start:end]
+
+
+def test_diff_affects_only_tasks_reading_the_section():
+    new = CONTRACT.replace("is confidential", "is strictly confidential")
+    diff = diff_sections(CONTRACT, new)
+    assert diff.affects("summary") and diff.affects("clauses")
+    assert not diff.affects("risk")
@@ -0,0 +1,67 @@
+"""
+Tests for src/text_compaction.py - what is removed, and mapping positions back to the original.
+"""
+
+from src.text_compaction import OffsetMap, TextCompactor, join_pages
+
+
+def _page(number: int, body: str) -> str:
+    return f"Acme Corp - Master Agreement\n{body}\nPage {number} of 3"
+
+
+PAGES = [
+    _page(1, "1. SERVICES\nThe Vendor shall pro-\nvide monthly    reports to the Client."),
+    _page(2, "2. PAYMENT\nThe Client shall pay within 30 days."),
+    _page(3, "SIGNATURES\nBy: ____________\nName: [Authorized Signatory]\nAcme Corp"),
+]
+
+
+def test_compaction_removes_furniture_hyphenation_and_spaces():
+    compacted = TextCompactor().compact(join_pages(PAGES))
+    assert "Page 2 of 3" not in compacted.text
+    assert "Master Agreement" not in compacted.text
+    assert "The Vendor shall provide monthly reports" in compacted.text
+    assert "By: ____" not in compacted.text
+    assert compacted.removed["page_furniture"] > 0
+    assert compacted.removed["signature_boilerplate"] > 0
+    assert compacted.removed["hyphenation"] == 2
+
+
+def test_compound_words_keep_their_hyphen():
+    text = "The non-\ncompete binds any self-\nemployed or third-\nparty agent, sub-\nject to the subject matter."
+    compacted = TextCompactor().compact(text).text
+    assert "non-compete" in compacted
+    assert "self-employed" in compacted
+    assert "third-party" in compacted
+    # Written elsewhere without a hyphen: a word split at the line end
+    assert "subject to the subject" in compacted
+
+
+def test_every_compacted_position_maps_back_to_the_same_text():
+    original = join_pages(PAGES)
+    compacted = TextCompactor().compact(original)
+    for phrase in ("The Client shall pay within 30 days.", "SIGNATURES", "reports to the Client"):
+        start = compacted.text.index(phrase)
+        original_start = compacted.offset_map.to_original(start)
+        assert original[original_start:original_start + len(phrase)] == phrase
+
+
+def test_signature_words_in_the_body_are_kept():
+    body = "1. RECORDS\nSigned copies shall be kept by each party.\nTitle\nThe title passes on delivery.\n"
+    text = body + "Body text.\n" * 20
+    assert "Title\n" in TextCompactor().compact(text).text
+
+
+def test_offset_map_to_original():
+    offset_map = OffsetMap(compact=[0, 10], original=[0, 15], original_length=40)
+    assert offset_map.to_original(None) is None
+    assert offset_map.to_original(5) == 5
+    assert offset_map.to_original(12) == 17
+    assert offset_map.to_original(100) == 40   # Never past the end of the original
+
+
+def test_offset_map_json_round_trip():
+    offset_map = OffsetMap(compact=[0, 4], original=[0, 9], original_length=20)
+    assert OffsetMap.from_json(offset_map.to_json()) == offset_map
+    assert OffsetMap.from_json(None) is None
+    assert OffsetMap.from_json("not json") is None